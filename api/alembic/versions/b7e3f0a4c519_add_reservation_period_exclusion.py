@@ -0,0 +1,57 @@
+"""add_reservation_period_exclusion
+
+Revision ID: b7e3f0a4c519
+Revises: a4c1e7d92b36
+Create Date: 2026-06-29 15:37:21.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3f0a4c519'
+down_revision: Union[str, Sequence[str], None] = 'a4c1e7d92b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Duração aplicada às reservas que já existiam (mesmo padrão de RESERVATION_DURATION_MINUTES)
+DEFAULT_DURATION_MINUTES = 120
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('reservations', sa.Column('end_time', sa.DateTime(timezone=True), nullable=True))
+    op.execute(
+        f"UPDATE reservations SET end_time = reservation_time + interval '{DEFAULT_DURATION_MINUTES} minutes'"
+    )
+    # Reservas antigas sobrepostas na mesma mesa: o período da anterior termina onde a próxima começa
+    # (nenhuma reserva é apagada; com o mesmo horário de início o período fica vazio e não conflita)
+    op.execute("""
+        UPDATE reservations r
+        SET end_time = n.next_start
+        FROM (
+            SELECT id, lead(reservation_time) OVER (PARTITION BY table_id ORDER BY reservation_time, id) AS next_start
+            FROM reservations
+        ) n
+        WHERE n.id = r.id AND n.next_start IS NOT NULL AND n.next_start < r.end_time
+    """)
+    op.alter_column('reservations', 'end_time', nullable=False)
+    op.create_index(op.f('ix_reservations_end_time'), 'reservations', ['end_time'], unique=False)
+    # Mesmas expressões do ExcludeConstraint do modelo (int4range no lugar de btree_gist)
+    op.execute("""
+        ALTER TABLE reservations ADD CONSTRAINT ex_reservations_table_period
+        EXCLUDE USING gist (
+            int4range(table_id, table_id, '[]') WITH &&,
+            tstzrange(reservation_time, end_time, '[)') WITH &&
+        )
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('ex_reservations_table_period', 'reservations')
+    op.drop_index(op.f('ix_reservations_end_time'), table_name='reservations')
+    op.drop_column('reservations', 'end_time')
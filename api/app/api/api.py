@@ -4,28 +4,48 @@ from app.api.endpoints import (
     login, users, sales, cash_register, reports, additionals,
     customers, suppliers, ingredients, tables, orders, marketing, reservations, walls, feedbacks
 )
+from app.api.conditional import conditional_get, RowStamp, VersionStamp
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+from app.models.table import Table
+from app.models.variation import ProductVariation
+from app.schemas.enums import OrderStatus
+
+# --- GET condicional (ETag/Last-Modified, 304 sem ler as linhas) das listas de catálogo e salão ---
+# Produtos trazem categoria, subcategoria, fornecedor e variações (com opções de atributo)
+catalog_conditional = conditional_get(
+    RowStamp(Product), RowStamp(ProductVariation, join=Product),
+    VersionStamp("categories"), VersionStamp("suppliers"), VersionStamp("attributes"),
+    exclude=("/lookup", "/barcode/{barcode}"),
+)
+# Mesas trazem a comanda aberta de cada uma (e se há itens prontos)
+floor_conditional = conditional_get(
+    RowStamp(Table),
+    RowStamp(Order, where=Order.status == OrderStatus.OPEN),
+    RowStamp(OrderItem, join=Order, where=Order.status == OrderStatus.OPEN),
+)
 
 api_router = APIRouter()
 
 api_router.include_router(login.router, prefix="/login", tags=["login"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(stores.router, prefix="/stores", tags=["stores"])
-api_router.include_router(products.router, prefix="/products", tags=["products"])
-api_router.include_router(categories.router, prefix="/categories", tags=["categories"])
+api_router.include_router(products.router, prefix="/products", tags=["products"], dependencies=[catalog_conditional])
+api_router.include_router(categories.router, prefix="/categories", tags=["categories"], dependencies=[conditional_get(VersionStamp("categories"))])
 api_router.include_router(customers.router, prefix="/customers", tags=["customers"])
-api_router.include_router(suppliers.router, prefix="/suppliers", tags=["suppliers"])
+api_router.include_router(suppliers.router, prefix="/suppliers", tags=["suppliers"], dependencies=[conditional_get(VersionStamp("suppliers"))])
 api_router.include_router(sales.router, prefix="/sales", tags=["sales"])
 api_router.include_router(reservations.router, prefix="/reservations", tags=["reservations"]) # <-- Adicione a nova rota
 api_router.include_router(cash_register.router, prefix="/cash-registers", tags=["cash-register"])
 # -----------------------------
-api_router.include_router(walls.router, prefix="/walls", tags=["walls"]) # <--- ADICIONE ESTA LINHA
+api_router.include_router(walls.router, prefix="/walls", tags=["walls"], dependencies=[conditional_get(VersionStamp("walls"))])
 api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
-api_router.include_router(additionals.router, prefix="/additionals", tags=["additionals"])
+api_router.include_router(additionals.router, prefix="/additionals", tags=["additionals"], dependencies=[conditional_get(VersionStamp("additionals"))])
 api_router.include_router(ingredients.router, prefix="/ingredients", tags=["ingredients"])
-api_router.include_router(tables.router, prefix="/tables", tags=["tables"])
+api_router.include_router(tables.router, prefix="/tables", tags=["tables"], dependencies=[floor_conditional])
 api_router.include_router(orders.router, prefix="/orders", tags=["orders"])
 api_router.include_router(marketing.router, prefix="/marketing", tags=["marketing"])
 api_router.include_router(batches.router, prefix="/batches", tags=["batches"])
-api_router.include_router(attributes.router, prefix="/attributes", tags=["attributes"])
+api_router.include_router(attributes.router, prefix="/attributes", tags=["attributes"], dependencies=[conditional_get(VersionStamp("attributes"))])
 api_router.include_router(super_admin.router, prefix="/super-admin", tags=["super-admin"])  
 api_router.include_router(feedbacks.router, prefix="/feedbacks", tags=["feedbacks"]) # <--- ADICIONE ESTA LINHA
@@ -0,0 +1,191 @@
+# api/app/api/conditional.py
+"""
+GET condicional (ETag / Last-Modified) para as listagens de catálogo e salão.
+
+POS, cadastro de produtos, planta do salão e KDS pedem as mesmas listas o tempo todo, e elas
+quase nunca mudaram. Em vez de montar a lista para depois descobrir que é igual, o validador
+vem de agregados baratos da loja, calculados numa única consulta antes da rota rodar:
+
+- `RowStamp(model)`: count(*), soma dos xmin (muda em qualquer UPDATE, mesmo que o updated_at
+  seja o início de uma transação que confirmou depois) e max(updated_at), que vira o Last-Modified;
+- `VersionStamp(entity)`: a versão do dado no cache por loja (app.core.tenant_cache), sem consulta
+  quando o LISTEN está ativo.
+
+Se o If-None-Match (ou, sem ele, o If-Modified-Since) bate, a resposta é 304 e as linhas nem
+são lidas. Senão a rota roda normalmente e o `ConditionalHeadersMiddleware` coloca ETag,
+Last-Modified e Cache-Control na resposta 200 (inclusive nas Responses prontas, como a
+FlatJSONResponse). Aplicado por router em app/api/api.py:
+
+    api_router.include_router(walls.router, ..., dependencies=[conditional_get(VersionStamp("walls"))])
+
+Remoções só aparecem no ETag (pelo count), não no Last-Modified: o ETag é o validador preciso.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, List, Optional, Sequence, Union
+
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import BigInteger, DateTime, String, cast, func, literal_column, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.dependencies import get_db, get_current_active_user
+from app.core.tenant_cache import tenant_cache
+from app.models.user import User as UserModel
+from app.schemas.enums import UserRole
+
+# Chave em request.state com os headers que o middleware aplica na resposta
+STATE_KEY = "conditional_headers"
+# O navegador guarda a resposta, mas sempre revalida antes de usar
+CACHE_CONTROL = "private, no-cache"
+
+
+class RowStamp:
+    """ Agregados das linhas de `model` da loja. `join`: modelo que tem o store_id (ex.: itens -> comanda). """
+
+    def __init__(self, model: Any, *, join: Any = None, where: Any = None):
+        self.model = model
+        self.join = join
+        self.where = where
+
+    def subquery(self, store_id: int, index: int):
+        table = self.model.__table__
+        owner = self.join if self.join is not None else self.model
+        columns = [
+            func.count().label(f"c{index}"),
+            # xmin (xid) não tem cast direto para número: xmin::text::bigint
+            func.coalesce(func.sum(cast(cast(literal_column(f"{table.name}.xmin"), String), BigInteger)), 0).label(f"x{index}"),
+        ]
+        if "updated_at" in table.c:
+            # Coluna sem fuso gravada com now(): o cast usa o mesmo TimeZone da sessão que gravou
+            columns.append(func.max(cast(table.c.updated_at, DateTime(timezone=True))).label(f"m{index}"))
+        stmt = select(*columns).select_from(self.model)
+        if self.join is not None:
+            stmt = stmt.join(self.join)
+        stmt = stmt.where(owner.store_id == store_id)
+        if self.where is not None:
+            stmt = stmt.where(self.where)
+        return stmt.subquery(f"stamp{index}")
+
+
+class VersionStamp:
+    """ Versão do dado de referência `entity` no cache por loja. """
+
+    def __init__(self, entity: str):
+        self.entity = entity
+
+
+Stamp = Union[RowStamp, VersionStamp]
+
+
+async def _compute(db: AsyncSession, store_id: int, stamps: List[Stamp]):
+    parts: List[str] = []
+    last_modified: Optional[datetime] = None
+
+    row_stamps = [(i, s) for i, s in enumerate(stamps) if isinstance(s, RowStamp)]
+    if row_stamps:
+        subqueries = [stamp.subquery(store_id, i) for i, stamp in row_stamps]
+        stmt = select(*[c for sq in subqueries for c in sq.c]).select_from(subqueries[0])
+        for sq in subqueries[1:]:
+            stmt = stmt.join(sq, true())
+        row = (await db.execute(stmt)).mappings().one()
+        for key, value in row.items():
+            if key.startswith("m"):
+                if value is not None and (last_modified is None or value > last_modified):
+                    last_modified = value
+                parts.append(f"{key}={value.isoformat() if value else ''}")
+            else:
+                parts.append(f"{key}={value}")
+
+    entities = [stamp.entity for stamp in stamps if isinstance(stamp, VersionStamp)]
+    if entities:
+        versions = await tenant_cache.current_versions(db, store_id, entities)
+        parts.extend(f"{entity}={versions[entity]}" for entity in entities)
+    return parts, last_modified
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # Comparação fraca (RFC 9110): W/"x" e "x" são o mesmo validador
+    if if_none_match.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # O header tem precisão de segundos
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional_get(*stamps: Stamp, exclude: Sequence[str] = ()):
+    """
+    Dependência de router: em GET/HEAD calcula o validador da loja do usuário e responde 304
+    se o cliente já tem essa versão. Outros métodos passam direto, assim como as rotas cujo
+    caminho termina com um dos sufixos de `exclude` (ex.: buscas por digitação, com URL
+    diferente a cada tecla, que nunca revalidam).
+    """
+    stamp_list = list(stamps)
+
+    async def dependency(
+        request: Request,
+        db: AsyncSession = Depends(get_db),
+        current_user: UserModel = Depends(get_current_active_user),
+    ) -> None:
+        # Super admin enxerga todas as lojas: os agregados da própria loja não valem para ele
+        if request.method not in ("GET", "HEAD") or current_user.role == UserRole.SUPER_ADMIN or current_user.store_id is None:
+            return
+        route = request.scope.get("route")
+        if exclude and route is not None and route.path.endswith(tuple(exclude)):
+            return
+
+        parts, last_modified = await _compute(db, current_user.store_id, stamp_list)
+        # Caminho + query: listagens diferentes da mesma loja não dividem o mesmo ETag
+        seed = "|".join([request.url.path, request.url.query, str(current_user.store_id), *parts])
+        etag = f'W/"{hashlib.sha1(seed.encode()).hexdigest()[:20]}"'
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None:
+            not_modified = _matches(if_none_match, etag)
+        else:
+            not_modified = bool(if_modified_since and last_modified and _not_modified_since(if_modified_since, last_modified))
+        if not_modified:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        setattr(request.state, STATE_KEY, headers)
+
+    return Depends(dependency)
+
+
+class ConditionalHeadersMiddleware:
+    """ Coloca na resposta 200 os validadores calculados por `conditional_get` (ASGI puro, sem buffer). """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_validators(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                validators = scope.get("state", {}).get(STATE_KEY)
+                if validators:
+                    headers = MutableHeaders(scope=message)
+                    for name, value in validators.items():
+                        if name not in headers:
+                            headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
@@ -8,6 +8,7 @@ from app.crud import crud_additional
 from app.schemas.additional import Additional, AdditionalCreate
 from app.schemas.user import User
 from app.api.dependencies import get_db, get_current_user
+from app.core.tenant_cache import tenant_cache
 # --- FIM DA CORREÇÃO ---
 
 
@@ -19,11 +20,15 @@ async def create_additional(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return await crud_additional.create_additional(db=db, additional=additional_in)
+    return await crud_additional.create_additional(db=db, additional=additional_in, current_user=current_user)
 
 @router.get("/", response_model=List[Additional])
 async def read_additionals(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user) # Protegido para consistência
 ):
-    return await crud_additional.get_additionals(db)
\ No newline at end of file
+    """ Adicionais da loja, do cache por loja. """
+    return await tenant_cache.respond(
+        db, entity=crud_additional.CACHE_ENTITY, schema=List[Additional], current_user=current_user,
+        loader=lambda: crud_additional.get_additionals(db, current_user=current_user),
+    )
\ No newline at end of file
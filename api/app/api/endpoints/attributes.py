@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
@@ -6,6 +6,7 @@ from app.crud import crud_attribute
 from app.schemas.variation import Attribute, AttributeCreate, AttributeOption, AttributeOptionCreate
 from app.schemas.user import User
 from app.api.dependencies import get_db, get_current_user
+from app.core.tenant_cache import tenant_cache
 
 router = APIRouter()
 
@@ -16,15 +17,18 @@ async def create_attribute(
     current_user: User = Depends(get_current_user)
 ):
     """Cria um novo Atributo (ex: Cor, Tamanho)."""
-    return await crud_attribute.create_attribute(db=db, attribute=attribute_in)
+    return await crud_attribute.create_attribute(db=db, attribute=attribute_in, current_user=current_user)
 
 @router.get("/", response_model=List[Attribute])
 async def read_attributes(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Lista todos os Atributos e suas Opções."""
-    return await crud_attribute.get_attributes(db)
+    """Lista os Atributos da loja e suas Opções (cache por loja)."""
+    return await tenant_cache.respond(
+        db, entity=crud_attribute.CACHE_ENTITY, schema=List[Attribute], current_user=current_user,
+        loader=lambda: crud_attribute.get_attributes(db, current_user=current_user),
+    )
 
 @router.post("/{attribute_id}/options", response_model=AttributeOption)
 async def create_attribute_option(
@@ -34,4 +38,8 @@ async def create_attribute_option(
     current_user: User = Depends(get_current_user)
 ):
     """Cria uma nova Opção para um Atributo (ex: Adicionar 'Verde' à 'Cor')."""
-    return await crud_attribute.create_attribute_option(db=db, option=option_in, attribute_id=attribute_id)
\ No newline at end of file
+    if not await crud_attribute.get_attribute(db, attribute_id, current_user=current_user):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Atributo não encontrado.")
+    return await crud_attribute.create_attribute_option(
+        db=db, option=option_in, attribute_id=attribute_id, current_user=current_user
+    )
\ No newline at end of file
@@ -11,6 +11,8 @@ from app.schemas.batch import ProductBatch, ProductBatchCreate
 from app.models.user import User as UserModel
 from app.models.product import Product
 from app.api.dependencies import get_db, get_current_active_user
+from app.services.stock_alert_service import stock_alert_service
+from app.services.stock_service import stock_service
 
 
 router = APIRouter()
@@ -41,6 +43,16 @@ async def read_batches(
     )
 
 
+@router.get("/expiring", response_model=List[ProductBatch])
+async def read_expiring_batches(
+    days: int = Query(7, ge=0, le=365, description="Incluir lotes vencendo nos próximos X dias (e os já vencidos)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    """ Lista os lotes com saldo vencidos ou próximos do vencimento, ordenados pela validade. """
+    return await batch.get_expiring(db, store_id=current_user.store_id, days=days)
+
+
 @router.delete("/{batch_id}", response_model=ProductBatch)
 async def delete_batch(
     batch_id: int,
@@ -54,8 +66,10 @@ async def delete_batch(
 
     product = await db.get(Product, batch_to_delete.product_id)
     if product:
-        product.stock -= batch_to_delete.quantity
-        db.add(product)
+        new_stock = await stock_service.apply_increment_async(
+            db, model=Product, row_id=product.id, delta=-batch_to_delete.quantity, instance=product
+        )
+        stock_alert_service.check_threshold(db, product=product, previous_stock=new_stock + batch_to_delete.quantity)
 
     deleted_batch = await batch.remove(db, id=batch_id, current_user=current_user)
     return deleted_batch
\ No newline at end of file
@@ -1,19 +1,20 @@
 # api/app/api/endpoints/cash_register.py
 
+import json
 from datetime import datetime
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, AsyncIterator, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
 
 from app.api.dependencies import get_db, get_current_active_user
 from app.models.user import User as UserModel
-from app.models.order import Order, OrderItem
-from app.models.cash_register import CashRegister
+from app.db.session import AsyncSessionLocal
 from app.schemas.cash_register import (
     CashRegister as CashRegisterSchema, 
     CashRegisterOpen, 
-    CashRegisterClose
+    CashRegisterClose,
+    CashRegisterHistory,
 )
 from app.crud.crud_cash_register import cash_register as crud_cash_register
 
@@ -55,58 +56,78 @@ async def close_cash_register(
     close_info: CashRegisterClose,
     current_user: UserModel = Depends(get_current_active_user)
 ) -> Any:
-    open_register = await crud_cash_register.get_open_register_for_store(db, store_id=current_user.store_id)
+    closed_register = await crud_cash_register.close_register(db, store_id=current_user.store_id, close_info=close_info)
     
-    if not open_register:
+    if not closed_register:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, 
             detail="Você não tem nenhum caixa aberto para fechar."
         )
 
-    stmt_sales = (
-        select(func.sum(OrderItem.quantity * OrderItem.price_at_order))
-        .select_from(Order)
-        .join(OrderItem)
-        .where(
-            Order.created_at >= open_register.opened_at,
-            Order.status == "PAID", 
-            Order.store_id == current_user.store_id
-        )
-    )
-    result_sales = await db.execute(stmt_sales)
-    total_sales = result_sales.scalar() or 0.0
-
-    expected_balance = float(open_register.opening_balance) + float(total_sales)
-    difference = float(close_info.closing_balance) - expected_balance
-
-    open_register.status = "CLOSED"
-    open_register.closed_at = func.now() 
-    open_register.closing_balance = close_info.closing_balance
-
-    db.add(open_register)
-    await db.commit()
-    await db.refresh(open_register)
-
+    # Saldo esperado vem do ledger do caixa: inclui vendas do PDV e de comandas,
+    # suprimentos e sangrias, exatamente como registrados nas transações.
     return {
-        "id": open_register.id,
-        "opened_at": open_register.opened_at,
-        "closed_at": open_register.closed_at,
-        "opening_balance": open_register.opening_balance, 
-        "closing_balance": open_register.closing_balance,
-        "total_sales": float(total_sales),
-        "expected_balance": expected_balance,
-        "difference": difference
+        "id": closed_register.id,
+        "opened_at": closed_register.opened_at,
+        "closed_at": closed_register.closed_at,
+        "opening_balance": closed_register.opening_balance, 
+        "closing_balance": closed_register.closing_balance,
+        "total_sales": closed_register.total_sales,
+        "expected_balance": closed_register.expected_balance,
+        "difference": closed_register.balance_difference,
+        "balances_by_method": {b.payment_method: b.amount for b in closed_register.balances},
     }
 
-@router.get("/history", response_model=List[CashRegisterSchema])
+@router.get("/history", response_model=CashRegisterHistory)
 async def get_cash_register_history(
+    limit: int = Query(20, ge=1, le=100, description="Turnos por página"),
+    cursor: Optional[str] = Query(None, description="Valor de `next_cursor` da página anterior"),
     db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
-    stmt = select(CashRegister).where(
-        CashRegister.store_id == current_user.store_id,
-        CashRegister.status == "CLOSED"
-    ).order_by(CashRegister.closed_at.desc())
-    
-    result = await db.execute(stmt)
-    return result.scalars().all()
\ No newline at end of file
+    """
+    Histórico de caixas fechados com os totais de cada turno (por tipo e forma de pagamento).
+    O detalhe das transações fica em /{register_id}/transactions.
+    """
+    return await crud_cash_register.get_history_page(
+        db, store_id=current_user.store_id, limit=limit, cursor=cursor
+    )
+
+# Linhas buscadas por ida ao banco durante o streaming
+TRANSACTIONS_STREAM_BATCH = 500
+
+async def _stream_transactions(register_id: int) -> AsyncIterator[str]:
+    # Sessão própria: o corpo é enviado depois que a rota retorna, e o gerador controla o ciclo de vida
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            crud_cash_register.transactions_query(register_id).execution_options(yield_per=TRANSACTIONS_STREAM_BATCH)
+        )
+        yield "["
+        first = True
+        async for row in result:
+            item = {
+                "id": row.id,
+                "transaction_type": row.transaction_type.value,
+                "payment_method": row.payment_method,
+                "amount": row.amount,
+                "sale_id": row.sale_id,
+                "description": row.description,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+            }
+            yield ("" if first else ",") + json.dumps(item, ensure_ascii=False)
+            first = False
+        yield "]"
+
+@router.get("/{register_id}/transactions")
+async def stream_cash_register_transactions(
+    register_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    """
+    Detalhe das transações de um turno, enviado em streaming (array JSON) em lotes,
+    sem montar a lista inteira em memória.
+    """
+    if not await crud_cash_register.get_for_store(db, register_id=register_id, store_id=current_user.store_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Caixa não encontrado.")
+    return StreamingResponse(_stream_transactions(register_id), media_type="application/json")
@@ -8,6 +8,7 @@ from app.schemas.category import ProductCategory, ProductCategoryCreate, Product
 from app.api.dependencies import get_db, get_current_active_user, RoleChecker
 from app.schemas.enums import UserRole
 from app.api import dependencies
+from app.core.tenant_cache import tenant_cache
 
 router = APIRouter()
 manager_permissions = RoleChecker([UserRole.ADMIN, UserRole.MANAGER])
@@ -19,8 +20,12 @@ async def read_categories(
     limit: int = 100,
     current_user: UserModel = Depends(dependencies.get_current_active_user),
 ) -> Any:
-    """ Lista as categorias da loja. """
-    return await crud.category.get_multi(db, skip=skip, limit=limit, current_user=current_user)
+    """ Lista as categorias da loja (com subcategorias), do cache por loja. """
+    return await tenant_cache.respond(
+        db, entity=crud.category.cache_entity, schema=List[ProductCategory], current_user=current_user,
+        loader=lambda: crud.category.get_multi(db, skip=skip, limit=limit, current_user=current_user),
+        variant=f"{skip}:{limit}",
+    )
 
 @router.post("/", response_model=ProductCategory, status_code=status.HTTP_201_CREATED)
 async def create_category(
@@ -1,55 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
+from typing import Literal, Optional
 
+from app import crud
 from app.api.dependencies import get_db, get_current_active_user, RoleChecker
 from app.models.user import User as UserModel
-from app.models.feedback import Feedback
+from app.models.feedback import Feedback, FeedbackImage, FeedbackStatus
 from app.schemas.enums import UserRole
-from app.schemas.feedback import FeedbackCreate, FeedbackUpdateStatus
+from app.schemas.feedback import FeedbackCreate, FeedbackPage
+from app.services.blob_store import blob_store
 
 router = APIRouter()
 super_admin_permissions = RoleChecker([UserRole.SUPER_ADMIN])
 
+# O conteúdo de um hash nunca muda: o navegador pode guardar o arquivo enquanto a URL valer
+IMAGE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
 @router.post("/")
 async def create_feedback(
     feedback_in: FeedbackCreate,
     db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
-    new_feedback = Feedback(
-        user_id=current_user.id,
-        store_id=current_user.store_id,
-        subject=feedback_in.subject,
-        description=feedback_in.description,
-        image_data=feedback_in.image_data # --- SALVANDO A IMAGEM ---
-    )
-    db.add(new_feedback)
-    await db.commit()
+    await crud.feedback.create_with_images(db, obj_in=feedback_in, current_user=current_user)
     return {"message": "Feedback enviado com sucesso"}
 
-@router.get("/", dependencies=[Depends(super_admin_permissions)])
-async def get_all_feedbacks(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(Feedback)
-        .options(selectinload(Feedback.user), selectinload(Feedback.store))
-        .order_by(Feedback.created_at.desc())
-    )
-    feedbacks = result.scalars().all()
-    
-    return [
-        {
-            "id": f.id,
-            "subject": f.subject,
-            "description": f.description,
-            "image_data": f.image_data, # --- RETORNANDO A IMAGEM ---
-            "status": f.status,
-            "created_at": f.created_at,
-            "user_name": f.user.full_name,
-            "store_name": f.store.name if f.store else "Sem Loja (Admin)",
-        } for f in feedbacks
-    ]
+@router.get("/", response_model=FeedbackPage, dependencies=[Depends(super_admin_permissions)])
+async def get_all_feedbacks(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100, description="Chamados por página"),
+    cursor: Optional[str] = Query(None, description="Valor de `next_cursor` da página anterior"),
+    status_filter: Optional[FeedbackStatus] = Query(None, alias="status", description="Filtra por status"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Chamados paginados, só com os metadados das imagens e as URLs (assinadas) da miniatura
+    e do arquivo original. Nenhuma imagem vai no corpo da resposta.
+    """
+    page = await crud.feedback.get_page(db, limit=limit, cursor=cursor, status_filter=status_filter)
+    for item in page["items"]:
+        for image in item["images"]:
+            image["url"] = _signed_url(request, image["sha256"], "original")
+            image["thumbnail_url"] = _signed_url(request, image["sha256"], "thumbnail")
+    return page
 
 @router.put("/{feedback_id}/resolve", dependencies=[Depends(super_admin_permissions)])
 async def resolve_feedback(feedback_id: int, db: AsyncSession = Depends(get_db)):
@@ -57,7 +52,69 @@ async def resolve_feedback(feedback_id: int, db: AsyncSession = Depends(get_db))
     feedback = result.scalars().first()
     if not feedback:
         raise HTTPException(status_code=404, detail="Chamado não encontrado")
-    
+
     feedback.status = "RESOLVED"
     await db.commit()
-    return {"message": "Chamado resolvido"}
\ No newline at end of file
+    return {"message": "Chamado resolvido"}
+
+# --- Arquivos das imagens (URLs assinadas: <img src> não envia o token) ---
+
+def _signed_url(request: Request, sha256: str, variant: Literal["original", "thumbnail"]) -> str:
+    route = "get_feedback_image" if variant == "original" else "get_feedback_image_thumbnail"
+    return f"{request.url_for(route, sha256=sha256)}?{blob_store.signed_query(sha256, variant)}"
+
+def _check_signature(sha256: str, variant: str, expires: int, sig: str) -> None:
+    if not blob_store.is_valid_sha256(sha256) or not blob_store.verify_signature(sha256, variant, expires, sig):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Link da imagem inválido ou expirado.")
+
+def _not_modified(request: Request, etag: str) -> Optional[Response]:
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL})
+    return None
+
+@router.get("/images/{sha256}", name="get_feedback_image")
+async def get_feedback_image(
+    sha256: str,
+    request: Request,
+    expires: int = Query(...),
+    sig: str = Query(...),
+    db: AsyncSession = Depends(get_db)
+):
+    """ Imagem original, com ETag (o próprio hash), If-None-Match e Range (download parcial/retomado). """
+    _check_signature(sha256, "original", expires, sig)
+    etag = f'"{sha256}"'
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    path = blob_store.path(sha256)
+    content_type = await db.scalar(
+        select(FeedbackImage.content_type).where(FeedbackImage.sha256 == sha256).limit(1)
+    )
+    if content_type is None or not path.exists():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Imagem não encontrada.")
+    # O FileResponse do Starlette responde Range/If-Range (206) a partir destes headers
+    return FileResponse(path, media_type=content_type, headers={"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL})
+
+@router.get("/images/{sha256}/thumbnail", name="get_feedback_image_thumbnail")
+async def get_feedback_image_thumbnail(
+    sha256: str,
+    request: Request,
+    expires: int = Query(...),
+    sig: str = Query(...)
+):
+    """ Miniatura JPEG. Se ainda não foi gerada (ou falhou), é gerada agora no pool de miniaturas. """
+    _check_signature(sha256, "thumbnail", expires, sig)
+    etag = f'"{sha256}-thumb"'
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    if not blob_store.path(sha256).exists():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Imagem não encontrada.")
+    try:
+        path = await blob_store.ensure_thumbnail(sha256)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return FileResponse(path, media_type="image/jpeg", headers={"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL})
@@ -8,6 +8,8 @@ from app.crud import crud_ingredient
 from app.schemas.ingredient import Ingredient, IngredientCreate, IngredientStockUpdate
 from app.schemas.user import User
 from app.api.dependencies import get_db, get_current_user
+from app.models.ingredient import Ingredient as IngredientModel
+from app.services.stock_service import stock_service
 # --- FIM DA CORREÇÃO ---
 
 router = APIRouter()
@@ -44,7 +46,9 @@ async def update_ingredient_stock(
     if not db_ingredient:
         raise HTTPException(status_code=404, detail="Insumo não encontrado")
     
-    db_ingredient.stock += stock_update.quantity
+    # Incremento atômico no banco (UPDATE ... RETURNING): entradas e saídas simultâneas não se perdem
+    await stock_service.apply_increment_async(
+        db, model=IngredientModel, row_id=ingredient_id, delta=stock_update.quantity, instance=db_ingredient
+    )
     await db.commit()
-    await db.refresh(db_ingredient)
     return db_ingredient
\ No newline at end of file
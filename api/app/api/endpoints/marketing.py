@@ -7,7 +7,6 @@ from app.api.dependencies import get_db, get_current_active_user, RoleChecker
 from app.models.user import User as UserModel
 from app.models.campaign import Campaign as CampaignModel
 from app.schemas.marketing import Campaign, CampaignCreate
-from app.services.notification_service import notification_service
 from app.schemas.enums import UserRole
 
 router = APIRouter()
@@ -79,6 +78,9 @@ async def process_campaign_background(campaign_id: int):
     Cria uma sessão assíncrona isolada e executa o serviço de envio.
     Agora que send_campaign é async, podemos usar await diretamente.
     """
+    # Importado no primeiro envio: fastapi_mail e twilio não pesam na subida de cada worker
+    from app.services.notification_service import notification_service
+
     async with AsyncSessionLocal() as db:
         try:
             await notification_service.send_campaign(db, campaign_id=campaign_id)
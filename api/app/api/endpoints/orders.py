@@ -1,19 +1,56 @@
 # api/app/api/endpoints/orders.py
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from typing import Any, List, Literal, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Header, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 
-from app.crud.crud_order import order as crud_order, get_full_order
+from app.crud.crud_order import order as crud_order, get_full_order, get_order_summary, OrderChange
 from app.api import dependencies
 from app.models.user import User as UserModel
 from app.models.order import Order, OrderItem 
-from app.schemas.order import Order as OrderSchema, OrderCreate, OrderItemCreate, PartialPaymentRequest, OrderMerge, OrderTransfer, OrderItem as OrderItemSchema, OrderItemStatusUpdate
+from app.schemas.order import Order as OrderSchema, OrderCreate, OrderItemCreate, PartialPaymentRequest, OrderMerge, OrderTransfer, OrderItem as OrderItemSchema, OrderItemStatusUpdate, OrderMutationResult, KitchenOrder
 from app.schemas.enums import OrderStatus, OrderType
+from app.core.responses import FlatJSONResponse
 
 router = APIRouter()
 
+def get_expected_version(if_match: Optional[str] = Header(None, alias="If-Match")) -> Optional[int]:
+    """
+    Controle otimista: o terminal envia no header If-Match a `version` da comanda que ele leu.
+    Sem o header, a alteração é aplicada normalmente (ainda serializada pelo lock da comanda).
+    """
+    if not if_match:
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Header If-Match inválido: informe a versão da comanda.")
+
+ResponseView = Literal["full", "compact"]
+
+# Resposta das alterações de itens/pagamentos: comanda completa ou só o que mudou
+OrderMutationResponse = Union[OrderSchema, OrderMutationResult]
+
+def get_response_view(
+    view: ResponseView = Query(
+        "full",
+        description="`compact` devolve só os itens alterados, os totais e a versão da comanda "
+                    "(para garçons em redes fracas). `full` devolve a comanda completa.",
+    )
+) -> ResponseView:
+    return view
+
+async def order_mutation_response(db: AsyncSession, *, change: OrderChange, view: ResponseView) -> Any:
+    if view == "compact":
+        result = await get_order_summary(db, change=change)
+    else:
+        db.expire_all()
+        result = await get_full_order(db=db, id=change.order_id)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comanda não encontrada.")
+    return result
+
 @router.get("/pos/active", response_model=OrderSchema)
 async def get_active_pos_order(
     *,
@@ -46,19 +83,11 @@ async def create_order(
     if order_in.order_type == OrderType.DINE_IN and not order_in.table_id:
         raise HTTPException(status_code=422, detail="Mesa obrigatória para DINE_IN.")
     
-    items_in = order_in.items
-    order_data = order_in.model_dump(exclude={"items"})
-    
-    order = await crud_order.create(db=db, obj_in=OrderCreate(**order_data), current_user=current_user)
+    # Comanda e itens são gravados juntos, com um único commit (ver crud_order.create)
+    order = await crud_order.create(db=db, obj_in=order_in, current_user=current_user)
     
     # Salva o ID antes de qualquer operação que expire o objeto
     new_order_id = order.id 
-    
-    if items_in:
-        for item in items_in:
-            await crud_order.add_item_to_order(db=db, order=order, item_in=item, current_user=current_user)
-        
-        await db.commit()
         
     # Limpa o cache (objeto 'order' fica inválido para leitura direta)
     db.expire_all() 
@@ -72,65 +101,95 @@ async def create_order(
         
     return final_order
 
-@router.post("/{order_id}/items", response_model=OrderSchema)
+@router.post("/{order_id}/items", response_model=OrderMutationResponse)
 async def add_item_to_order(
     order_id: int,
     item_in: OrderItemCreate,
     db: AsyncSession = Depends(dependencies.get_db),
     current_user: UserModel = Depends(dependencies.get_current_active_user),
+    expected_version: Optional[int] = Depends(get_expected_version),
+    view: ResponseView = Depends(get_response_view),
 ):
     order = await crud_order.get_for_user(db=db, id=order_id, current_user=current_user)
     if not order:
         raise HTTPException(status_code=404, detail="Comanda não encontrada")
     if order.status != OrderStatus.OPEN:
         raise HTTPException(status_code=400, detail="A comanda não está aberta")
-    
-    # --- CORREÇÃO: Salva o ID ---
-    current_order_id = order.id
         
-    await crud_order.add_item_to_order(
-        db=db, order=order, item_in=item_in, current_user=current_user
+    change = await crud_order.add_item_to_order(
+        db=db, order=order, item_in=item_in, current_user=current_user, expected_version=expected_version
     )
-    
-    await db.commit()
-    db.expire_all()
-    
-    # --- CORREÇÃO: Usa a variável 'current_order_id' ---
-    return await get_full_order(db=db, id=current_order_id)
+    return await order_mutation_response(db, change=change, view=view)
 
-@router.put("/{order_id}/items/{item_id}", response_model=OrderSchema)
+@router.post("/{order_id}/items/bulk", response_model=OrderMutationResponse)
+async def add_items_to_order(
+    order_id: int,
+    items_in: List[OrderItemCreate],
+    db: AsyncSession = Depends(dependencies.get_db),
+    current_user: UserModel = Depends(dependencies.get_current_active_user),
+    expected_version: Optional[int] = Depends(get_expected_version),
+    view: ResponseView = Depends(get_response_view),
+):
+    """
+    Lança vários itens de uma vez (pedidos de delivery, integrações):
+    uma validação de produtos, um INSERT e um commit para o lote inteiro.
+    """
+    change = await crud_order.add_items_to_order(
+        db=db, order_id=order_id, items_in=items_in, current_user=current_user, expected_version=expected_version
+    )
+    return await order_mutation_response(db, change=change, view=view)
+
+@router.put("/{order_id}/items/{item_id}", response_model=OrderMutationResponse)
 async def update_order_item_quantity(
     order_id: int,
     item_id: int,
     quantity: int = Body(..., embed=True),
     db: AsyncSession = Depends(dependencies.get_db),
     current_user: UserModel = Depends(dependencies.get_current_active_user),
+    expected_version: Optional[int] = Depends(get_expected_version),
+    view: ResponseView = Depends(get_response_view),
 ):
-    return await crud_order.update_item_quantity(
-        db=db, order_id=order_id, item_id=item_id, quantity=quantity, current_user=current_user
+    change = await crud_order.update_item_quantity(
+        db=db, order_id=order_id, item_id=item_id, quantity=quantity, current_user=current_user,
+        expected_version=expected_version
     )
+    return await order_mutation_response(db, change=change, view=view)
 
-@router.delete("/{order_id}/items/{item_id}", response_model=OrderSchema)
+@router.delete("/{order_id}/items/{item_id}", response_model=OrderMutationResponse)
 async def remove_order_item(
     order_id: int,
     item_id: int,
     db: AsyncSession = Depends(dependencies.get_db),
     current_user: UserModel = Depends(dependencies.get_current_active_user),
+    expected_version: Optional[int] = Depends(get_expected_version),
+    view: ResponseView = Depends(get_response_view),
 ):
-    return await crud_order.remove_item_from_order(
-        db=db, order_id=order_id, item_id=item_id, current_user=current_user
+    change = await crud_order.remove_item_from_order(
+        db=db, order_id=order_id, item_id=item_id, current_user=current_user,
+        expected_version=expected_version
     )
+    return await order_mutation_response(db, change=change, view=view)
 
 @router.patch("/{order_id}/cancel", response_model=OrderSchema)
 async def cancel_order(
     order_id: int,
     db: AsyncSession = Depends(dependencies.get_db),
     current_user: UserModel = Depends(dependencies.get_current_active_user),
+    expected_version: Optional[int] = Depends(get_expected_version),
 ):
     order_to_cancel = await get_full_order(db=db, id=order_id)
     if not order_to_cancel or order_to_cancel.store_id != current_user.store_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comanda não encontrada.")
-    return await crud_order.cancel_order(db=db, order=order_to_cancel, current_user=current_user)
+    return await crud_order.cancel_order(db=db, order=order_to_cancel, current_user=current_user, expected_version=expected_version)
+
+# Declarada antes de /{order_id}: senão "kitchen" é lido como ID da comanda (422)
+@router.get("/kitchen", response_model=List[KitchenOrder])
+async def read_kitchen_orders(
+    db: AsyncSession = Depends(dependencies.get_db),
+    current_user: UserModel = Depends(dependencies.get_current_active_user)
+):
+    """ Comandas abertas para o painel da cozinha, no formato plano (consultado a cada poucos segundos). """
+    return FlatJSONResponse(await crud_order.get_kitchen_board(db=db, current_user=current_user))
 
 @router.get("/{order_id}", response_model=OrderSchema)
 async def read_order(
@@ -154,16 +213,20 @@ async def get_open_order_by_table(
         raise HTTPException(status_code=404, detail="Nenhuma comanda aberta encontrada para esta mesa")
     return order
 
-@router.post("/{order_id}/pay", response_model=OrderSchema)
+@router.post("/{order_id}/pay", response_model=OrderMutationResponse)
 async def pay_order_items(
     order_id: int,
     payment_request: PartialPaymentRequest,
     db: AsyncSession = Depends(dependencies.get_db),
     current_user: UserModel = Depends(dependencies.get_current_active_user),
+    expected_version: Optional[int] = Depends(get_expected_version),
+    view: ResponseView = Depends(get_response_view),
 ):
-    return await crud_order.process_partial_payment(
-        db=db, order_id=order_id, payment_request=payment_request, current_user=current_user
+    change = await crud_order.process_partial_payment(
+        db=db, order_id=order_id, payment_request=payment_request, current_user=current_user,
+        expected_version=expected_version
     )
+    return await order_mutation_response(db, change=change, view=view)
 
 @router.post("/{order_id}/transfer", response_model=OrderSchema)
 async def transfer_order(
@@ -185,21 +248,16 @@ async def merge_orders(
     merge_data: OrderMerge,
     db: AsyncSession = Depends(dependencies.get_db),
     current_user: UserModel = Depends(dependencies.get_current_active_user),
+    expected_version: Optional[int] = Depends(get_expected_version),
 ):
     target_order = await get_full_order(db, id=order_id)
     if not target_order or target_order.store_id != current_user.store_id:
         raise HTTPException(status_code=404, detail="Comanda de destino não encontrada.")
     return await crud_order.merge_orders(
-        db=db, target_order=target_order, source_order_id=merge_data.source_order_id, current_user=current_user
+        db=db, target_order=target_order, source_order_id=merge_data.source_order_id, current_user=current_user,
+        expected_version=expected_version
     )
 
-@router.get("/kitchen", response_model=List[OrderSchema])
-async def read_kitchen_orders(
-    db: AsyncSession = Depends(dependencies.get_db),
-    current_user: UserModel = Depends(dependencies.get_current_active_user)
-):
-    return await crud_order.get_kitchen_orders(db=db, current_user=current_user)
-
 @router.patch("/items/{item_id}/status", response_model=OrderItemSchema)
 async def update_order_item_status(
     item_id: int,
@@ -5,11 +5,12 @@ from typing import List, Any, Optional
 from sqlalchemy.exc import IntegrityError
 from app import crud
 from app.models.user import User as UserModel
-from app.schemas.product import Product as ProductSchema, ProductCreate, ProductUpdate
+from app.schemas.product import Product as ProductSchema, ProductCreate, ProductUpdate, ProductBarcodeMatch, ProductLookup
 from app.schemas.category import ProductCategory as CategorySchema
 from app.schemas.supplier import Supplier as SupplierSchema
 from app.schemas.stock import StockAdjustment
 from app.api.dependencies import get_db, RoleChecker, get_current_active_user
+from app.core.responses import FlatJSONResponse
 from app.schemas.enums import UserRole
 from app.services.stock_service import stock_service
 from app.db.session import AsyncSessionLocal
@@ -40,15 +41,27 @@ async def read_products(
     )
 
 # --- CORREÇÃO: Endpoint Lookup Adicionado ANTES do ID ---
-@router.get("/lookup", response_model=List[ProductSchema], summary="Busca rápida (POS)")
+@router.get("/lookup", response_model=List[ProductLookup], summary="Busca rápida (POS)")
 async def lookup_product(
     q: str = Query(..., description="Termo de busca (nome ou código de barras)"),
     db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user)
 ) -> Any:
-    """ Endpoint dedicado para busca exata ou aproximada no PDV. """
-    # Reutiliza a lógica de busca do get_multi, mapeando 'q' para 'search'
-    return await crud.product.get_multi(db, search=q, limit=10, current_user=current_user)
+    """ Endpoint dedicado para busca exata ou aproximada no PDV (mesmo filtro do get_multi, só as colunas do caixa). """
+    return FlatJSONResponse(await crud.product.lookup(db, q=q, limit=10, current_user=current_user))
+
+@router.get("/barcode/{barcode}", response_model=ProductBarcodeMatch, summary="Resolver código de barras (POS)")
+async def lookup_barcode(
+    barcode: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user)
+) -> Any:
+    """ Busca exata por código de barras de variação (SKU) ou de produto. """
+    match = await crud.product.get_by_barcode(db, barcode=barcode, current_user=current_user)
+    if not match:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Código de barras não encontrado.")
+    product, variation = match
+    return {"product": product, "variation": variation}
 # -------------------------------------------------------
 
 @router.get("/{product_id}", response_model=ProductSchema, summary="Obter um produto por ID")
@@ -105,27 +118,18 @@ async def adjust_product_stock(
         raise HTTPException( status_code=status.HTTP_404_NOT_FOUND, detail="Produto não encontrado." )
 
     try:
-        from app.models.stock_movement import StockMovement, MovementType
-        quantity_change = adjustment_in.new_stock_level - (product_to_adjust.stock or 0)
-        product_to_adjust.stock = adjustment_in.new_stock_level
-
-        movement = StockMovement(
-            product_id=product_id,
-            user_id=current_user.id,
-            movement_type=MovementType.ADJUSTMENT,
-            quantity=quantity_change,
-            stock_after_movement=product_to_adjust.stock,
-            reason=adjustment_in.reason,
-            store_id=product_to_adjust.store_id
+        # Mesmo caminho do serviço de estoque: trava a linha, aplica a diferença de forma
+        # atômica e registra a movimentação com o saldo retornado pelo banco.
+        movement = await db.run_sync(
+            lambda sync_db: stock_service.adjust_stock(
+                sync_db,
+                product_id=product_id,
+                new_stock_level=adjustment_in.new_stock_level,
+                user=current_user,
+                reason=adjustment_in.reason
+            )
         )
-        db.add(product_to_adjust)
-        db.add(movement)
-
-        if product_to_adjust.stock <= (product_to_adjust.low_stock_threshold or 0):
-            logger.warning( f"Estoque baixo para o produto ID {product_id}." )
-
         await db.commit()
-        await db.refresh(movement)
 
     except Exception as e:
         await db.rollback()
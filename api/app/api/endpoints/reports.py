@@ -9,8 +9,8 @@ import traceback # Para log detalhado
 from loguru import logger # Para log detalhado
 
 # Importar serviços e schemas
-from app.services.analytics_service import analytics_service
-from app.services.pdf_service import generate_enhanced_sales_report_pdf # Renomeado
+# pdf_service (reportlab) e analytics_service são importados no primeiro uso, dentro das rotas:
+# assim não pesam na subida de cada worker (ver benchmarks/bench_startup.py)
 from app.schemas.report import (
     SalesByPeriod, TopSellingProduct, SalesByUser, SalesEvolutionItem, PurchaseSuggestion,
     SalesByPaymentMethodItem, SalesByHourItem, SalesByCategoryItem, LowStockProductItem,
@@ -64,6 +64,7 @@ async def generate_enhanced_sales_by_period_report_pdf( # Nome da função atual
 
     # Geração do PDF com tratamento de erro específico
     try:
+        from app.services.pdf_service import generate_enhanced_sales_report_pdf
         buffer = io.BytesIO()
         generate_enhanced_sales_report_pdf( # Chama a função atualizada
             buffer=buffer,
@@ -105,6 +106,7 @@ async def get_purchase_suggestions(
     db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
+    from app.services.analytics_service import analytics_service
     # Nota: analytics_service.get_purchase_suggestions usa Session síncrona.
     # A chamada db.run_sync é necessária para executá-la corretamente em um endpoint async.
     try:
@@ -195,4 +197,14 @@ async def report_sales_by_category(
     db: AsyncSession = Depends(get_db),
     current_user: UserSchema = Depends(get_current_user) # Pode manter UserSchema
 ):
-    return await crud_report.get_sales_by_category(db, start_date=start_date, end_date=end_date)
\ No newline at end of file
+    return await crud_report.get_sales_by_category(db, start_date=start_date, end_date=end_date)
+
+@router.get("/low-stock", response_model=List[LowStockProductItem])
+async def report_low_stock_products(
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    """ Produtos da loja do usuário com estoque no limite mínimo ou abaixo dele. """
+    if not current_user.store_id:
+        raise HTTPException(status_code=400, detail="Usuário não associado a uma loja.")
+    return await crud_report.get_low_stock_products(db, store_id=current_user.store_id)
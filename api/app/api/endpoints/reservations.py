@@ -1,13 +1,17 @@
 # api/app/api/endpoints/reservations.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Any
-from datetime import datetime
+from typing import List, Any, Optional
+from datetime import datetime, timedelta
+from loguru import logger
 
 # Importa o módulo crud e os schemas/modelos necessários
 from app import crud
 from app.models.user import User as UserModel
 from app.schemas.reservation import Reservation, ReservationCreate, ReservationUpdate
+from app.schemas.table import SimpleTable
+from app.core.config import settings
+from app.services.reservation_service import reservation_service
 from app.api.dependencies import get_db, get_current_active_user
 
 router = APIRouter()
@@ -29,6 +33,26 @@ async def read_reservations(
     )
     return reservations
 
+@router.get("/available-tables", response_model=List[SimpleTable])
+async def read_available_tables(
+    *,
+    db: AsyncSession = Depends(get_db),
+    start: datetime = Query(..., description="Início do período desejado"),
+    end: Optional[datetime] = Query(None, description="Fim do período. Padrão: início + duração padrão da reserva"),
+    party_size: int = Query(..., gt=0, description="Número de pessoas"),
+    current_user: UserModel = Depends(get_current_active_user)
+) -> Any:
+    """
+    Mesas livres para `party_size` pessoas no período (sem reserva sobreposta), das menores
+    para as maiores. Uma única consulta para todas as mesas da loja.
+    """
+    end = end or start + timedelta(minutes=settings.RESERVATION_DURATION_MINUTES)
+    if end <= start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="O fim do período deve ser depois do início.")
+    return await crud.reservation.get_free_tables(
+        db, start=start, end=end, party_size=party_size, current_user=current_user
+    )
+
 @router.post("/", response_model=Reservation, status_code=status.HTTP_201_CREATED)
 async def create_reservation(
     *,
@@ -44,7 +68,7 @@ async def create_reservation(
     # O Pydantic já validou o reservation_in contra o schema ReservationCreate
     # Se a data/hora não puder ser parseada, o erro 422 acontece aqui antes de chamar o CRUD.
     try:
-        return await crud.reservation.create(db=db, obj_in=reservation_in, current_user=current_user)
+        reservation = await crud.reservation.create(db=db, obj_in=reservation_in, current_user=current_user)
     except HTTPException as e:
         # Repassa exceções HTTP geradas pelo CRUD (ex: mesa não encontrada ou ocupada)
         raise e
@@ -53,8 +77,11 @@ async def create_reservation(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         # Captura genérica para outros erros inesperados durante a criação
-        print(f"Erro inesperado ao criar reserva: {e}") # Logar o erro seria ideal
+        logger.opt(exception=e).error("Erro inesperado ao criar reserva.")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Erro interno ao criar a reserva.")
+    # Ativação e expiração desta reserva entram já no heap do agendador (se este worker for o líder)
+    reservation_service.track(reservation)
+    return reservation
 
 
 @router.delete("/{reservation_id}", response_model=Reservation)
@@ -1,12 +1,14 @@
 # api/app/api/endpoints/sales.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Any # Adicione List e Any
+from typing import List, Any, Optional # Adicione List e Any
 
 from app import crud
 from app.models.user import User as UserModel
-from app.schemas.sale import Sale, SaleCreate
+from app.schemas.sale import Sale, SaleCreate, SaleSyncRequest, SaleSyncResponse, SaleHistoryEntry
+from app.schemas.batch import SaleBatchAllocation
 from app.api.dependencies import get_db, get_current_active_user
+from app.core.responses import FlatJSONResponse
 
 router = APIRouter()
 
@@ -14,15 +16,34 @@ router = APIRouter()
 async def create_sale(
     sale_in: SaleCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: UserModel = Depends(get_current_active_user)
+    current_user: UserModel = Depends(get_current_active_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=64)
 ) -> Any:
     """
     Cria uma nova venda (usado pelo POS).
+    Repetições com o mesmo header Idempotency-Key são respondidas pelo IdempotencyMiddleware;
+    a chave também fica gravada na venda, então a fila offline (/sales/sync) não a duplica.
+    """
+    return await crud.sale.create_with_items(
+        db=db, obj_in=sale_in, current_user=current_user, idempotency_key=idempotency_key
+    )
+
+@router.post("/sync", response_model=SaleSyncResponse)
+async def sync_sales(
+    sync_in: SaleSyncRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user)
+) -> Any:
+    """
+    Recebe em lote as vendas enfileiradas no terminal (POS offline ou rede lenta).
+    Cada venda traz uma `idempotency_key`: reenviar o lote é seguro, as vendas já gravadas
+    voltam como `duplicate` com o ID original. O resultado vem na mesma ordem do envio.
     """
-    return await crud.sale.create_with_items(db=db, obj_in=sale_in, current_user=current_user)
+    results = await crud.sale.sync_batch(db=db, sales_in=sync_in.sales, current_user=current_user)
+    return SaleSyncResponse(results=results)
 
 # --- INÍCIO DO NOVO ENDPOINT ---
-@router.get("/", response_model=List[Sale])
+@router.get("/", response_model=List[SaleHistoryEntry])
 async def read_sales(
     *,
     db: AsyncSession = Depends(get_db),
@@ -32,6 +53,19 @@ async def read_sales(
 ) -> Any:
     """
     Retorna uma lista de vendas da loja do usuário, da mais recente para a mais antiga.
+    Formato plano: usuário/cliente só com id e nome, produto dos itens só com id, nome e imagem.
+    """
+    history = await crud.sale.get_history(db, skip=skip, limit=limit, current_user=current_user)
+    return FlatJSONResponse(history)
+# --- FIM DO NOVO ENDPOINT ---
+
+@router.get("/{sale_id}/batches", response_model=List[SaleBatchAllocation])
+async def read_sale_batches(
+    sale_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user)
+) -> Any:
+    """
+    Retorna de quais lotes (e quanto de cada) saiu a mercadoria de uma venda.
     """
-    return await crud.sale.get_multi_detailed(db, skip=skip, limit=limit, current_user=current_user)
-# --- FIM DO NOVO ENDPOINT ---
\ No newline at end of file
+    return await crud.batch.get_sale_allocations(db, sale_id=sale_id, current_user=current_user)
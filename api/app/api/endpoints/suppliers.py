@@ -6,6 +6,7 @@ from app import crud # Importa o pacote crud inteiro
 from app.models.user import User as UserModel
 from app.schemas.supplier import Supplier, SupplierCreate, SupplierUpdate
 from app.api.dependencies import get_db, get_current_active_user
+from app.core.tenant_cache import tenant_cache
 
 router = APIRouter()
 
@@ -28,9 +29,12 @@ async def read_suppliers(
     limit: int = 100,
     current_user: UserModel = Depends(get_current_active_user)
 ):
-    """ Lista todos os fornecedores da loja do usuário logado. """
-    # --- CORREÇÃO AQUI ---
-    return await crud.supplier.get_multi(db, skip=skip, limit=limit, current_user=current_user)
+    """ Lista todos os fornecedores da loja do usuário logado (cache por loja). """
+    return await tenant_cache.respond(
+        db, entity=crud.supplier.cache_entity, schema=List[Supplier], current_user=current_user,
+        loader=lambda: crud.supplier.get_multi(db, skip=skip, limit=limit, current_user=current_user),
+        variant=f"{skip}:{limit}",
+    )
 
 @router.put("/{supplier_id}", response_model=Supplier)
 async def update_supplier(
@@ -45,7 +49,7 @@ async def update_supplier(
     if not supplier:
         raise HTTPException(status_code=404, detail="Fornecedor não encontrado")
     # --- CORREÇÃO AQUI ---
-    return await crud.supplier.update(db=db, db_obj=supplier, obj_in=supplier_in)
+    return await crud.supplier.update(db=db, db_obj=supplier, obj_in=supplier_in, current_user=current_user)
 
 @router.delete("/{supplier_id}", response_model=Supplier)
 async def delete_supplier(
@@ -2,19 +2,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-import sqlalchemy as sa
 
 from app.crud import crud_table
-# --- CORREÇÃO: Importar crud_reservation para usar a função de ativação
-from app.crud.crud_reservation import reservation as crud_reservation
-# -------------------------------------------------------------------
+from app.crud.crud_wall import wall as crud_wall
 from app.models.user import User as UserModel
-from app.models.table import Table as TableModel
-from app.models.order import Order, OrderItem
-from app.schemas.table import Table as TableSchema, TableCreate, TableUpdate, TableLayoutUpdateRequest
+from app.schemas.table import Table as TableSchema, TableCreate, TableUpdate, TableLayoutUpdateRequest, FloorPlanLayout, FloorPlanLayoutUpdate
 from app.api.dependencies import get_db, get_current_active_user, RoleChecker
-from app.schemas.enums import UserRole, OrderStatus, OrderItemStatus
+from app.schemas.enums import UserRole
+from app.core.responses import FlatJSONResponse
 
 router = APIRouter()
 full_permissions = RoleChecker([UserRole.ADMIN, UserRole.MANAGER, UserRole.CASHIER, UserRole.SUPER_ADMIN])
@@ -27,56 +22,10 @@ async def read_tables(
 ) -> Any:
     """
     Busca todas as mesas da loja, incluindo informações sobre comandas abertas.
-    Também verifica e ativa reservas para o dia de hoje.
+    Só leitura: as reservas de hoje marcam as mesas como RESERVADAS pelo agendador
+    (ver app.services.reservation_service), não a cada consulta.
     """
-    # --- NOVO: Garante que reservas de hoje marquem as mesas como RESERVADAS ---
-    await crud_reservation.ensure_todays_reservations_are_active(db, current_user)
-    # ---------------------------------------------------------------------------
-
-    stmt_tables = select(TableModel).where(TableModel.store_id == current_user.store_id)
-    result_tables = await db.execute(stmt_tables)
-    tables = result_tables.scalars().all()
-    table_map = {t.id: t for t in tables}
-
-    if not table_map:
-        return []
-
-    stmt_orders = (
-        select(
-            Order.table_id,
-            Order.id,
-            Order.created_at,
-            sa.func.bool_or(OrderItem.status == OrderItemStatus.READY).label("has_ready_items")
-        )
-        .join(OrderItem, Order.id == OrderItem.order_id)
-        .where(
-            Order.store_id == current_user.store_id,
-            Order.status == OrderStatus.OPEN,
-            Order.table_id.in_(table_map.keys())
-        )
-        .group_by(Order.table_id, Order.id, Order.created_at)
-    )
-    result_orders = await db.execute(stmt_orders)
-    
-    order_info_map = {row.table_id: row for row in result_orders.mappings()}
-
-    response_tables = []
-    for table in tables:
-        table_schema = TableSchema.model_validate(table, from_attributes=True)
-        
-        if table.status == 'occupied' and table.id in order_info_map:
-            order_info = order_info_map[table.id]
-            table_schema.open_order_id = order_info.id
-            table_schema.open_order_created_at = order_info.created_at
-            table_schema.has_ready_items = order_info.has_ready_items or False
-        else:
-            table_schema.has_ready_items = False
-
-        response_tables.append(table_schema)
-    
-    response_tables.sort(key=lambda t: (0, int(t.number)) if t.number.isdigit() else (1, t.number))
-
-    return response_tables
+    return FlatJSONResponse(await crud_table.table.get_floor_tables(db, current_user=current_user))
 
 # ... (resto dos endpoints create_table, update_tables_layout, etc. permanecem iguais) ...
 
@@ -96,7 +45,25 @@ async def update_tables_layout(
     layout_request: TableLayoutUpdateRequest,
     current_user: UserModel = Depends(get_current_active_user)
 ) -> Any:
-    return await crud_table.table.update_layout(db=db, tables_layout=layout_request.tables, current_user=current_user)
+    updated_tables = await crud_table.table.update_layout(db=db, tables_layout=layout_request.tables, current_user=current_user)
+    await db.commit()
+    return updated_tables
+
+@router.put("/floor-plan", response_model=FloorPlanLayout, dependencies=[Depends(manager_permissions)])
+async def update_floor_plan_layout(
+    *,
+    db: AsyncSession = Depends(get_db),
+    layout_in: FloorPlanLayoutUpdate,
+    current_user: UserModel = Depends(get_current_active_user)
+) -> Any:
+    """
+    Salva o layout do salão inteiro (mesas e paredes) numa única transação:
+    um UPDATE em lote por tipo de elemento e um commit.
+    """
+    tables = await crud_table.table.update_layout(db=db, tables_layout=layout_in.tables, current_user=current_user)
+    walls = await crud_wall.update_layout(db=db, walls_layout=layout_in.walls, current_user=current_user)
+    await db.commit()
+    return {"tables": tables, "walls": walls}
 
 @router.put("/{table_id}", response_model=TableSchema, dependencies=[Depends(manager_permissions)])
 async def update_table(
@@ -2,7 +2,7 @@ from typing import Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.user import UserChangePassword
-from app.core.security import verify_password, get_password_hash
+from app.core.security import verify_password_async, get_password_hash_async
 from app import crud
 from app.api import dependencies
 from app.models.user import User as UserModel
@@ -88,10 +88,10 @@ async def change_password(
     current_user: UserModel = Depends(get_current_active_user)
 ):
     """Permite ao usuário logado alterar sua própria senha."""
-    if not verify_password(password_in.current_password, current_user.hashed_password):
+    if not await verify_password_async(password_in.current_password, current_user.hashed_password):
         raise HTTPException(status_code=400, detail="Senha atual incorreta.")
     
-    current_user.hashed_password = get_password_hash(password_in.new_password)
+    current_user.hashed_password = await get_password_hash_async(password_in.new_password)
     db.add(current_user)
     await db.commit()
     return {"message": "Senha atualizada com sucesso!"}
\ No newline at end of file
@@ -10,6 +10,7 @@ from app.models.user import User as UserModel
 from app.schemas.wall import Wall as WallSchema, WallCreate, WallUpdate, WallLayoutUpdate
 from app.api.dependencies import get_db, get_current_active_user, RoleChecker
 from app.schemas.enums import UserRole
+from app.core.tenant_cache import tenant_cache
 
 router = APIRouter()
 # Permissões: Somente Admin e Manager podem gerenciar o layout
@@ -21,10 +22,13 @@ async def read_walls(
     current_user: UserModel = Depends(get_current_active_user)
 ) -> Any:
     """
-    Busca todas as paredes da loja do usuário logado.
+    Busca todas as paredes da loja do usuário logado (cache por loja).
     """
     # A CRUDBase já filtra pela store_id do current_user (exceto super_admin)
-    return await crud_wall.get_multi(db=db, current_user=current_user)
+    return await tenant_cache.respond(
+        db, entity=crud_wall.cache_entity, schema=List[WallSchema], current_user=current_user,
+        loader=lambda: crud_wall.get_multi(db=db, current_user=current_user),
+    )
 
 @router.post("/", response_model=WallSchema, status_code=status.HTTP_201_CREATED, dependencies=[Depends(manager_permissions)])
 async def create_wall(
@@ -48,7 +52,9 @@ async def update_walls_layout(
     """
     Atualiza a posição e rotação de múltiplas paredes.
     """
-    return await crud_wall.update_layout(db=db, walls_layout=walls_layout, current_user=current_user)
+    updated_walls = await crud_wall.update_layout(db=db, walls_layout=walls_layout, current_user=current_user)
+    await db.commit()
+    return updated_walls
 
 @router.put("/{wall_id}", response_model=WallSchema, dependencies=[Depends(manager_permissions)])
 async def update_wall(
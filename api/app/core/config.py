@@ -1,4 +1,5 @@
 import os
+from typing import Dict
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -10,6 +11,61 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Custo do bcrypt. Ao aumentar, as senhas antigas são regravadas no próximo login.
+    BCRYPT_ROUNDS: int = 12
+    # Threads dedicadas a hash/verificação de senha (limita o uso de CPU no pico de logins)
+    PASSWORD_HASH_WORKERS: int = min(4, os.cpu_count() or 1)
+    # Por quanto tempo uma resposta guardada pelo header Idempotency-Key pode ser reenviada
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    # Respostas mantidas em memória (por processo) na frente da tabela idempotency_keys
+    IDEMPOTENCY_CACHE_SIZE: int = 1024
+    # Uma chave reservada sem resposta guardada (worker morto no meio da rota) volta a valer depois disso
+    IDEMPOTENCY_LEASE_SECONDS: int = 120
+    # Diretório dos arquivos enviados (capturas dos chamados), endereçados pelo SHA-256
+    BLOB_STORAGE_DIR: str = os.getenv("BLOB_STORAGE_DIR", "storage/blobs")
+    # Validade das URLs assinadas de imagens/miniaturas entregues ao painel
+    BLOB_URL_TTL_SECONDS: int = 3600
+    # Janela em que a URL assinada de um arquivo não muda (o navegador reaproveita o cache)
+    BLOB_URL_BUCKET_SECONDS: int = 600
+    # Threads dedicadas à validação de imagens e geração de miniaturas
+    THUMBNAIL_WORKERS: int = min(2, os.cpu_count() or 1)
+    # Lado maior da miniatura, em pixels
+    THUMBNAIL_SIZE: int = 320
+    # Limites de anexos por chamado
+    FEEDBACK_MAX_IMAGES: int = 5
+    FEEDBACK_MAX_IMAGE_BYTES: int = 5 * 1024 * 1024
+    # Duração padrão de uma reserva (período em que a mesa fica bloqueada)
+    RESERVATION_DURATION_MINUTES: int = 120
+    # De quanto em quanto tempo o agendador de reservas relê as próximas transições do banco
+    # (reservas criadas em outro worker) e um worker sem a liderança tenta assumi-la
+    RESERVATION_SCHEDULER_RESYNC_SECONDS: int = 60
+    # Máximo de listagens guardadas no cache por loja (app.core.tenant_cache), em todas as lojas
+    TENANT_CACHE_MAX_ENTRIES: int = 2048
+    # Instruções SQL a partir desta duração vão para o log como consulta lenta (parâmetros omitidos)
+    SLOW_QUERY_MS: int = 200
+    # Se definido, GET /metrics exige o header "Authorization: Bearer <token>"
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+    # Detector de N+1 (desenvolvimento/testes): avisa quando a mesma consulta se repete numa requisição
+    QUERY_DETECTOR: bool = False
+    # Repetições da mesma forma de consulta, numa requisição, a partir das quais o detector avisa
+    N_PLUS_ONE_THRESHOLD: int = 5
+    # Log (app.core.logging_config): nível mínimo e linhas em JSON (uma por linha) ou texto legível
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = True
+    # Arquivo de log com rotação (vazio desliga). Com vários workers, use um arquivo por worker
+    LOG_FILE: str = "logs/app.jsonl"
+    LOG_ROTATION: str = "100 MB"
+    LOG_RETENTION: str = "14 days"
+    # Fração das requisições de cada rota ("MÉTODO /template") que mantém as linhas INFO/DEBUG;
+    # WARNING e acima sempre saem. Rotas de polling (KDS, busca do caixa, salão) geram a maior parte do volume
+    LOG_SAMPLE_RATES: Dict[str, float] = {
+        "GET /api/v1/orders/kitchen": 0.05,
+        "GET /api/v1/products/lookup": 0.1,
+        "GET /api/v1/tables/": 0.1,
+        "GET /metrics": 0.0,
+    }
+    # Fração para as rotas fora de LOG_SAMPLE_RATES
+    LOG_SAMPLE_DEFAULT: float = 1.0
 
     class Config:
         case_sensitive = True
@@ -1,17 +1,18 @@
 from fastapi import Request
 from fastapi.responses import JSONResponse
 from loguru import logger
-import traceback
 
 async def global_exception_handler(request: Request, exc: Exception):
     """
     Handler de exceção global para capturar erros não tratados (HTTP 500).
     Loga o traceback completo do erro e retorna uma resposta JSON padronizada.
     """
-    # Loga o erro com detalhes e traceback completo para depuração
-    logger.error(f"Erro inesperado na requisição: {request.method} {request.url}")
-    logger.error(f"Exceção: {exc}")
-    logger.error(f"Traceback: {traceback.format_exc()}")
+    # Um único registro com o traceback completo (campo "exception" no log em JSON). Este handler
+    # roda no ServerErrorMiddleware, fora do contexto da requisição: os ids vêm de request.state
+    request_id = getattr(request.state, "request_id", "")
+    logger.bind(request_id=request_id, trace_id=getattr(request.state, "trace_id", request_id)).opt(
+        exception=exc
+    ).error(f"Erro inesperado na requisição: {request.method} {request.url.path}")
 
     # Retorna uma resposta amigável para o cliente, sem expor detalhes internos
     return JSONResponse(
@@ -23,4 +24,5 @@ async def global_exception_handler(request: Request, exc: Exception):
                 "loc": []
             }
         },
+        headers={"X-Request-ID": request_id} if request_id else None,
     )
\ No newline at end of file
@@ -0,0 +1,298 @@
+# api/app/core/idempotency.py
+"""
+Idempotência das rotas de escrita do POS pelo header `Idempotency-Key`.
+
+Um toque duplo num terminal lento (ou um retry automático) reenviava a mesma venda,
+pagamento ou item de comanda. Com o header, a primeira requisição "reserva" a chave
+(INSERT na tabela idempotency_keys), executa a rota e guarda a resposta; as repetições
+recebem a resposta guardada sem executar a rota de novo.
+
+- Só respostas 2xx são guardadas: depois de um erro (ex.: caixa fechado) a mesma chave
+  pode ser reenviada e a rota roda normalmente.
+- Uma repetição que chega enquanto a original ainda está em andamento recebe 409. A reserva
+  sem resposta só vale por IDEMPOTENCY_LEASE_SECONDS: se o worker morreu no meio da rota,
+  depois disso a chave pode ser reenviada.
+- Requisição cancelada (cliente desconectou) ou resposta que não pôde ser guardada liberam a
+  chave; a liberação roda protegida do cancelamento.
+- A mesma chave com outro corpo/rota recebe 422.
+- As chaves valem por IDEMPOTENCY_TTL_HOURS e são por usuário (do token).
+
+Um LRU em memória (por processo) responde as repetições mais comuns sem ir ao banco;
+a tabela é a fonte da verdade entre workers.
+"""
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Awaitable, NamedTuple, Optional, Set, Tuple
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse, Response
+from loguru import logger
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.config import settings
+from app.core.security import decode_access_token
+from app.db.session import AsyncSessionLocal
+from app.models.idempotency import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+# Intervalo mínimo entre duas limpezas das chaves vencidas (feitas junto com uma reserva)
+PURGE_INTERVAL_SECONDS = 3600
+
+# Rotas (POST) em que o header é respeitado
+IDEMPOTENT_ROUTES = [
+    re.compile(r"^/api/v1/sales/?$"),
+    re.compile(r"^/api/v1/orders/\d+/pay/?$"),
+    re.compile(r"^/api/v1/orders/\d+/items(/bulk)?/?$"),
+]
+
+
+class StoredResponse(NamedTuple):
+    request_hash: str
+    status_code: Optional[int]  # None: a requisição original ainda está em andamento
+    content_type: Optional[str]
+    body: Optional[bytes]
+
+
+class IdempotencyCache:
+    """ LRU das respostas já concluídas, com o mesmo prazo de validade da tabela. """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self._max_size = max_size
+        self._ttl = ttl_seconds
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[float, StoredResponse]]" = OrderedDict()
+
+    def get(self, user_id: int, key: str) -> Optional[StoredResponse]:
+        entry = self._entries.get((user_id, key))
+        if entry is None:
+            return None
+        deadline, stored = entry
+        if deadline < time.monotonic():
+            del self._entries[(user_id, key)]
+            return None
+        self._entries.move_to_end((user_id, key))
+        return stored
+
+    def set(self, user_id: int, key: str, stored: StoredResponse, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self._ttl if ttl_seconds is None else min(ttl_seconds, self._ttl)
+        self._entries[(user_id, key)] = (time.monotonic() + ttl, stored)
+        self._entries.move_to_end((user_id, key))
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+idempotency_cache = IdempotencyCache(
+    max_size=settings.IDEMPOTENCY_CACHE_SIZE,
+    ttl_seconds=settings.IDEMPOTENCY_TTL_HOURS * 3600,
+)
+_last_purge = 0.0
+# Escritas protegidas do cancelamento ainda em andamento (referência forte até terminarem)
+_shielded_tasks: Set[asyncio.Task] = set()
+
+
+def _request_user_id(request: Request) -> Optional[int]:
+    """ Usuário do token Bearer, sem ir ao banco. Token inválido: a própria rota responde 401. """
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_access_token(token)
+    try:
+        return int(payload["sub"]) if payload else None
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+async def _claim(db: AsyncSession, *, user_id: int, key: str, request_hash: str) -> Optional[int]:
+    """
+    Reserva a chave com um único INSERT ... ON CONFLICT. Uma chave vencida é reaproveitada, assim
+    como uma reserva sem resposta mais antiga que IDEMPOTENCY_LEASE_SECONDS.
+    Retorna o ID da reserva, ou None se a chave já pertence a outra requisição válida.
+    """
+    global _last_purge
+    if time.monotonic() - _last_purge > PURGE_INTERVAL_SECONDS:
+        _last_purge = time.monotonic()
+        await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < func.localtimestamp()))
+
+    stmt = pg_insert(IdempotencyKey).values(
+        user_id=user_id,
+        key=key,
+        request_hash=request_hash,
+        created_at=func.localtimestamp(),
+        expires_at=func.localtimestamp() + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_idempotency_keys_user_key",
+        set_={
+            "request_hash": stmt.excluded.request_hash,
+            "status_code": None,
+            "content_type": None,
+            "response_body": None,
+            "created_at": stmt.excluded.created_at,
+            "expires_at": stmt.excluded.expires_at,
+        },
+        where=or_(
+            IdempotencyKey.expires_at < func.localtimestamp(),
+            and_(
+                IdempotencyKey.status_code.is_(None),
+                IdempotencyKey.created_at < func.localtimestamp() - timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS),
+            ),
+        ),
+    ).returning(IdempotencyKey.id)
+    return (await db.execute(stmt)).scalar_one_or_none()
+
+
+async def _load(db: AsyncSession, *, user_id: int, key: str) -> Tuple[Optional[StoredResponse], float]:
+    """ Resposta guardada e quantos segundos ela ainda vale. """
+    row = (await db.execute(
+        select(
+            IdempotencyKey.request_hash,
+            IdempotencyKey.status_code,
+            IdempotencyKey.content_type,
+            IdempotencyKey.response_body,
+            func.extract("epoch", IdempotencyKey.expires_at - func.localtimestamp()).label("ttl"),
+        ).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+    )).first()
+    if row is None:
+        return None, 0.0
+    return StoredResponse(row.request_hash, row.status_code, row.content_type, row.response_body), float(row.ttl)
+
+
+async def _complete(claim_id: int, stored: StoredResponse) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == claim_id)
+            .values(status_code=stored.status_code, content_type=stored.content_type, response_body=stored.body)
+        )
+        await db.commit()
+
+
+async def _release(claim_id: int) -> None:
+    """ Libera a chave (a rota falhou): uma nova tentativa com a mesma chave executa de novo. """
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(IdempotencyKey).where(IdempotencyKey.id == claim_id))
+        await db.commit()
+
+
+async def _release_quietly(claim_id: int) -> None:
+    """ _release sem propagar erro: se o banco falhar, a reserva vence pelo lease. """
+    try:
+        await _release(claim_id)
+    except Exception as e:
+        logger.error(f"Erro ao liberar a Idempotency-Key (reserva {claim_id}): {e}")
+
+
+async def _store(claim_id: int, user_id: int, key: str, stored: StoredResponse) -> None:
+    """ Guarda a resposta; se não der, libera a chave para a repetição não ficar presa em 409. """
+    try:
+        await _complete(claim_id, stored)
+        idempotency_cache.set(user_id, key, stored)
+    except Exception as e:
+        # A rota já foi concluída: a resposta vai para o cliente mesmo sem ficar guardada
+        logger.error(f"Erro ao guardar a resposta da Idempotency-Key do usuário {user_id}: {e}")
+        await _release_quietly(claim_id)
+
+
+async def _shielded(write: Awaitable[None]) -> None:
+    """ Roda a escrita até o fim mesmo se a requisição for cancelada no meio. """
+    task = asyncio.ensure_future(write)
+    _shielded_tasks.add(task)
+    task.add_done_callback(_shielded_tasks.discard)
+    await asyncio.shield(task)
+
+
+def _replay(stored: StoredResponse, request_hash: str) -> Response:
+    if stored.request_hash != request_hash:
+        return JSONResponse(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            content={"detail": "Esta Idempotency-Key já foi usada em outra requisição."},
+        )
+    if stored.status_code is None:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"detail": "Uma requisição com esta Idempotency-Key ainda está em processamento."},
+        )
+    return Response(
+        content=stored.body,
+        status_code=stored.status_code,
+        media_type=stored.content_type,
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+
+    async def dispatch(self, request: Request, call_next):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if (
+            not key
+            or request.method != "POST"
+            or not any(route.match(request.url.path) for route in IDEMPOTENT_ROUTES)
+        ):
+            return await call_next(request)
+
+        user_id = _request_user_id(request)
+        if user_id is None:
+            return await call_next(request)
+        if len(key) > MAX_KEY_LENGTH:
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"detail": f"Idempotency-Key deve ter no máximo {MAX_KEY_LENGTH} caracteres."},
+            )
+
+        body = await request.body()
+        # A query string entra no hash: ?view=compact e a resposta completa são requisições diferentes
+        request_hash = hashlib.sha256(
+            f"{request.method} {request.url.path}?{request.url.query}\n".encode() + body
+        ).hexdigest()
+
+        stored = idempotency_cache.get(user_id, key)
+        if stored is not None:
+            return _replay(stored, request_hash)
+
+        async with AsyncSessionLocal() as db:
+            claim_id = await _claim(db, user_id=user_id, key=key, request_hash=request_hash)
+            if claim_id is None:
+                stored, ttl = await _load(db, user_id=user_id, key=key)
+            await db.commit()
+
+        if claim_id is None:
+            if stored is None:
+                # A reserva foi liberada entre o INSERT e a leitura (a original falhou): o cliente tenta de novo
+                stored = StoredResponse(request_hash, None, None, None)
+            elif stored.status_code is not None:
+                idempotency_cache.set(user_id, key, stored, ttl_seconds=ttl)
+            logger.info(f"Requisição repetida com Idempotency-Key ({request.method} {request.url.path}, usuário {user_id}).")
+            return _replay(stored, request_hash)
+
+        # Até a resposta ser entregue a _store, qualquer saída (erro, não-2xx, cancelamento) libera a chave
+        storing = False
+        try:
+            response = await call_next(request)
+            if not 200 <= response.status_code < 300:
+                return response
+
+            response_body = b"".join([chunk async for chunk in response.body_iterator])
+            stored = StoredResponse(request_hash, response.status_code, response.headers.get("content-type"), response_body)
+            storing = True
+            await _shielded(_store(claim_id, user_id, key, stored))
+        finally:
+            if not storing:
+                await _shielded(_release_quietly(claim_id))
+
+        replay = Response(content=response_body, status_code=response.status_code)
+        # raw_headers mantém headers repetidos (ex.: vários Set-Cookie), que um dict juntaria
+        replay.raw_headers = list(response.raw_headers)
+        return replay
@@ -0,0 +1,303 @@
+# api/app/core/instrumentation.py
+"""
+Instrumentação de desempenho por requisição.
+
+- Ganchos do SQLAlchemy (before/after_cursor_execute) contam as instruções e o tempo de banco
+  da requisição em andamento (ContextVar aberto pelo `InstrumentationMiddleware`).
+- Toda resposta sai com `Server-Timing: db;dur=..;desc="N consultas", app;dur=..` (aparece no
+  DevTools do navegador, aba Timing).
+- Histogramas por rota (template, ex.: /api/v1/orders/{order_id}) de latência, instruções e
+  tempo de banco, expostos em GET /metrics no formato texto do Prometheus. Os números são do
+  processo: com vários workers cada um tem os seus.
+- Instruções acima de SLOW_QUERY_MS vão para o log como WARNING, com os literais de texto e os
+  valores dos parâmetros omitidos (só os tipos), para não vazar dados de clientes.
+- Cada requisição ganha um request_id (header X-Request-ID recebido ou gerado, devolvido na
+  resposta) e um trace_id (do header W3C traceparent, ou o próprio request_id), que o
+  app.core.logging_config coloca em todas as linhas de log da requisição. A linha de acesso
+  (método, rota, status, duração, instruções) é escrita aqui, ao fim da requisição.
+
+Uma rota com N+1 (ex.: um SELECT por item da venda) aparece como muitas instruções por requisição
+no histograma `vrsales_http_request_db_statements` e no Server-Timing.
+"""
+import re
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Segundos
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+MAX_LOGGED_SQL = 2000
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_WHITESPACE = re.compile(r"\s+")
+_REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,64}")
+# 00-<trace-id: 32 hex>-<parent-id: 16 hex>-<flags: 2 hex>
+_TRACEPARENT = re.compile(r"[0-9a-f]{2}-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}")
+
+
+class RequestStats:
+    """
+    Contadores de banco e identificação da requisição em andamento. `log_sampled` é decidido
+    pelo logging_config na primeira linha de log abaixo de WARNING (a rota já é conhecida).
+    """
+    __slots__ = ("label", "statements", "db_seconds", "request_id", "trace_id", "scope", "log_sampled")
+
+    def __init__(self, label: str, request_id: str = "", trace_id: str = "", scope: Optional[Scope] = None):
+        self.label = label
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.request_id = request_id
+        self.trace_id = trace_id or request_id
+        self.scope = scope
+        self.log_sampled: Optional[bool] = None
+
+
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def current_stats() -> Optional[RequestStats]:
+    return _current_stats.get()
+
+
+# --- Métricas (formato texto do Prometheus, sem dependência externa) ---
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name, self.help_text, self.labelnames = name, help_text, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        self.name, self.help_text, self.labelnames = name, help_text, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [contagem por bucket (não acumulada)..., +Inf], soma, total
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total_sum, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total_sum)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Metrics:
+    def __init__(self):
+        route_labels = ("method", "route")
+        self.requests = Counter("vrsales_http_requests_total", "Requisições HTTP atendidas.", route_labels + ("status",))
+        self.latency = Histogram(
+            "vrsales_http_request_duration_seconds", "Latência das requisições por rota.", LATENCY_BUCKETS, route_labels
+        )
+        self.request_statements = Histogram(
+            "vrsales_http_request_db_statements", "Instruções SQL por requisição.", STATEMENT_BUCKETS, route_labels
+        )
+        self.request_db_time = Histogram(
+            "vrsales_http_request_db_seconds", "Tempo de banco por requisição.", LATENCY_BUCKETS, route_labels
+        )
+        self.statement_latency = Histogram(
+            "vrsales_db_statement_duration_seconds", "Duração de cada instrução SQL.", LATENCY_BUCKETS
+        )
+        self.slow_statements = Counter(
+            "vrsales_db_slow_statements_total", "Instruções SQL acima de SLOW_QUERY_MS."
+        )
+
+    def observe_request(self, method: str, route: str, status_code: int, seconds: float, stats: RequestStats) -> None:
+        labels = (method, route)
+        self.requests.inc(labels + (str(status_code),))
+        self.latency.observe(seconds, labels)
+        self.request_statements.observe(stats.statements, labels)
+        self.request_db_time.observe(stats.db_seconds, labels)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in (self.requests, self.latency, self.request_statements, self.request_db_time,
+                       self.statement_latency, self.slow_statements):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+# --- Ganchos do SQLAlchemy ---
+
+def redact_sql(statement: str) -> str:
+    """ SQL de uma linha, sem os literais de texto (os valores vão como parâmetros e nem são logados). """
+    sql = _WHITESPACE.sub(" ", _STRING_LITERAL.sub("'?'", statement)).strip()
+    return sql if len(sql) <= MAX_LOGGED_SQL else sql[:MAX_LOGGED_SQL] + "..."
+
+def describe_parameters(parameters, executemany: bool) -> str:
+    """ Só os tipos dos parâmetros, nunca os valores. """
+    if executemany:
+        rows = list(parameters or [])
+        return f"{len(rows)} linhas x {describe_parameters(rows[0], False) if rows else '[]'}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    return "[" + ", ".join(type(v).__name__ for v in (parameters or ())) + "]"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("instrumentation_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("instrumentation_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    metrics.statement_latency.observe(elapsed)
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        metrics.slow_statements.inc()
+        logger.warning(
+            f"Consulta lenta: {elapsed * 1000:.1f}ms | {stats.label if stats else 'fora de requisição'} | "
+            f"{redact_sql(statement)} | parâmetros: {describe_parameters(parameters, executemany)}"
+        )
+
+def _handle_error(exception_context):
+    # Instrução que falhou não chega ao after_cursor_execute: descarta o início guardado
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("instrumentation_started"):
+        conn.info["instrumentation_started"].pop()
+
+def instrument_engine(engine: Engine) -> None:
+    """ Liga os ganchos de contagem/tempo num Engine (para o AsyncEngine, passe `.sync_engine`). """
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+# --- Middleware ---
+
+def route_template(scope: Scope) -> str:
+    """ Template da rota atendida (/api/v1/orders/{order_id}), para não abrir uma série por id. """
+    # Routers incluídos: scope["route"] é a rota original, com o caminho relativo ao router
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    path = getattr(context, "path_format", None) or getattr(scope.get("route"), "path", None)
+    return path or "nao_roteada"
+
+
+def request_ids(scope: Scope) -> Tuple[str, str]:
+    """ (request_id, trace_id) dos headers X-Request-ID e traceparent; inválidos são ignorados. """
+    request_id = trace_id = ""
+    for name, value in scope.get("headers", ()):
+        if name == b"x-request-id":
+            candidate = value.decode("latin-1")
+            if _REQUEST_ID.fullmatch(candidate):
+                request_id = candidate
+        elif name == b"traceparent":
+            match = _TRACEPARENT.fullmatch(value.decode("latin-1").strip())
+            if match and match.group(1) != "0" * 32:
+                trace_id = match.group(1)
+    request_id = request_id or uuid.uuid4().hex
+    return request_id, trace_id or request_id
+
+
+class InstrumentationMiddleware:
+    """
+    Abre os contadores da requisição, coloca o Server-Timing e o X-Request-ID na resposta,
+    registra as métricas pela rota (template) e escreve a linha de acesso no log.
+    ASGI puro: não bufferiza o corpo nem muda o contexto das rotas.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id, trace_id = request_ids(scope)
+        stats = RequestStats(f"{scope['method']} {scope['path']}", request_id, trace_id, scope)
+        # request.state: o handler global de exceção roda no ServerErrorMiddleware, fora deste contexto
+        state = scope.setdefault("state", {})
+        state["request_id"], state["trace_id"] = request_id, trace_id
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} consultas", app;dur={elapsed_ms:.1f}',
+                )
+                headers["X-Request-ID"] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            seconds = time.perf_counter() - started
+            route = route_template(scope)
+            # Ainda dentro do contexto da requisição: a linha leva request_id/trace_id e segue a amostragem
+            logger.log(
+                "WARNING" if status_code >= 500 else "INFO",
+                "{method} {path} {status} {duration_ms}ms ({statements} consultas, {db_ms}ms de banco)",
+                method=scope["method"], path=scope["path"], route=route, status=status_code,
+                duration_ms=round(seconds * 1000, 2), statements=stats.statements,
+                db_ms=round(stats.db_seconds * 1000, 2),
+            )
+            _current_stats.reset(token)
+            metrics.observe_request(scope["method"], route, status_code, seconds, stats)
@@ -1,38 +1,117 @@
+# api/app/core/logging_config.py
+"""
+Pipeline único de log, todo pelo loguru (o logging da stdlib, inclusive uvicorn e SQLAlchemy, é
+redirecionado para ele).
+
+- As sinks usam enqueue=True: a chamada no código da requisição só monta a linha e a coloca numa
+  fila; a escrita no console/arquivo é feita por uma thread de fundo. O fim do lifespan chama
+  `logger.complete()` para esvaziar a fila.
+- Saída em JSON, uma linha por registro (LOG_JSON=false volta ao texto legível), com time, level,
+  message, logger, function, line, request_id, trace_id e os campos extras do registro.
+- request_id/trace_id vêm do contexto aberto pelo InstrumentationMiddleware (ver
+  app.core.instrumentation). O handler global de exceção, que roda depois desse contexto, os lê
+  de request.state e os passa com logger.bind. Fora de requisição (agendador, tarefas) ficam vazios.
+- Amostragem: as linhas abaixo de WARNING de uma requisição saem ou não em bloco, pela fração
+  de LOG_SAMPLE_RATES da rota. A decisão é tomada uma vez por requisição. Avisos e erros
+  sempre saem.
+- Arquivo LOG_FILE com rotação por tamanho (LOG_ROTATION) e retenção (LOG_RETENTION).
+"""
 import logging
-from logging.handlers import TimedRotatingFileHandler
-import os
-from datetime import datetime
+import random
+import sys
+import traceback
+
+import orjson
+from loguru import logger
+
+from app.core.config import settings
+from app.core.instrumentation import current_stats, route_template
+
+# Campos do registro que não são repetidos em "extra" no JSON
+_INTERNAL_EXTRA = {"_json", "request_id", "trace_id"}
+TEXT_FORMAT = (
+    "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {extra[request_id]} | {name}:{line} - {message}\n{exception}"
+)
+
+
+class InterceptHandler(logging.Handler):
+    """ Entrega os registros da stdlib ao loguru, preservando o nível e a origem. """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+        # Sobe a pilha até sair do módulo logging, para o loguru apontar quem chamou
+        frame, depth = sys._getframe(), 0
+        while frame is not None and (depth == 0 or frame.f_code.co_filename == logging.__file__):
+            frame = frame.f_back
+            depth += 1
+        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+
+
+def _add_request_ids(record) -> None:
+    # Fora do contexto da requisição valem os ids passados com logger.bind (ou os vazios padrão)
+    stats = current_stats()
+    if stats is not None:
+        record["extra"]["request_id"] = stats.request_id
+        record["extra"]["trace_id"] = stats.trace_id
+
+
+def _sampled(record) -> bool:
+    if record["level"].no >= logging.WARNING:
+        return True
+    stats = current_stats()
+    if stats is None or stats.scope is None:
+        return True
+    if stats.log_sampled is None:
+        endpoint = f"{stats.scope['method']} {route_template(stats.scope)}"
+        rate = settings.LOG_SAMPLE_RATES.get(endpoint, settings.LOG_SAMPLE_DEFAULT)
+        stats.log_sampled = rate >= 1 or random.random() < rate
+    return stats.log_sampled
+
+
+def _json_format(record) -> str:
+    """ Monta a linha JSON em record["extra"]["_json"]; o loguru só a escreve. """
+    extra = record["extra"]
+    line = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "request_id": extra.get("request_id", ""),
+        "trace_id": extra.get("trace_id", ""),
+    }
+    fields = {key: value for key, value in extra.items() if key not in _INTERNAL_EXTRA}
+    if fields:
+        line["extra"] = fields
+    if record["exception"] is not None:
+        error_type, error, error_traceback = record["exception"]
+        line["exception"] = "".join(traceback.format_exception(error_type, error, error_traceback))
+    extra["_json"] = orjson.dumps(line, default=str).decode()
+    return "{extra[_json]}\n"
+
 
 def setup_logging():
-    # Caminho para o diretório de logs
-    log_directory = "logs"
-    if not os.path.exists(log_directory):
-        os.makedirs(log_directory)
-
-    # Configuração básica do logger
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # Formato do log
-    log_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-
-    # --- INÍCIO DA MUDANÇA ---
-    # As linhas abaixo, que criavam e adicionavam o handler de arquivo, foram comentadas.
-    # Assim, os logs não serão mais salvos em arquivos.
-
-    # # Handler para salvar logs em arquivos com rotação diária
-    # now = datetime.now()
-    # log_filename = f"{log_directory}/file_{now.strftime('%Y-%m-%d_%H-%M-%S_%f')}.log"
-    # file_handler = TimedRotatingFileHandler(log_filename, when="midnight", interval=1, backupCount=30)
-    # file_handler.setFormatter(log_format)
-    # logger.addHandler(file_handler)
-    
-    # --- FIM DA MUDANÇA ---
-
-    # Handler para exibir logs no console (mantido)
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(log_format)
-    
-    # Adiciona o handler do console ao logger se ainda não tiver um
-    if not any(isinstance(h, logging.StreamHandler) for h in logger.handlers):
-        logger.addHandler(console_handler)
\ No newline at end of file
+    log_format = _json_format if settings.LOG_JSON else TEXT_FORMAT
+    logger.remove()
+    logger.configure(patcher=_add_request_ids, extra={"request_id": "", "trace_id": ""})
+    logger.add(
+        sys.stderr, level=settings.LOG_LEVEL, format=log_format, filter=_sampled,
+        enqueue=True, backtrace=False, diagnose=False,
+    )
+    if settings.LOG_FILE:
+        logger.add(
+            settings.LOG_FILE, level=settings.LOG_LEVEL, format=_json_format, filter=_sampled,
+            rotation=settings.LOG_ROTATION, retention=settings.LOG_RETENTION,
+            enqueue=True, backtrace=False, diagnose=False, encoding="utf-8",
+        )
+
+    # stdlib -> loguru. A linha de acesso já é escrita pelo InstrumentationMiddleware
+    logging.basicConfig(handlers=[InterceptHandler()], level=settings.LOG_LEVEL, force=True)
+    for name in ("uvicorn", "uvicorn.error"):
+        logging.getLogger(name).handlers = []
+        logging.getLogger(name).propagate = True
+    logging.getLogger("uvicorn.access").disabled = True
@@ -0,0 +1,104 @@
+# api/app/core/query_budget_plugin.py
+"""
+Plugin do pytest: reprova o teste em que alguma requisição passa do orçamento de instruções SQL
+da rota ou repete a mesma consulta (N+1) além de N_PLUS_ONE_THRESHOLD.
+
+Ativação (o plugin liga o QUERY_DETECTOR antes de a aplicação ser importada):
+
+    pytest -p app.core.query_budget_plugin
+    # ou, no conftest.py:  pytest_plugins = ["app.core.query_budget_plugin"]
+
+Orçamentos no pytest.ini (rota = método + template, como em /metrics):
+
+    [pytest]
+    query_budget = 30
+    query_budget_endpoints =
+        GET /api/v1/products/ = 8
+        POST /api/v1/orders/{order_id}/items = 12
+    n_plus_one_threshold = 5
+
+Por teste:
+
+    @pytest.mark.query_budget(12)                           # todas as rotas do teste
+    @pytest.mark.query_budget({"GET /api/v1/tables/": 4})   # só esta rota
+    @pytest.mark.allow_n_plus_one                           # repetição intencional
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addini("query_budget", "Máximo de instruções SQL por requisição (padrão de todas as rotas).", default="30")
+    parser.addini(
+        "query_budget_endpoints",
+        "Orçamentos por rota, uma por linha: 'MÉTODO /template = limite'.",
+        type="linelist",
+        default=[],
+    )
+    parser.addini("n_plus_one_threshold", "Repetições da mesma consulta toleradas (padrão: N_PLUS_ONE_THRESHOLD).", default="")
+
+
+def pytest_configure(config):
+    # Antes de qualquer import de app.core.config: main.py só liga o detector com a variável
+    os.environ.setdefault("QUERY_DETECTOR", "true")
+    config.addinivalue_line("markers", "query_budget(limite_ou_dict): orçamento de instruções SQL por requisição")
+    config.addinivalue_line("markers", "allow_n_plus_one: não reprova o teste por consultas repetidas")
+
+
+def _budgets(item) -> Tuple[int, Dict[str, int]]:
+    default = int(item.config.getini("query_budget"))
+    per_endpoint: Dict[str, int] = {}
+    for line in item.config.getini("query_budget_endpoints"):
+        endpoint, _, limit = line.rpartition("=")
+        per_endpoint[endpoint.strip()] = int(limit)
+    # Do marcador mais distante (módulo/classe) para o mais próximo (função): o mais próximo vence
+    for marker in reversed(list(item.iter_markers("query_budget"))):
+        for arg in marker.args:
+            if isinstance(arg, dict):
+                per_endpoint.update(arg)
+            else:
+                default = int(arg)
+                per_endpoint = {}
+    return default, per_endpoint
+
+
+def _threshold(item) -> int:
+    value = item.config.getini("n_plus_one_threshold")
+    if value:
+        return int(value)
+    from app.core.config import settings
+    return settings.N_PLUS_ONE_THRESHOLD
+
+
+def _problems(item, requests) -> List[str]:
+    default, per_endpoint = _budgets(item)
+    threshold: Optional[int] = None if item.get_closest_marker("allow_n_plus_one") else _threshold(item)
+    problems = []
+    for endpoint, recorder in requests:
+        budget = per_endpoint.get(endpoint, default)
+        if recorder.total > budget:
+            problems.append(f"{endpoint}: {recorder.total} instruções SQL (orçamento: {budget})")
+        if threshold is not None:
+            for shape, count, origin in recorder.repeated(threshold):
+                problems.append(f"{endpoint}: possível N+1, {count}x {shape} (origem: {origin or 'desconhecida'})")
+    return problems
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    from app.core import query_detector
+
+    requests = []
+    listener = lambda endpoint, recorder: requests.append((endpoint, recorder))
+    query_detector.add_listener(listener)
+    try:
+        result = yield
+    finally:
+        query_detector.remove_listener(listener)
+
+    problems = _problems(item, requests)
+    if problems:
+        pytest.fail("Orçamento de consultas excedido:\n" + "\n".join(problems), pytrace=False)
+    return result
@@ -0,0 +1,150 @@
+# api/app/core/query_detector.py
+"""
+Detector de N+1 para desenvolvimento e testes (QUERY_DETECTOR=true; desligado em produção).
+
+Cada instrução SQL da requisição é normalizada (parâmetros, números, literais e listas do IN
+viram "?") e contada pela forma. Uma mesma forma repetida mais de N_PLUS_ONE_THRESHOLD vezes
+na mesma requisição é quase sempre um carregamento preguiçoso dentro de um laço, como os que
+o "Carregamento Profundo" de crud_order/crud_sale corrigiu. O aviso vai para o log com a rota,
+a forma da consulta e a primeira linha de app/ que a disparou:
+
+    Possível N+1 em GET /api/v1/orders/{order_id}: 12x SELECT ... WHERE products.id = ? (origem: app/crud/crud_order.py:88)
+
+O plugin do pytest (app.core.query_budget_plugin) usa os mesmos registros para reprovar o teste
+que passa do orçamento de instruções por rota.
+"""
+import re
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import greenlet
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.instrumentation import redact_sql, route_template
+
+APP_DIR = Path(__file__).resolve().parents[1]
+_IGNORED_FILES = {str(Path(__file__).resolve()), str(APP_DIR / "core" / "instrumentation.py")}
+
+# $1::INTEGER, $2::TIMESTAMP WITHOUT TIME ZONE (asyncpg) e %(name)s (psycopg2)
+_PARAMETER = re.compile(r"\$\d+(?:::\w+(?:\s+WITH(?:OUT)?\s+TIME\s+ZONE)?(?:\[\])?)?|%\(\w+\)s")
+_NUMBER = re.compile(r"(?<![\w.])\d+(?:\.\d+)?\b")
+_LITERAL = re.compile(r"'\?'")
+# IN (?, ?, ?) e VALUES (?, ?), (?, ?): o tamanho da lista não muda a forma
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"\(\?\.\.\.\)(?:\s*,\s*\(\?\.\.\.\))+")
+
+
+def normalize_sql(statement: str) -> str:
+    """ Forma da instrução: duas consultas que só diferem nos valores têm a mesma forma. """
+    sql = _LITERAL.sub("?", redact_sql(statement))
+    sql = _NUMBER.sub("?", _PARAMETER.sub("?", sql))
+    return _ROWS.sub("(?...)", _LIST.sub("(?...)", sql))
+
+
+def _origin() -> Optional[str]:
+    """
+    Primeira linha de app/ que levou à instrução. Com AsyncSession o SQL roda num greenlet
+    filho: a pilha de chamadas do código async está no greenlet pai (suspenso).
+    """
+    current = greenlet.getcurrent()
+    frames = [sys._getframe(1)]
+    if current.parent is not None:
+        frames.append(current.parent.gr_frame)
+    for frame in frames:
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if filename.startswith(str(APP_DIR)) and filename not in _IGNORED_FILES:
+                return f"{Path(filename).relative_to(APP_DIR.parent)}:{frame.f_lineno}"
+            frame = frame.f_back
+    return None
+
+
+class QueryRecorder:
+    """ Instruções de uma requisição (ou de um bloco `record_queries`), agrupadas pela forma. """
+
+    def __init__(self, label: str):
+        self.label = label
+        self.total = 0
+        self.shapes: Dict[str, int] = {}
+        self.origins: Dict[str, Optional[str]] = {}
+
+    def add(self, statement: str) -> None:
+        shape = normalize_sql(statement)
+        self.total += 1
+        count = self.shapes[shape] = self.shapes.get(shape, 0) + 1
+        # A origem só é procurada quando a forma se repete (andar a pilha custa)
+        if count == 2:
+            self.origins[shape] = _origin()
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int, Optional[str]]]:
+        """ Formas repetidas mais de `threshold` vezes, da mais repetida para a menos. """
+        found = [(shape, count, self.origins.get(shape)) for shape, count in self.shapes.items() if count > threshold]
+        return sorted(found, key=lambda item: -item[1])
+
+
+_current_recorder: ContextVar[Optional[QueryRecorder]] = ContextVar("query_recorder", default=None)
+# Chamados ao fim de cada requisição com (endpoint, registro); usado pelo plugin do pytest
+_listeners: List[Callable[[str, QueryRecorder], None]] = []
+
+
+@contextmanager
+def record_queries(label: str = "bloco") -> Iterator[QueryRecorder]:
+    """ Registra as instruções do bloco (ex.: num teste que chama o CRUD direto, sem HTTP). """
+    recorder = QueryRecorder(label)
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
+
+def add_listener(listener: Callable[[str, QueryRecorder], None]) -> None:
+    _listeners.append(listener)
+
+def remove_listener(listener: Callable[[str, QueryRecorder], None]) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    recorder = _current_recorder.get()
+    if recorder is not None:
+        recorder.add(statement)
+
+def install_detector(engine: Engine) -> None:
+    """ Liga o registro das instruções num Engine (para o AsyncEngine, passe `.sync_engine`). """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+def report(endpoint: str, recorder: QueryRecorder, threshold: int) -> None:
+    for shape, count, origin in recorder.repeated(threshold):
+        logger.warning(f"Possível N+1 em {endpoint}: {count}x {shape} (origem: {origin or 'desconhecida'})")
+
+
+class QueryDetectorMiddleware:
+    """ Registra as instruções de cada requisição e avisa das formas repetidas (ASGI puro). """
+
+    def __init__(self, app: ASGIApp, threshold: int = settings.N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.threshold = threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with record_queries(f"{scope['method']} {scope['path']}") as recorder:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                endpoint = f"{scope['method']} {route_template(scope)}"
+                report(endpoint, recorder, self.threshold)
+                for listener in list(_listeners):
+                    listener(endpoint, recorder)
@@ -0,0 +1,21 @@
+# api/app/core/responses.py
+"""
+Resposta JSON serializada com orjson, para as leituras quentes do POS/KDS.
+
+Essas rotas montam dicionários planos direto das linhas do banco (sem carregar o grafo
+de objetos do ORM) e devolvem `FlatJSONResponse`: o FastAPI não revalida uma Response
+pronta, então o `response_model` da rota fica só como documentação do formato.
+
+Datas saem em ISO 8601 e Enums pelo valor, igual à serialização do Pydantic.
+"""
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class FlatJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -1,10 +1,20 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict # Importar Dict
+from typing import Any, Dict, Optional, Tuple # Importar Dict
 from passlib.context import CryptContext
 from jose import jwt
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# O bcrypt consome dezenas de ms de CPU por chamada. Rodando direto na rota ele trava o
+# event loop (e todas as outras requisições do worker). O pool é limitado de propósito:
+# no pico de logins as chamadas fazem fila aqui, sem competir pela CPU com o resto da API.
+# Threads bastam porque o bcrypt libera o GIL durante o hash.
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
 
 ALGORITHM = "HS256"
 # A variável ACCESS_TOKEN_EXPIRE_MINUTES ainda existe nas configurações,
@@ -17,6 +27,25 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+# --- Versões assíncronas: use estas dentro das rotas ---
+
+async def _run_in_password_executor(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, func, *args)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_password_executor(pwd_context.verify, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_password_executor(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica a senha e, se o hash foi gerado com parâmetros antigos (ex.: BCRYPT_ROUNDS menor),
+    devolve também o novo hash para ser gravado. Retorna (senha_correta, novo_hash_ou_None).
+    """
+    return await _run_in_password_executor(pwd_context.verify_and_update, plain_password, hashed_password)
+
 def create_access_token(data: Dict[str, Any], expires_delta: timedelta | None = None):
     to_encode = data.copy()
     # --- REMOÇÃO DA EXPIRAÇÃO ---
@@ -0,0 +1,222 @@
+# api/app/core/tenant_cache.py
+"""
+Cache por loja dos dados de referência: categorias, fornecedores, adicionais, atributos e paredes.
+
+Esses dados mudam poucas vezes por dia, mas toda tela do POS/salão pede a lista de novo.
+Cada tipo de dado de cada loja tem uma versão em `tenant_data_versions`:
+
+- toda escrita (CRUDBase.create/update/remove/bulk_update_columns com `cache_entity`, ou
+  `bump_version` direto) incrementa a versão na própria transação e faz um pg_notify, que o
+  Postgres só entrega depois do commit;
+- cada worker escuta o canal (LISTEN) e guarda a última versão de cada (loja, tipo); a resposta
+  guardada só é usada se foi montada nessa versão;
+- a versão também entra no ETag das rotas (VersionStamp em app.api.conditional), igual em
+  todos os workers: o cliente revalida com If-None-Match e recebe 304 sem corpo.
+
+Sem a conexão de LISTEN (ex.: fora do lifespan, ou enquanto reconecta) a versão é lida do banco
+em cada requisição (uma busca por chave primária): continua correto, só não poupa essa consulta.
+"""
+import asyncio
+import contextlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi.responses import Response
+from loguru import logger
+from pydantic import TypeAdapter
+from sqlalchemy import event, func, literal, select, cast, String
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import async_engine
+from app.models.tenant_data_version import TenantDataVersion
+from app.models.user import User
+from app.schemas.enums import UserRole
+
+CHANNEL = "tenant_cache"
+LISTEN_RETRY_SECONDS = 5
+_PENDING_KEY = "tenant_cache_pending_versions"
+
+
+async def bump_version(db: AsyncSession, entity: str, store_id: Optional[int]) -> None:
+    """
+    Incrementa a versão de `entity` da loja dentro da transação de `db` (não faz commit)
+    e avisa os outros workers pelo NOTIFY, entregue só se a transação for confirmada.
+    """
+    if store_id is None:
+        return
+    bumped = (
+        insert(TenantDataVersion)
+        .values(store_id=store_id, entity=entity, version=1)
+        .on_conflict_do_update(
+            index_elements=[TenantDataVersion.store_id, TenantDataVersion.entity],
+            set_={"version": TenantDataVersion.version + 1},
+        )
+        .returning(TenantDataVersion.version)
+        .cte("bumped")
+    )
+    payload = func.concat(literal(f"{store_id}:{entity}:"), cast(bumped.c.version, String))
+    version = (await db.execute(select(bumped.c.version, func.pg_notify(CHANNEL, payload)))).scalar_one()
+    # Este worker passa a usar a versão nova logo após o commit, sem esperar o próprio NOTIFY
+    db.sync_session.info.setdefault(_PENDING_KEY, {})[(store_id, entity)] = version
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_versions(session: Session) -> None:
+    for (store_id, entity), version in session.info.pop(_PENDING_KEY, {}).items():
+        tenant_cache.observe(store_id, entity, version)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_versions(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+class TenantCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._versions: Dict[Tuple[int, str], int] = {}
+        # (loja, tipo, variante) -> (versão, corpo JSON pronto)
+        self._entries: "OrderedDict[Tuple[int, str, str], Tuple[int, bytes]]" = OrderedDict()
+        self._listening = False
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def observe(self, store_id: int, entity: str, version: int) -> None:
+        key = (store_id, entity)
+        if version > self._versions.get(key, -1):
+            self._versions[key] = version
+
+    async def current_versions(self, db: AsyncSession, store_id: int, entities: List[str]) -> Dict[str, int]:
+        """ Versões atuais de `entities` da loja; as que o LISTEN não garante vêm numa única consulta. """
+        versions = {}
+        missing = []
+        for entity in entities:
+            key = (store_id, entity)
+            if self._listening and key in self._versions:
+                versions[entity] = self._versions[key]
+            else:
+                missing.append(entity)
+        if missing:
+            rows = dict((await db.execute(
+                select(TenantDataVersion.entity, TenantDataVersion.version).where(
+                    TenantDataVersion.store_id == store_id, TenantDataVersion.entity.in_(missing)
+                )
+            )).all())
+            for entity in missing:
+                versions[entity] = rows.get(entity, 0)
+                self.observe(store_id, entity, versions[entity])
+        return versions
+
+    async def current_version(self, db: AsyncSession, store_id: int, entity: str) -> int:
+        return (await self.current_versions(db, store_id, [entity]))[entity]
+
+    async def respond(
+        self,
+        db: AsyncSession,
+        *,
+        entity: str,
+        schema: Any,
+        current_user: User,
+        loader: Callable[[], Awaitable[Any]],
+        variant: str = "",
+    ) -> Response:
+        """
+        Resposta da listagem `entity` da loja do usuário: o corpo guardado se foi montado na
+        versão atual, senão chama `loader` (objetos do ORM), valida com `schema` e guarda o JSON.
+        `variant` separa listagens com parâmetros diferentes (ex.: skip/limit). O 304 é
+        respondido antes, pelo conditional_get do router.
+        """
+        adapter = _adapter(schema)
+        # Super admin enxerga todas as lojas: a listagem dele não é a da própria loja
+        if current_user.role == UserRole.SUPER_ADMIN or current_user.store_id is None:
+            body = adapter.dump_json(adapter.validate_python(await loader(), from_attributes=True))
+            return Response(content=body, media_type="application/json")
+
+        store_id = current_user.store_id
+        version = await self.current_version(db, store_id, entity)
+        key = (store_id, entity, variant)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(key)
+            return Response(content=entry[1], media_type="application/json")
+
+        # A versão foi lida antes dos dados: no pior caso o corpo é mais novo que a versão,
+        # e a próxima escrita (versão + 1) o substitui
+        body = adapter.dump_json(adapter.validate_python(await loader(), from_attributes=True))
+        self._entries[key] = (version, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return Response(content=body, media_type="application/json")
+
+    # --- LISTEN/NOTIFY entre os workers ---
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            store_id, entity, version = payload.split(":")
+            self.observe(int(store_id), entity, int(version))
+        except ValueError:
+            logger.warning(f"Notificação inválida no canal {CHANNEL}: {payload!r}")
+
+    async def _listen(self) -> None:
+        while True:
+            conn = None
+            driver_conn = None
+            try:
+                conn = await async_engine.connect()
+                driver_conn = (await conn.get_raw_connection()).driver_connection
+                lost = asyncio.Event()
+                driver_conn.add_termination_listener(lambda _conn: lost.set())
+                await driver_conn.add_listener(CHANNEL, self._on_notify)
+                # O que mudou enquanto ninguém escutava: as versões voltam a ser lidas do banco
+                self._versions.clear()
+                self._listening = True
+                logger.info(f"Cache por loja: escutando o canal {CHANNEL}.")
+                await lost.wait()
+                logger.warning("Cache por loja: conexão de LISTEN perdida, reconectando.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # O stop() cancelou no meio da conexão e o driver trocou o CancelledError por outro erro
+                if self._stopping:
+                    raise asyncio.CancelledError() from e
+                logger.opt(exception=e).error("Cache por loja: erro na conexão de LISTEN.")
+            finally:
+                self._listening = False
+                if conn is not None:
+                    try:
+                        if driver_conn is not None and not driver_conn.is_closed():
+                            await driver_conn.remove_listener(CHANNEL, self._on_notify)
+                    except Exception:
+                        with contextlib.suppress(Exception):
+                            await conn.invalidate()
+                    # Conexão já quebrada: um erro no close() não pode encerrar a escuta
+                    with contextlib.suppress(Exception):
+                        await conn.close()
+            await asyncio.sleep(LISTEN_RETRY_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._listen(), name="tenant-cache-listener")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._stopping = True
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+tenant_cache = TenantCache(settings.TENANT_CACHE_MAX_ENTRIES)
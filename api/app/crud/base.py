@@ -3,9 +3,11 @@ from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import update, values, column, cast, func, Integer
 from fastapi import HTTPException, status
 from fastapi.encoders import jsonable_encoder
 
+from app.core.tenant_cache import bump_version
 from app.db.base import Base
 from app.models.user import User
 
@@ -14,9 +16,17 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Nome do dado de referência no cache por loja (app.core.tenant_cache). Com ele definido,
+    # create/update/remove/bulk_update_columns incrementam a versão da loja na mesma transação.
+    cache_entity: Optional[str] = None
+
     def __init__(self, model: Type[ModelType]):
         self.model = model
 
+    async def _bump_cache_version(self, db: AsyncSession, store_id: Optional[int]) -> None:
+        if self.cache_entity:
+            await bump_version(db, self.cache_entity, store_id)
+
     # --- CORRIGIDO para ser async ---
     async def get(self, db: AsyncSession, id: Any, *, current_user: User) -> Optional[ModelType]:
         stmt = select(self.model).filter(self.model.id == id)
@@ -46,6 +56,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
+        await self._bump_cache_version(db, getattr(db_obj, 'store_id', None))
         await db.commit()
         await db.refresh(db_obj)
         return db_obj
@@ -69,15 +80,71 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 setattr(db_obj, field, update_data[field])
                 
         db.add(db_obj)
+        await self._bump_cache_version(db, getattr(db_obj, 'store_id', None))
         await db.commit()
         await db.refresh(db_obj)
         return db_obj
 
+    async def bulk_update_columns(
+        self,
+        db: AsyncSession,
+        *,
+        rows: List[Dict[str, Any]],
+        columns: List[str],
+        current_user: User
+    ) -> List[ModelType]:
+        """
+        Atualiza várias linhas com UM único comando e devolve as linhas alteradas:
+
+            UPDATE <tabela> SET col = COALESCE(v.col, <tabela>.col), ...
+            FROM (VALUES (:id, :col, ...), ...) AS v(id, col, ...)
+            WHERE <tabela>.id = v.id [AND <tabela>.store_id = :store_id]
+            RETURNING <tabela>.*
+
+        Um valor None mantém o valor atual da coluna. Ids de outra loja (ou inexistentes)
+        são simplesmente ignorados, como em `get`. Não faz commit.
+        """
+        if not rows:
+            return []
+
+        table_columns = self.model.__table__.c
+        # CAST explícito para o tipo da coluna: o Postgres não infere tipos de colunas do VALUES só com NULL
+        payload = values(
+            column("id", Integer),
+            *[column(name, table_columns[name].type) for name in columns],
+            name="payload_values",
+        ).data([(row["id"], *[row.get(name) for name in columns]) for row in rows])
+        payload_cte = select(
+            cast(payload.c.id, Integer).label("id"),
+            *[cast(payload.c[name], table_columns[name].type).label(name) for name in columns],
+        ).cte("payload")
+
+        stmt = (
+            update(self.model)
+            .where(self.model.id == payload_cte.c.id)
+            .values({
+                getattr(self.model, name): func.coalesce(payload_cte.c[name], getattr(self.model, name))
+                for name in columns
+            })
+            .returning(self.model)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        if hasattr(self.model, 'store_id') and current_user.role != 'super_admin':
+            stmt = stmt.where(self.model.store_id == current_user.store_id)
+
+        result = await db.execute(stmt)
+        updated = list(result.scalars().all())
+        if self.cache_entity:
+            for store_id in {getattr(obj, 'store_id', None) for obj in updated}:
+                await self._bump_cache_version(db, store_id)
+        return updated
+
     # --- CORRIGIDO para ser async ---
     async def remove(self, db: AsyncSession, *, id: int, current_user: User) -> Optional[ModelType]:
         obj = await self.get(db, id=id, current_user=current_user)
         if not obj:
             return None
         await db.delete(obj)
+        await self._bump_cache_version(db, getattr(obj, 'store_id', None))
         await db.commit()
         return obj
\ No newline at end of file
@@ -2,16 +2,22 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
 
+from app.core.tenant_cache import bump_version
 from app.models.additional import Additional
+from app.models.user import User
 from app.schemas.additional import AdditionalCreate
 
-async def get_additionals(db: AsyncSession) -> List[Additional]:
-    result = await db.execute(select(Additional))
+# Nome no cache por loja (app.core.tenant_cache)
+CACHE_ENTITY = "additionals"
+
+async def get_additionals(db: AsyncSession, *, current_user: User) -> List[Additional]:
+    result = await db.execute(select(Additional).where(Additional.store_id == current_user.store_id))
     return result.scalars().all()
 
-async def create_additional(db: AsyncSession, additional: AdditionalCreate) -> Additional:
-    db_additional = Additional(**additional.model_dump())
+async def create_additional(db: AsyncSession, additional: AdditionalCreate, *, current_user: User) -> Additional:
+    db_additional = Additional(**additional.model_dump(), store_id=current_user.store_id)
     db.add(db_additional)
+    await bump_version(db, CACHE_ENTITY, current_user.store_id)
     await db.commit()
     await db.refresh(db_additional)
-    return db_additional
\ No newline at end of file
+    return db_additional
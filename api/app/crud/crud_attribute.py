@@ -1,27 +1,46 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
-from typing import List
+from typing import List, Optional
 
+from app.core.tenant_cache import bump_version
+from app.models.user import User
 from app.models.variation import Attribute, AttributeOption
 from app.schemas.variation import AttributeCreate, AttributeOptionCreate
 
+# Nome no cache por loja (app.core.tenant_cache)
+CACHE_ENTITY = "attributes"
+
 # --- Atributos (ex: Cor, Tamanho) ---
-async def create_attribute(db: AsyncSession, attribute: AttributeCreate) -> Attribute:
-    db_attribute = Attribute(**attribute.model_dump())
+async def create_attribute(db: AsyncSession, attribute: AttributeCreate, *, current_user: User) -> Attribute:
+    db_attribute = Attribute(**attribute.model_dump(), store_id=current_user.store_id)
     db.add(db_attribute)
+    await bump_version(db, CACHE_ENTITY, current_user.store_id)
     await db.commit()
-    await db.refresh(db_attribute)
+    await db.refresh(db_attribute, attribute_names=["options"])
     return db_attribute
 
-async def get_attributes(db: AsyncSession) -> List[Attribute]:
-    result = await db.execute(select(Attribute).options(selectinload(Attribute.options)))
+async def get_attribute(db: AsyncSession, attribute_id: int, *, current_user: User) -> Optional[Attribute]:
+    result = await db.execute(
+        select(Attribute).where(Attribute.id == attribute_id, Attribute.store_id == current_user.store_id)
+    )
+    return result.scalars().first()
+
+async def get_attributes(db: AsyncSession, *, current_user: User) -> List[Attribute]:
+    result = await db.execute(
+        select(Attribute)
+        .where(Attribute.store_id == current_user.store_id)
+        .options(selectinload(Attribute.options))
+    )
     return result.scalars().all()
 
 # --- Opções de Atributo (ex: Azul, P, M) ---
-async def create_attribute_option(db: AsyncSession, option: AttributeOptionCreate, attribute_id: int) -> AttributeOption:
+async def create_attribute_option(
+    db: AsyncSession, option: AttributeOptionCreate, attribute_id: int, *, current_user: User
+) -> AttributeOption:
     db_option = AttributeOption(**option.model_dump(), attribute_id=attribute_id)
     db.add(db_option)
+    await bump_version(db, CACHE_ENTITY, current_user.store_id)
     await db.commit()
     await db.refresh(db_option)
-    return db_option
\ No newline at end of file
+    return db_option
@@ -7,12 +7,15 @@ from fastapi import HTTPException
 from datetime import date, timedelta
 
 from app.crud.base import CRUDBase
-from app.models.batch import ProductBatch  # <-- Este é o MODELO do banco
+from app.models.batch import ProductBatch, SaleBatchAllocation  # <-- Estes são MODELOS do banco
+from app.models.sale import Sale
 from app.models.product import Product
 from app.models.user import User
 # --- CORREÇÃO PRINCIPAL AQUI ---
 # Renomeamos o schema para evitar conflito com o modelo
-from app.schemas.batch import ProductBatchCreate, ProductBatch as ProductBatchSchema
+from app.schemas.batch import ProductBatchCreate, ProductBatch as ProductBatchSchema, SaleBatchAllocation as SaleBatchAllocationSchema
+from app.services.stock_alert_service import stock_alert_service
+from app.services.stock_service import stock_service
 
 class CRUDProductBatch(CRUDBase[ProductBatch, ProductBatchCreate, ProductBatchCreate]):
     
@@ -27,8 +30,10 @@ class CRUDProductBatch(CRUDBase[ProductBatch, ProductBatchCreate, ProductBatchCr
 
         db_batch = await super().create(db, obj_in=obj_in, current_user=current_user)
         
-        product.stock += obj_in.quantity
-        db.add(product)
+        new_stock = await stock_service.apply_increment_async(
+            db, model=Product, row_id=product.id, delta=obj_in.quantity, instance=product
+        )
+        stock_alert_service.check_threshold(db, product=product, previous_stock=new_stock - obj_in.quantity)
         
         await db.commit()
         
@@ -37,6 +42,36 @@ class CRUDProductBatch(CRUDBase[ProductBatch, ProductBatchCreate, ProductBatchCr
         result = await db.execute(stmt)
         return result.scalars().first()
 
+    def _batch_listing_query(self, store_id: int):
+        """
+        Projeção enxuta de lote + nome do produto.
+        Evita carregar o Product inteiro (e as relações selectin dele) só para exibir o nome.
+        """
+        return (
+            select(
+                self.model.id,
+                self.model.product_id,
+                self.model.quantity,
+                self.model.expiration_date,
+                self.model.created_at,
+                Product.name.label("product_name"),
+            )
+            .join(Product, Product.id == self.model.product_id)
+            .where(self.model.store_id == store_id, self.model.quantity > 0)
+            .order_by(asc(self.model.expiration_date))
+        )
+
+    @staticmethod
+    def _row_to_batch(row) -> dict:
+        return {
+            "id": row.id,
+            "product_id": row.product_id,
+            "quantity": row.quantity,
+            "expiration_date": row.expiration_date,
+            "created_at": row.created_at,
+            "product": {"id": row.product_id, "name": row.product_name},
+        }
+
     async def get_multi_with_filter(
         self, 
         db: AsyncSession, 
@@ -45,15 +80,10 @@ class CRUDProductBatch(CRUDBase[ProductBatch, ProductBatchCreate, ProductBatchCr
         expiring_soon_days: Optional[int] = None
     ) -> List[ProductBatchSchema]:
         """
-        Lista todos os lotes da loja do usuário, com opção de filtro,
-        e já carrega a informação do produto associado.
+        Lista os lotes com saldo da loja do usuário, com opção de filtro,
+        já com o nome do produto associado.
         """
-        query = (
-            select(self.model)
-            .where(self.model.store_id == current_user.store_id)
-            .options(joinedload(self.model.product))
-            .order_by(asc(self.model.expiration_date))
-        )
+        query = self._batch_listing_query(current_user.store_id)
         
         if expiring_soon_days is not None:
             today = date.today()
@@ -64,7 +94,57 @@ class CRUDProductBatch(CRUDBase[ProductBatch, ProductBatchCreate, ProductBatchCr
             )
             
         result = await db.execute(query)
-        return result.scalars().all()
+        return [self._row_to_batch(row) for row in result]
+
+    async def get_expiring(
+        self,
+        db: AsyncSession,
+        *,
+        store_id: int,
+        days: int = 7
+    ) -> List[ProductBatchSchema]:
+        """
+        Lotes com saldo que vencem até `today + days`, incluindo os já vencidos.
+        Percorre o índice parcial (store_id, expiration_date) apenas até o limite da data.
+        """
+        expiration_limit = date.today() + timedelta(days=days)
+        query = self._batch_listing_query(store_id).where(
+            self.model.expiration_date.is_not(None),
+            self.model.expiration_date <= expiration_limit
+        )
+        result = await db.execute(query)
+        return [self._row_to_batch(row) for row in result]
+
+    async def get_sale_allocations(
+        self,
+        db: AsyncSession,
+        *,
+        sale_id: int,
+        current_user: User
+    ) -> List[SaleBatchAllocationSchema]:
+        """ Lotes consumidos por uma venda da loja do usuário, na ordem em que foram baixados. """
+        sale_exists = await db.scalar(
+            select(Sale.id).where(Sale.id == sale_id, Sale.store_id == current_user.store_id)
+        )
+        if not sale_exists:
+            raise HTTPException(status_code=404, detail="Venda não encontrada ou não pertence a esta loja.")
+
+        query = (
+            select(
+                SaleBatchAllocation.batch_id,
+                SaleBatchAllocation.product_id,
+                SaleBatchAllocation.quantity,
+                SaleBatchAllocation.created_at,
+                self.model.expiration_date,
+                Product.name.label("product_name"),
+            )
+            .join(Product, Product.id == SaleBatchAllocation.product_id)
+            .outerjoin(self.model, self.model.id == SaleBatchAllocation.batch_id)
+            .where(SaleBatchAllocation.sale_id == sale_id)
+            .order_by(SaleBatchAllocation.id)
+        )
+        result = await db.execute(query)
+        return [SaleBatchAllocationSchema.model_validate(row) for row in result]
 
 # Exporta uma instância da classe, que será importada como 'crud.batch'
 batch = CRUDProductBatch(ProductBatch)
\ No newline at end of file
@@ -2,11 +2,19 @@
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import func, tuple_
+from typing import Optional
+from datetime import datetime
+import base64
 
 from app.crud.base import CRUDBase
 from app.models.user import User
 from app.models.cash_register import CashRegister, CashRegisterTransaction, TransactionType, CashRegisterStatus
-from app.schemas.cash_register import CashRegisterCreate, CashRegisterUpdate, CashRegisterOpen
+from app.schemas.cash_register import CashRegisterCreate, CashRegisterUpdate, CashRegisterOpen, CashRegisterClose, CashRegisterHistory
+from app.schemas.enums import PaymentMethod
+from app.services.cash_register_service import cash_register_service, open_register_cache
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 
 class CRUDCashRegister(CRUDBase[CashRegister, CashRegisterCreate, CashRegisterUpdate]):
     
@@ -30,20 +38,161 @@ class CRUDCashRegister(CRUDBase[CashRegister, CashRegisterCreate, CashRegisterUp
             status=CashRegisterStatus.OPEN
         )
         db.add(cash_register_obj)
-        await db.flush() # Para obter o ID do cash_register_obj
+        try:
+            await db.flush() # Para obter o ID do cash_register_obj
+        except IntegrityError:
+            # Índice único parcial: outro terminal abriu o caixa da loja ao mesmo tempo
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Já existe um caixa aberto. Feche-o antes de abrir um novo."
+            )
         
-        # 2. Cria a transação de abertura (suprimento)
-        opening_transaction = CashRegisterTransaction(
+        # 2. Cria a transação de abertura (suprimento), já somada ao saldo corrente
+        await cash_register_service.record_transactions_async(
+            db,
             cash_register_id=cash_register_obj.id,
-            transaction_type=TransactionType.SUPPLY,
-            amount=open_info.opening_balance,
-            description="Saldo de abertura do caixa"
+            register=cash_register_obj,
+            entries=[{
+                "transaction_type": TransactionType.SUPPLY,
+                "amount": open_info.opening_balance,
+                "payment_method": PaymentMethod.CASH,
+                "description": "Saldo de abertura do caixa",
+            }],
         )
-        db.add(opening_transaction)
         
         await db.commit()
         await db.refresh(cash_register_obj)
+        open_register_cache.invalidate(user.store_id)
         
         return cash_register_obj
 
+    async def close_register(self, db: AsyncSession, *, store_id: int, close_info: CashRegisterClose) -> CashRegister | None:
+        """
+        Fecha o caixa aberto da loja a partir do saldo corrente (sem somar transações).
+        O caixa é travado (FOR UPDATE) para que nenhuma venda entre entre a leitura do saldo e o fechamento.
+        Retorna None se não houver caixa aberto.
+        """
+        stmt = (
+            select(CashRegister)
+            .where(CashRegister.store_id == store_id, CashRegister.status == CashRegisterStatus.OPEN)
+            # O histórico de transações não é necessário para fechar
+            .with_for_update(of=CashRegister)
+            .execution_options(populate_existing=True)
+        )
+        register = (await db.execute(stmt)).scalars().first()
+        if not register:
+            return None
+
+        cash_register_service.apply_close(db, register=register, close_info=close_info)
+        await db.commit()
+        open_register_cache.invalidate(store_id)
+        await db.refresh(register, attribute_names=["balances"])
+        return register
+
+    @staticmethod
+    def _encode_cursor(closed_at: datetime, register_id: int) -> str:
+        return base64.urlsafe_b64encode(f"{closed_at.isoformat()}|{register_id}".encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str):
+        try:
+            closed_at, register_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(closed_at), int(register_id)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginação inválido.")
+
+    async def get_history_page(
+        self, db: AsyncSession, *, store_id: int, limit: int = 20, cursor: Optional[str] = None
+    ) -> CashRegisterHistory:
+        """
+        Histórico de turnos fechados, do mais recente para o mais antigo, com paginação por cursor
+        (keyset em closed_at, id: o custo não cresce com a página, ao contrário de OFFSET).
+
+        São duas consultas por página, independente do número de transações:
+        1. a página de caixas (só as colunas do resumo);
+        2. os totais das transações desses caixas, agregados no banco por tipo e forma de pagamento.
+        """
+        page_stmt = (
+            select(
+                CashRegister.id, CashRegister.user_id, User.full_name.label("user_name"), CashRegister.status,
+                CashRegister.opened_at, CashRegister.closed_at, CashRegister.opening_balance,
+                CashRegister.closing_balance, CashRegister.expected_balance, CashRegister.balance_difference,
+                CashRegister.total_sales,
+            )
+            .outerjoin(User, User.id == CashRegister.user_id)
+            # closed_at é anulável (registros antigos): sem ele o caixa não tem lugar na ordem do keyset
+            .where(
+                CashRegister.store_id == store_id,
+                CashRegister.status == CashRegisterStatus.CLOSED,
+                CashRegister.closed_at.is_not(None),
+            )
+            .order_by(CashRegister.closed_at.desc(), CashRegister.id.desc())
+            .limit(limit + 1)
+        )
+        if cursor:
+            closed_at, register_id = self._decode_cursor(cursor)
+            page_stmt = page_stmt.where(tuple_(CashRegister.closed_at, CashRegister.id) < tuple_(closed_at, register_id))
+
+        rows = (await db.execute(page_stmt)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not rows:
+            return CashRegisterHistory(items=[])
+
+        items = {
+            row.id: {**row._asdict(), "status": row.status.value, "transaction_count": 0, "totals_by_type": {}, "totals_by_method": {}}
+            for row in rows
+        }
+        totals_stmt = (
+            select(
+                CashRegisterTransaction.cash_register_id,
+                CashRegisterTransaction.transaction_type,
+                CashRegisterTransaction.payment_method,
+                func.sum(CashRegisterTransaction.amount).label("amount"),
+                func.count().label("count"),
+            )
+            .where(CashRegisterTransaction.cash_register_id.in_(items.keys()))
+            .group_by(
+                CashRegisterTransaction.cash_register_id,
+                CashRegisterTransaction.transaction_type,
+                CashRegisterTransaction.payment_method,
+            )
+        )
+        for total in await db.execute(totals_stmt):
+            item = items[total.cash_register_id]
+            item["transaction_count"] += total.count
+            by_type = item["totals_by_type"]
+            by_type[total.transaction_type.value] = by_type.get(total.transaction_type.value, 0.0) + total.amount
+            # A contagem do fechamento não é entrada de dinheiro: fica fora dos totais por forma
+            if total.transaction_type != TransactionType.CLOSING_BALANCE:
+                method = total.payment_method or PaymentMethod.OTHER.value
+                item["totals_by_method"][method] = item["totals_by_method"].get(method, 0.0) + total.amount
+
+        last = rows[-1]
+        return CashRegisterHistory(
+            items=list(items.values()),
+            next_cursor=self._encode_cursor(last.closed_at, last.id) if has_more else None,
+        )
+
+    async def get_for_store(self, db: AsyncSession, *, register_id: int, store_id: int) -> Optional[int]:
+        """ Confere se o caixa é da loja; retorna só o ID (sem carregar o caixa). """
+        return await db.scalar(
+            select(CashRegister.id).where(CashRegister.id == register_id, CashRegister.store_id == store_id)
+        )
+
+    @staticmethod
+    def transactions_query(register_id: int):
+        """ Colunas do detalhe de um turno, na ordem em que as transações foram registradas. """
+        return (
+            select(
+                CashRegisterTransaction.id, CashRegisterTransaction.transaction_type,
+                CashRegisterTransaction.payment_method, CashRegisterTransaction.amount,
+                CashRegisterTransaction.sale_id, CashRegisterTransaction.description,
+                CashRegisterTransaction.created_at,
+            )
+            .where(CashRegisterTransaction.cash_register_id == register_id)
+            .order_by(CashRegisterTransaction.id)
+        )
+
 cash_register = CRUDCashRegister(CashRegister)
\ No newline at end of file
@@ -10,7 +10,8 @@ from app.schemas.category import ProductCategoryCreate, ProductCategoryUpdate
 from app.models.user import User
 
 class CRUDCategory(CRUDBase[ProductCategory, ProductCategoryCreate, ProductCategoryUpdate]):
-    
+    cache_entity = "categories"
+
     async def create(self, db: AsyncSession, *, obj_in: ProductCategoryCreate, current_user: User) -> ProductCategory:
         """
         Cria uma categoria e recarrega ela do banco para garantir 
@@ -0,0 +1,144 @@
+# api/app/crud/crud_feedback.py
+import base64
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.crud.base import CRUDBase
+from app.models.feedback import Feedback, FeedbackImage, FeedbackStatus
+from app.models.store import Store
+from app.models.user import User
+from app.schemas.feedback import FeedbackCreate, FeedbackUpdateStatus
+from app.services.blob_store import blob_store, decode_data_url
+
+
+class CRUDFeedback(CRUDBase[Feedback, FeedbackCreate, FeedbackUpdateStatus]):
+
+    async def create_with_images(self, db: AsyncSession, *, obj_in: FeedbackCreate, current_user: User) -> Feedback:
+        """
+        Cria o chamado guardando as imagens no blob store (deduplicadas pelo hash) e só a
+        referência em feedback_images. As miniaturas são enfileiradas no pool depois do commit.
+        """
+        images_in = obj_in.image_data or []
+        if len(images_in) > settings.FEEDBACK_MAX_IMAGES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Envie no máximo {settings.FEEDBACK_MAX_IMAGES} imagens por chamado."
+            )
+
+        stored = []
+        for position, value in enumerate(images_in):
+            try:
+                data, _ = decode_data_url(value)
+                if len(data) > settings.FEEDBACK_MAX_IMAGE_BYTES:
+                    raise ValueError(
+                        f"Cada imagem pode ter no máximo {settings.FEEDBACK_MAX_IMAGE_BYTES // (1024 * 1024)} MB."
+                    )
+                blob, info = await blob_store.put_image(data)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Imagem {position + 1}: {e}")
+            stored.append({
+                "position": position,
+                "sha256": blob.sha256,
+                "content_type": info.content_type,
+                "size_bytes": blob.size,
+                "width": info.width,
+                "height": info.height,
+            })
+
+        feedback = Feedback(
+            user_id=current_user.id,
+            store_id=current_user.store_id,
+            subject=obj_in.subject,
+            description=obj_in.description,
+        )
+        db.add(feedback)
+        await db.flush()
+        if stored:
+            await db.execute(insert(FeedbackImage), [{**image, "feedback_id": feedback.id} for image in stored])
+        await db.commit()
+
+        blob_store.schedule_thumbnails(image["sha256"] for image in stored)
+        return feedback
+
+    @staticmethod
+    def _encode_cursor(created_at: datetime, feedback_id: int) -> str:
+        return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{feedback_id}".encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str):
+        try:
+            created_at, feedback_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(created_at), int(feedback_id)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginação inválido.")
+
+    async def get_page(
+        self,
+        db: AsyncSession,
+        *,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        status_filter: Optional[FeedbackStatus] = None
+    ) -> dict:
+        """
+        Chamados do mais recente para o mais antigo, com paginação por cursor (keyset em created_at, id).
+        Só metadados: duas consultas por página (chamados + referências das imagens), nenhum arquivo lido.
+        As URLs das imagens são montadas pela rota. Retorna {"items": [...], "next_cursor": ...}.
+        """
+        page_stmt = (
+            select(
+                Feedback.id, Feedback.subject, Feedback.description, Feedback.status, Feedback.created_at,
+                User.full_name.label("user_name"), Store.name.label("store_name"),
+            )
+            .outerjoin(User, User.id == Feedback.user_id)
+            .outerjoin(Store, Store.id == Feedback.store_id)
+            .order_by(Feedback.created_at.desc(), Feedback.id.desc())
+            .limit(limit + 1)
+        )
+        if status_filter:
+            page_stmt = page_stmt.where(Feedback.status == status_filter)
+        if cursor:
+            created_at, feedback_id = self._decode_cursor(cursor)
+            page_stmt = page_stmt.where(tuple_(Feedback.created_at, Feedback.id) < tuple_(created_at, feedback_id))
+
+        rows = (await db.execute(page_stmt)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not rows:
+            return {"items": [], "next_cursor": None}
+
+        items = {
+            row.id: {
+                **row._asdict(),
+                "status": row.status.value,
+                "store_name": row.store_name or "Sem Loja (Admin)",
+                "images": [],
+            }
+            for row in rows
+        }
+        images_stmt = (
+            select(
+                FeedbackImage.id, FeedbackImage.feedback_id, FeedbackImage.sha256, FeedbackImage.content_type,
+                FeedbackImage.size_bytes, FeedbackImage.width, FeedbackImage.height,
+            )
+            .where(FeedbackImage.feedback_id.in_(items.keys()))
+            .order_by(FeedbackImage.feedback_id, FeedbackImage.position)
+        )
+        for image in await db.execute(images_stmt):
+            image_data = image._asdict()
+            items[image_data.pop("feedback_id")]["images"].append(image_data)
+
+        last = rows[-1]
+        return {
+            "items": list(items.values()),
+            "next_cursor": self._encode_cursor(last.created_at, last.id) if has_more else None,
+        }
+
+
+feedback = CRUDFeedback(Feedback)
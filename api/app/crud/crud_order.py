@@ -2,14 +2,16 @@
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import insert, func
 from sqlalchemy.orm import Session, selectinload, joinedload
-from typing import List, Optional
+from typing import Dict, List, NamedTuple, Optional, Tuple
 from fastapi import HTTPException, status
 from decimal import Decimal, ROUND_HALF_UP
 from loguru import logger
 from datetime import datetime
 
 from app.crud.base import CRUDBase
+from app.crud.crud_reservation import reservation as crud_reservation
 from app.models.order import Order, OrderItem
 from app.models.product import Product
 from app.models.user import User
@@ -18,10 +20,9 @@ from app.models.sale import Sale, SaleItem as SaleItemModel
 from app.models.payment import Payment
 # --- IMPORTAÇÕES NECESSÁRIAS PARA O CARREGAMENTO ---
 from app.models.category import ProductCategory
-from app.models.variation import ProductVariation
 # ---------------------------------------------------
 from app.schemas.enums import TableStatus, OrderStatus, OrderType
-from app.schemas.order import OrderCreate, OrderUpdate, OrderItemCreate, PartialPaymentRequest, OrderMerge, OrderTransfer
+from app.schemas.order import OrderCreate, OrderUpdate, OrderItemCreate, PartialPaymentRequest, OrderMerge, OrderTransfer, OrderMutationResult, OrderTotals, OrderItemCompact
 from app.services.cash_register_service import cash_register_service
 from app.services.crm_service import crm_service
 from app.services.stock_service import stock_service
@@ -44,6 +45,61 @@ async def get_full_order(db: AsyncSession, *, id: int) -> Optional[Order]:
     result = await db.execute(stmt)
     return result.scalars().first()
 
+class OrderChange(NamedTuple):
+    """ O que uma alteração de comanda mudou (para a resposta compacta). """
+    order_id: int
+    changed_item_ids: List[int] = []
+    removed_item_ids: List[int] = []
+    sale_id: Optional[int] = None
+
+
+async def get_order_summary(db: AsyncSession, *, change: OrderChange) -> Optional[OrderMutationResult]:
+    """
+    Resposta compacta de uma alteração: só as colunas dos itens alterados e os totais
+    calculados no banco (duas consultas, nenhum produto/categoria/variação carregado).
+    """
+    totals_stmt = (
+        select(
+            Order.id,
+            Order.status,
+            Order.version,
+            func.coalesce(func.sum(OrderItem.quantity), 0).label("items_quantity"),
+            func.coalesce(func.sum(OrderItem.quantity * OrderItem.price_at_order), 0.0).label("total_amount"),
+            func.coalesce(func.sum(OrderItem.paid_quantity * OrderItem.price_at_order), 0.0).label("paid_amount"),
+        )
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .where(Order.id == change.order_id)
+        .group_by(Order.id)
+    )
+    order_row = (await db.execute(totals_stmt)).first()
+    if order_row is None:
+        return None
+
+    items = []
+    if change.changed_item_ids:
+        items_stmt = select(
+            OrderItem.id, OrderItem.product_id, OrderItem.quantity, OrderItem.notes,
+            OrderItem.price_at_order, OrderItem.paid_quantity, OrderItem.status,
+        ).where(OrderItem.id.in_(change.changed_item_ids)).order_by(OrderItem.id)
+        items = [OrderItemCompact.model_validate(row) for row in (await db.execute(items_stmt)).all()]
+
+    total_amount = round(order_row.total_amount, 2)
+    paid_amount = round(order_row.paid_amount, 2)
+    return OrderMutationResult(
+        id=order_row.id,
+        status=order_row.status,
+        version=order_row.version,
+        items=items,
+        removed_item_ids=list(change.removed_item_ids),
+        totals=OrderTotals(
+            items_quantity=order_row.items_quantity,
+            total_amount=total_amount,
+            paid_amount=paid_amount,
+            pending_amount=round(total_amount - paid_amount, 2),
+        ),
+        sale_id=change.sale_id,
+    )
+
 def _run_sync_post_sale_services(db_session: Session, *, sale: Sale):
     """ Executa os serviços síncronos de forma segura e atômica. """
     sync_sale = db_session.merge(sale)
@@ -55,14 +111,44 @@ def _run_sync_post_sale_services(db_session: Session, *, sale: Sale):
 
 class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
 
-    async def process_partial_payment(self, db: AsyncSession, *, order_id: int, payment_request: PartialPaymentRequest, current_user: User) -> Order:
-        # ... (Mantenha a lógica de pagamento igual, ela chama get_full_order que já corrigimos) ...
+    async def lock_for_update(
+        self, db: AsyncSession, *, order_id: int, current_user: User, expected_version: Optional[int] = None
+    ) -> Order:
+        """
+        Busca a comanda com SELECT ... FOR UPDATE. Vários terminais na mesma mesa passam
+        a ser atendidos em fila: o segundo espera o commit do primeiro e lê os itens já atualizados.
+        O lock é liberado no commit/rollback da sessão.
+
+        `expected_version` é o controle otimista do cliente: se a comanda mudou desde a última
+        leitura dele, a alteração é recusada com 409 em vez de ser aplicada sobre dados velhos.
+        """
+        stmt = (
+            select(Order)
+            .where(Order.id == order_id, Order.store_id == current_user.store_id)
+            .with_for_update(of=Order)
+            # Sobrescreve o que já estiver na identity map com o estado lido sob o lock
+            .execution_options(populate_existing=True)
+        )
+        result = await db.execute(stmt)
+        order = result.scalars().first()
+        if not order:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comanda não encontrada.")
+        if expected_version is not None and order.version != expected_version:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"A comanda foi alterada por outro terminal (versão atual: {order.version}). Atualize e tente novamente."
+            )
+        return order
+
+    async def process_partial_payment(
+        self, db: AsyncSession, *, order_id: int, payment_request: PartialPaymentRequest, current_user: User,
+        expected_version: Optional[int] = None
+    ) -> OrderChange:
         logger.info(f"Iniciando pagamento para comanda ID: {order_id} pelo usuário ID: {current_user.id}")
         
-        order = await get_full_order(db, id=order_id)
+        # O lock impede que dois terminais cobrem a mesma quantidade pendente ao mesmo tempo
+        order = await self.lock_for_update(db, order_id=order_id, current_user=current_user, expected_version=expected_version)
         
-        if not order or order.store_id != current_user.store_id:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comanda não encontrada.")
         if order.status != OrderStatus.OPEN:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Esta comanda não está mais aberta.")
 
@@ -115,14 +201,21 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
         if all_items_paid:
             order.status = OrderStatus.PAID
             if order.table:
-                order.table.status = TableStatus.AVAILABLE
+                order.table.status = await crud_reservation.status_after_release(db, table_id=order.table.id)
                 db.add(order.table)
 
+        order.version += 1
+        db.add(order)
+
         await db.commit()
         await db.refresh(db_sale)
         await db.run_sync(_run_sync_post_sale_services, sale=db_sale)
         
-        return await get_full_order(db, id=order.id)
+        return OrderChange(
+            order_id=order.id,
+            changed_item_ids=[item.id for item in items_to_update_in_order],
+            sale_id=db_sale.id,
+        )
     
     async def get_open_order_by_table(self, db: AsyncSession, *, table_id: int, current_user: User) -> Optional[Order]:
         stmt = (
@@ -168,47 +261,76 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
         await db.refresh(order)
         return order
 
-    async def add_item_to_order(self, db: AsyncSession, *, order: Order, item_in: OrderItemCreate, current_user: User) -> Order:
-        # A lógica permanece a mesma, mas garantimos que o retorno (no endpoint) chame get_full_order
-        if order.status != OrderStatus.OPEN:
-            raise HTTPException(status_code=400, detail="A comanda não está aberta.")
+    @staticmethod
+    def _check_paid_quantity(item: OrderItem, new_quantity: int) -> None:
+        """
+        Regra única para alterar a quantidade de um item (soma negativa, edição ou remoção, que é
+        quantidade 0): nunca abaixo do que já foi pago, então item com unidades pagas não sai da comanda.
+        """
+        if new_quantity < item.paid_quantity:
+            raise HTTPException(status_code=400, detail="A quantidade não pode ser menor que a quantidade já paga.")
+
+    async def add_item_to_order(
+        self, db: AsyncSession, *, order: Order, item_in: OrderItemCreate, current_user: User,
+        expected_version: Optional[int] = None
+    ) -> OrderChange:
+        # O retorno final é tratado pelo endpoint (comanda completa ou resposta compacta)
         product = await db.get(Product, item_in.product_id)
         if not product or product.store_id != current_user.store_id:
             raise HTTPException(status_code=404, detail="Produto não encontrado.")
         
-        # Usa selectinload para garantir que items estejam carregados antes de iterar
-        stmt = select(Order).where(Order.id == order.id).options(selectinload(Order.items))
-        result = await db.execute(stmt)
-        order = result.scalars().first()
+        # Relê a comanda (e seus itens) sob lock: a soma de quantidade abaixo não pode
+        # partir de um valor que outro terminal já alterou
+        order = await self.lock_for_update(db, order_id=order.id, current_user=current_user, expected_version=expected_version)
+        if order.status != OrderStatus.OPEN:
+            raise HTTPException(status_code=400, detail="A comanda não está aberta.")
 
         existing_item = next((item for item in order.items if item.product_id == item_in.product_id and (item.notes or '') == (item_in.notes or '')), None)
+        changed_item = None
+        removed_item_ids = []
         
         if existing_item:
             new_quantity = existing_item.quantity + item_in.quantity
+            self._check_paid_quantity(existing_item, new_quantity)
             if new_quantity > 0:
                 existing_item.quantity = new_quantity
                 db.add(existing_item)
+                changed_item = existing_item
             else:
+                removed_item_ids.append(existing_item.id)
                 await db.delete(existing_item)
         elif item_in.quantity > 0:
-            new_item = OrderItem(order_id=order.id, product_id=item_in.product_id, quantity=item_in.quantity, price_at_order=product.price, notes=item_in.notes)
-            db.add(new_item)
+            changed_item = OrderItem(order_id=order.id, product_id=item_in.product_id, quantity=item_in.quantity, price_at_order=product.price, notes=item_in.notes)
+            db.add(changed_item)
         
+        order.version += 1
+        db.add(order)
         await db.commit()
-        # O retorno final é tratado pelo endpoint chamando get_full_order
-        return order 
+        return OrderChange(
+            order_id=order.id,
+            changed_item_ids=[changed_item.id] if changed_item is not None else [],
+            removed_item_ids=removed_item_ids,
+        )
     
-    async def cancel_order(self, db: AsyncSession, *, order: Order, current_user: User) -> Order:
+    async def _mark_cancelled(self, db: AsyncSession, *, order: Order, current_user: User) -> None:
+        """ Cancela a comanda (já travada pelo chamador) e libera a mesa. Não faz commit. """
         if order.status != OrderStatus.OPEN:
             raise HTTPException(status_code=400, detail="Apenas comandas abertas podem ser canceladas.")
         if order.table_id:
             table = await db.get(Table, order.table_id)
             if table and table.store_id == current_user.store_id:
-                table.status = TableStatus.AVAILABLE
+                table.status = await crud_reservation.status_after_release(db, table_id=table.id)
                 db.add(table)
         order.status = OrderStatus.CANCELLED
         order.closed_at = datetime.utcnow()
+        order.version += 1
         db.add(order)
+
+    async def cancel_order(
+        self, db: AsyncSession, *, order: Order, current_user: User, expected_version: Optional[int] = None
+    ) -> Order:
+        order = await self.lock_for_update(db, order_id=order.id, current_user=current_user, expected_version=expected_version)
+        await self._mark_cancelled(db, order=order, current_user=current_user)
         await db.commit()
         await db.refresh(order)
         return order
@@ -223,6 +345,82 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
         result = await db.execute(stmt)
         return result.scalars().first()
 
+    async def _bulk_add_items(
+        self, db: AsyncSession, *, order: Order, items_in: List[OrderItemCreate], current_user: User,
+        existing_items: List[OrderItem]
+    ) -> OrderChange:
+        """
+        Lança vários itens na comanda de uma vez (não faz commit):
+        - valida todos os produtos com UMA consulta;
+        - soma em memória as linhas repetidas (mesmo produto e mesma observação),
+          com a mesma regra de add_item_to_order para itens que já estão na comanda;
+        - insere todos os itens novos com UM único INSERT.
+        Retorna os itens alterados/criados e os removidos.
+        """
+        merged: Dict[Tuple[int, str], int] = {}
+        notes_by_key: Dict[Tuple[int, str], Optional[str]] = {}
+        for item_in in items_in:
+            key = (item_in.product_id, item_in.notes or '')
+            merged[key] = merged.get(key, 0) + item_in.quantity
+            notes_by_key.setdefault(key, item_in.notes)
+        if not merged:
+            return OrderChange(order_id=order.id)
+
+        product_ids = {product_id for product_id, _ in merged}
+        result = await db.execute(
+            select(Product.id, Product.price).where(Product.id.in_(product_ids), Product.store_id == current_user.store_id)
+        )
+        prices = {row.id: row.price for row in result}
+        missing = sorted(product_ids - prices.keys())
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Produto(s) não encontrado(s): {', '.join(map(str, missing))}.")
+
+        existing_by_key = {(item.product_id, item.notes or ''): item for item in existing_items}
+        changed_item_ids = []
+        removed_item_ids = []
+        new_rows = []
+        for key, quantity in merged.items():
+            existing_item = existing_by_key.get(key)
+            if existing_item:
+                new_quantity = existing_item.quantity + quantity
+                self._check_paid_quantity(existing_item, new_quantity)
+                if new_quantity > 0:
+                    existing_item.quantity = new_quantity
+                    db.add(existing_item)
+                    changed_item_ids.append(existing_item.id)
+                else:
+                    removed_item_ids.append(existing_item.id)
+                    await db.delete(existing_item)
+            elif quantity > 0:
+                product_id, _ = key
+                new_rows.append({
+                    "order_id": order.id,
+                    "product_id": product_id,
+                    "quantity": quantity,
+                    "price_at_order": prices[product_id],
+                    "notes": notes_by_key[key],
+                })
+
+        if new_rows:
+            result = await db.execute(insert(OrderItem).returning(OrderItem.id), new_rows)
+            changed_item_ids.extend(result.scalars().all())
+        return OrderChange(order_id=order.id, changed_item_ids=changed_item_ids, removed_item_ids=removed_item_ids)
+
+    async def add_items_to_order(
+        self, db: AsyncSession, *, order_id: int, items_in: List[OrderItemCreate], current_user: User,
+        expected_version: Optional[int] = None
+    ) -> OrderChange:
+        """ Lança vários itens numa comanda aberta com um único lock, um INSERT e um commit. """
+        order = await self.lock_for_update(db, order_id=order_id, current_user=current_user, expected_version=expected_version)
+        if order.status != OrderStatus.OPEN:
+            raise HTTPException(status_code=400, detail="A comanda não está aberta.")
+
+        change = await self._bulk_add_items(db, order=order, items_in=items_in, current_user=current_user, existing_items=order.items)
+        order.version += 1
+        db.add(order)
+        await db.commit()
+        return change
+
     async def create(self, db: AsyncSession, *, obj_in: OrderCreate, current_user: User) -> Order:
         if obj_in.order_type == OrderType.DINE_IN:
             if not obj_in.table_id:
@@ -234,9 +432,16 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
                 raise HTTPException(status_code=400, detail="A mesa já está ocupada.")
             table.status = TableStatus.OCCUPIED
             db.add(table)
-        order_data = obj_in.model_dump()
+        order_data = obj_in.model_dump(exclude={"items"})
         db_order = Order(**order_data, user_id=current_user.id, store_id=current_user.store_id, status=OrderStatus.OPEN)
         db.add(db_order)
+
+        # Itens enviados junto com a comanda (ex.: delivery) entram na mesma transação:
+        # um INSERT para todos e um único commit, em vez de um commit por item
+        if obj_in.items:
+            await db.flush()
+            await self._bulk_add_items(db, order=db_order, items_in=obj_in.items, current_user=current_user, existing_items=[])
+
         await db.commit()
         await db.refresh(db_order)
         # Retorno é feito pelo endpoint usando get_full_order
@@ -250,7 +455,7 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
             raise HTTPException(status_code=400, detail="Mesa de destino não está livre.")
         
         if source_order.table:
-            source_order.table.status = TableStatus.AVAILABLE
+            source_order.table.status = await crud_reservation.status_after_release(db, table_id=source_order.table.id)
             db.add(source_order.table)
             
         target_table.status = TableStatus.OCCUPIED
@@ -262,42 +467,92 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
         await db.refresh(source_order)
         return source_order
 
-    async def merge_orders(self, db: AsyncSession, *, target_order: Order, source_order_id: int, current_user: User) -> Order:
-        source_order = await get_full_order(db, id=source_order_id)
-        if not source_order or source_order.store_id != current_user.store_id:
-            raise HTTPException(status_code=404, detail="Comanda de origem não encontrada.")
+    async def merge_orders(
+        self, db: AsyncSession, *, target_order: Order, source_order_id: int, current_user: User,
+        expected_version: Optional[int] = None
+    ) -> Order:
+        if source_order_id == target_order.id:
+            raise HTTPException(status_code=400, detail="Não é possível juntar uma comanda com ela mesma.")
+
+        # Trava as duas comandas sempre na mesma ordem (menor ID primeiro) para evitar deadlock
+        # quando dois terminais juntam as mesmas comandas em sentidos opostos.
+        locked = {}
+        for order_id in sorted((target_order.id, source_order_id)):
+            try:
+                locked[order_id] = await self.lock_for_update(
+                    db, order_id=order_id, current_user=current_user,
+                    expected_version=expected_version if order_id == target_order.id else None
+                )
+            except HTTPException as e:
+                if e.status_code == status.HTTP_404_NOT_FOUND and order_id == source_order_id:
+                    raise HTTPException(status_code=404, detail="Comanda de origem não encontrada.")
+                raise
+        target_order, source_order = locked[target_order.id], locked[source_order_id]
 
-        for item in source_order.items:
+        if target_order.status != OrderStatus.OPEN:
+            raise HTTPException(status_code=400, detail="A comanda de destino não está aberta.")
+
+        for item in list(source_order.items):
             item.order_id = target_order.id
             db.add(item)
             
-        await self.cancel_order(db, order=source_order, current_user=current_user)
+        await self._mark_cancelled(db, order=source_order, current_user=current_user)
+        target_order.version += 1
+        db.add(target_order)
         
+        target_order_id = target_order.id
         await db.commit()
-        return await get_full_order(db, id=target_order.id)
+        db.expire_all()
+        return await get_full_order(db, id=target_order_id)
 
-    async def get_kitchen_orders(self, db: AsyncSession, *, current_user: User) -> List[Order]:
+    async def get_kitchen_board(self, db: AsyncSession, *, current_user: User) -> List[dict]:
+        """
+        Comandas abertas para o painel da cozinha como dicionários planos (formato KitchenOrder),
+        numa única consulta de colunas: comanda + mesa + itens + nome do produto.
+        """
         stmt = (
-            select(Order)
+            select(
+                Order.id, Order.order_type, Order.status, Order.created_at, Order.table_id,
+                Table.number.label("table_number"),
+                OrderItem.id.label("item_id"), OrderItem.product_id, OrderItem.quantity,
+                OrderItem.notes, OrderItem.status.label("item_status"),
+                Product.name.label("product_name"),
+            )
+            .outerjoin(Table, Table.id == Order.table_id)
+            .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+            .outerjoin(Product, Product.id == OrderItem.product_id)
             .where(
                 Order.store_id == current_user.store_id,
                 Order.status == OrderStatus.OPEN
             )
-            .options(
-                selectinload(Order.table),
-                selectinload(Order.user),
-                selectinload(Order.items).joinedload(OrderItem.product).options(
-                    # Carregamento profundo aqui também
-                    joinedload(Product.category).selectinload(ProductCategory.subcategories),
-                    joinedload(Product.subcategory),
-                    joinedload(Product.supplier),
-                    selectinload(Product.variations).selectinload(ProductVariation.options) 
-                )
-            )
-            .order_by(Order.created_at)
+            .order_by(Order.created_at, Order.id, OrderItem.id)
         )
-        result = await db.execute(stmt)
-        return result.scalars().all()
+        orders: Dict[int, dict] = {}
+        for row in await db.execute(stmt):
+            order = orders.get(row.id)
+            if order is None:
+                order = orders[row.id] = {
+                    "id": row.id,
+                    "order_type": row.order_type,
+                    "status": row.status,
+                    "created_at": row.created_at,
+                    "table_id": row.table_id,
+                    "table": {"id": row.table_id, "number": row.table_number} if row.table_id else None,
+                    "items": [],
+                }
+            if row.item_id is not None:
+                order["items"].append({
+                    "id": row.item_id,
+                    "product_id": row.product_id,
+                    "quantity": row.quantity,
+                    "notes": row.notes,
+                    "status": row.item_status,
+                    "product": (
+                        {"id": row.product_id, "name": row.product_name}
+                        if row.product_name is not None else None
+                    ),
+                })
+        return list(orders.values())
 
     async def update_order_item_status(self, db: AsyncSession, *, item_id: int, new_status: str, current_user: User) -> Optional[OrderItem]:
         stmt = (
@@ -355,33 +610,39 @@ class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
     
     # --- MÉTODOS PARA ATUALIZAR/REMOVER ITENS DO POS ---
     async def update_item_quantity(
-        self, db: AsyncSession, *, order_id: int, item_id: int, quantity: int, current_user: User
-    ) -> Order:
-        stmt = select(OrderItem).where(OrderItem.id == item_id, OrderItem.order_id == order_id)
-        result = await db.execute(stmt)
-        item = result.scalars().first()
+        self, db: AsyncSession, *, order_id: int, item_id: int, quantity: int, current_user: User,
+        expected_version: Optional[int] = None
+    ) -> OrderChange:
+        order = await self.lock_for_update(db, order_id=order_id, current_user=current_user, expected_version=expected_version)
+        item = next((i for i in order.items if i.id == item_id), None)
         
         if not item:
             raise HTTPException(status_code=404, detail="Item não encontrado neste pedido.")
+        self._check_paid_quantity(item, quantity)
 
         item.quantity = quantity
+        order.version += 1
         db.add(item)
+        db.add(order)
         await db.commit()
         
-        return await get_full_order(db, id=order_id)
+        return OrderChange(order_id=order_id, changed_item_ids=[item_id])
 
     async def remove_item_from_order(
-        self, db: AsyncSession, *, order_id: int, item_id: int, current_user: User
-    ) -> Order:
-        stmt = select(OrderItem).where(OrderItem.id == item_id, OrderItem.order_id == order_id)
-        result = await db.execute(stmt)
-        item = result.scalars().first()
+        self, db: AsyncSession, *, order_id: int, item_id: int, current_user: User,
+        expected_version: Optional[int] = None
+    ) -> OrderChange:
+        order = await self.lock_for_update(db, order_id=order_id, current_user=current_user, expected_version=expected_version)
+        item = next((i for i in order.items if i.id == item_id), None)
         
         if not item:
             raise HTTPException(status_code=404, detail="Item não encontrado.")
-            
+        self._check_paid_quantity(item, 0)
+
         await db.delete(item)
+        order.version += 1
+        db.add(order)
         await db.commit()
         
-        return await get_full_order(db, id=order_id)
+        return OrderChange(order_id=order_id, removed_item_ids=[item_id])
 order = CRUDOrder(Order)
\ No newline at end of file
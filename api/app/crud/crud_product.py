@@ -2,12 +2,13 @@
 from sqlalchemy.orm import Session, selectinload, joinedload
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import or_
-from typing import List, Any, Dict, Union, Optional
+from sqlalchemy import or_, exists
+from typing import List, Any, Dict, Union, Optional, Tuple
 from app.models.user import User as UserModel
 
 from app.crud.base import CRUDBase
 from app.models.product import Product
+from app.models.variation import ProductVariation
 # --- IMPORTAÇÃO NECESSÁRIA PARA O CARREGAMENTO ANINHADO ---
 from app.models.category import ProductCategory 
 # ----------------------------------------------------------
@@ -21,7 +22,7 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
             select(Product)
             .where(Product.id == product_id)
             .options(
-                selectinload(Product.variations),
+                selectinload(Product.variations).selectinload(ProductVariation.options),
                 # --- CORREÇÃO: Carrega Categoria E suas Subcategorias ---
                 selectinload(Product.category).selectinload(ProductCategory.subcategories),
                 # --------------------------------------------------------
@@ -55,7 +56,7 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
             select(self.model)
             .where(self.model.store_id == current_user.store_id if current_user.role != 'super_admin' else True)
             .options(
-                selectinload(self.model.variations),
+                selectinload(self.model.variations).selectinload(ProductVariation.options),
                 # --- CORREÇÃO: Carrega Categoria E suas Subcategorias ---
                 selectinload(self.model.category).selectinload(ProductCategory.subcategories),
                 # --------------------------------------------------------
@@ -82,6 +83,56 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
         result = await db.execute(statement)
         return result.scalars().all()
 
+    async def lookup(
+        self, db: AsyncSession, *, q: str, limit: int = 10, current_user: UserModel
+    ) -> List[dict]:
+        """
+        Busca rápida do PDV (mesmo filtro do get_multi) devolvendo só as colunas usadas no
+        caixa, como dicionários planos (formato ProductLookup). Uma consulta, sem relacionamentos.
+        """
+        has_variations = exists().where(ProductVariation.product_id == Product.id).label("has_variations")
+        statement = (
+            select(
+                Product.id, Product.name, Product.price, Product.stock, Product.low_stock_threshold,
+                Product.image_url, Product.barcode, Product.category_id, Product.product_type,
+                Product.send_to_kitchen, has_variations,
+            )
+            .where(Product.store_id == current_user.store_id if current_user.role != 'super_admin' else True)
+            .where(
+                or_(
+                    Product.name.ilike(f"%{q}%"),
+                    Product.barcode.ilike(f"{q}%")
+                )
+            )
+            .order_by(Product.name)
+            .limit(limit)
+        )
+        result = await db.execute(statement)
+        return [dict(row) for row in result.mappings()]
+
+    async def get_by_barcode(
+        self, db: AsyncSession, *, barcode: str, current_user: UserModel
+    ) -> Optional[Tuple[Product, Optional[ProductVariation]]]:
+        """
+        Resolve um código de barras lido no PDV. Primeiro procura a variação (SKU) e depois o produto,
+        sempre por igualdade nos índices únicos de `barcode` (no máximo duas buscas pontuais).
+        """
+        stmt = (
+            select(ProductVariation)
+            .join(Product, Product.id == ProductVariation.product_id)
+            .where(ProductVariation.barcode == barcode, Product.store_id == current_user.store_id)
+            .options(selectinload(ProductVariation.options))
+        )
+        variation = (await db.execute(stmt)).scalars().first()
+        if variation:
+            return await self._get_product_with_relations(db, variation.product_id), variation
+
+        stmt = select(Product.id).where(Product.barcode == barcode, Product.store_id == current_user.store_id)
+        product_id = (await db.execute(stmt)).scalar_one_or_none()
+        if product_id is None:
+            return None
+        return await self._get_product_with_relations(db, product_id), None
+
     async def create(self, db: AsyncSession, *, obj_in: ProductCreate, current_user: UserModel) -> Product:
         product_data = obj_in.model_dump()
         expiration_date = product_data.pop("expiration_date", None)
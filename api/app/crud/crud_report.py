@@ -13,7 +13,8 @@ from app.models.category import ProductCategory # Adicionado ProductCategory
 # Schemas são usados para tipagem de retorno, mas a lógica está aqui
 from app.schemas.report import (
     SalesByPeriod, TopSellingProduct, SalesByUser, SalesEvolutionItem,
-    SalesByPaymentMethodItem, SalesByHourItem, SalesByCategoryItem # Adicionados
+    SalesByPaymentMethodItem, SalesByHourItem, SalesByCategoryItem, # Adicionados
+    LowStockProductItem
 )
 
 async def get_top_selling_products_by_period(
@@ -222,6 +223,28 @@ async def get_sales_by_category(db: AsyncSession, start_date: date, end_date: da
 
 # --- FIM DAS NOVAS FUNÇÕES ---
 
-# TODO: Implementar get_low_stock_products, get_top_customers, get_inactive_customers
+async def get_low_stock_products(db: AsyncSession, store_id: int) -> List[LowStockProductItem]:
+    """
+    Produtos da loja com estoque no limite mínimo ou abaixo dele.
+    O filtro repete exatamente o predicado do índice parcial `ix_products_low_stock`,
+    então o Postgres lê só as entradas do índice em vez de varrer todos os produtos.
+    """
+    stmt = (
+        select(
+            Product.id.label("product_id"),
+            Product.name.label("product_name"),
+            Product.stock.label("current_stock"),
+            Product.low_stock_threshold
+        )
+        .where(
+            Product.store_id == store_id,
+            Product.stock <= Product.low_stock_threshold
+        )
+        .order_by(Product.stock, Product.name)
+    )
+    result = await db.execute(stmt)
+    return [LowStockProductItem(**row._mapping) for row in result]
+
+# TODO: Implementar get_top_customers, get_inactive_customers
 # Essas funções podem depender de como você define "top" ou "inativo" e podem
 # precisar de lógica adicional nos models ou schemas.
\ No newline at end of file
@@ -2,11 +2,15 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import delete, update, exists, func, literal_column, or_
+from typing import List, Optional, Tuple
 from datetime import datetime, timezone, timedelta
 
 from fastapi import HTTPException, status
+from loguru import logger
 
+from app.core.config import settings
 from app.crud.base import CRUDBase
 from app.models.reservation import Reservation
 from app.models.user import User
@@ -14,73 +18,179 @@ from app.models.table import Table
 from app.schemas.enums import TableStatus
 from app.schemas.reservation import ReservationCreate, ReservationUpdate
 
+# Mesmas expressões do ExcludeConstraint do modelo: assim as consultas usam o índice GiST
+def _table_key(table_id):
+    return func.int4range(table_id, table_id, literal_column("'[]'"))
+
+def _period(start, end):
+    return func.tstzrange(start, end, literal_column("'[)'"))
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+def _start_of_day(now: datetime) -> datetime:
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _end_of_day(now: datetime) -> datetime:
+    return now.replace(hour=23, minute=59, second=59)
+
+
 class CRUDReservation(CRUDBase[Reservation, ReservationCreate, ReservationUpdate]):
 
-    async def cleanup_expired_reservations(self, db: AsyncSession, current_user: User):
+    async def expire_finished(
+        self, db: AsyncSession, *, now: Optional[datetime] = None, store_id: Optional[int] = None
+    ) -> int:
         """
-        Verifica reservas passadas, libera as mesas e exclui os registros.
+        Apaga, numa única instrução, as reservas cujo período já terminou (da loja ou de todas) e
+        libera as mesas que estavam RESERVADAS por elas e não têm outra reserva no resto do dia.
+        Rodada pelo agendador (ver app.services.reservation_service), nunca numa leitura.
+        Retorna quantas reservas expiraram.
         """
-        now = datetime.now(timezone.utc)
-        
-        stmt = select(self.model).where(
-            self.model.store_id == current_user.store_id,
-            self.model.reservation_time < now
-        ).options(selectinload(self.model.table))
-        
+        now = now or datetime.now(timezone.utc)
+        expired_filter = [Reservation.end_time <= now]
+        if store_id is not None:
+            expired_filter.append(Reservation.store_id == store_id)
+        expired = (
+            delete(Reservation)
+            .where(*expired_filter)
+            .returning(Reservation.table_id)
+            .cte("expired")
+        )
+        # O subselect não enxerga o DELETE do CTE (mesmo snapshot): por isso o filtro end_time > now
+        still_reserved_today = exists().where(
+            _table_key(Reservation.table_id).op("&&")(_table_key(Table.id)),
+            Reservation.end_time > now,
+            Reservation.reservation_time <= _end_of_day(now),
+        )
+        freed = (
+            update(Table)
+            .where(
+                Table.id.in_(select(expired.c.table_id)),
+                Table.status == TableStatus.RESERVED,
+                ~still_reserved_today,
+            )
+            .values(status=TableStatus.AVAILABLE)
+            .returning(Table.id)
+            .cte("freed")
+        )
+        stmt = select(
+            select(func.count()).select_from(expired).scalar_subquery(),
+            select(func.count()).select_from(freed).scalar_subquery(),
+        )
+        expired_count, freed_count = (await db.execute(stmt)).one()
+        await db.commit()
+        if expired_count:
+            logger.info(f"{expired_count} reserva(s) expirada(s), {freed_count} mesa(s) liberada(s).")
+        return expired_count
+
+    async def get_free_tables(
+        self,
+        db: AsyncSession,
+        *,
+        start: datetime,
+        end: datetime,
+        party_size: int,
+        current_user: User
+    ) -> List[dict]:
+        """
+        Mesas da loja que comportam `party_size` pessoas e não têm reserva sobreposta a [start, end),
+        numa única consulta (anti-join pelo índice GiST). As menores mesas que servem vêm primeiro.
+        Se o período começa agora (dentro da duração padrão), mesas ocupadas também ficam de fora.
+        """
+        start, end = _as_utc(start), _as_utc(end)
+        overlapping = exists().where(
+            _table_key(Reservation.table_id).op("&&")(_table_key(Table.id)),
+            _period(Reservation.reservation_time, Reservation.end_time).op("&&")(_period(start, end)),
+        )
+        stmt = (
+            select(
+                Table.id, Table.number, Table.capacity, Table.shape, Table.status,
+                Table.pos_x, Table.pos_y, Table.rotation, Table.store_id,
+            )
+            .where(
+                Table.store_id == current_user.store_id,
+                Table.capacity >= party_size,
+                ~overlapping,
+            )
+            .order_by(Table.capacity, Table.number)
+        )
+        if start < datetime.now(timezone.utc) + timedelta(minutes=settings.RESERVATION_DURATION_MINUTES):
+            stmt = stmt.where(Table.status != TableStatus.OCCUPIED)
         result = await db.execute(stmt)
-        expired_reservations = result.scalars().all()
-
-        for reservation in expired_reservations:
-            if reservation.table and reservation.table.status == TableStatus.RESERVED:
-                reservation.table.status = TableStatus.AVAILABLE
-                db.add(reservation.table)
-            
-            await db.delete(reservation)
-        
-        if expired_reservations:
-            await db.commit()
+        return [dict(row) for row in result.mappings()]
 
-    # --- NOVA FUNÇÃO: Ativa reservas do dia ---
-    async def ensure_todays_reservations_are_active(self, db: AsyncSession, current_user: User):
+    async def activate_todays_reservations(
+        self, db: AsyncSession, *, now: Optional[datetime] = None, store_id: Optional[int] = None
+    ) -> int:
         """
-        Verifica se existem reservas para HOJE em mesas que ainda estão como 'DISPONÍVEL'.
-        Se houver, muda o status da mesa para 'RESERVADA'.
+        Marca como RESERVADAS as mesas DISPONÍVEIS que têm reserva ainda válida para hoje
+        (um único UPDATE, da loja ou de todas). Rodada pelo agendador, nunca numa leitura.
+        Retorna quantas mesas mudaram de status.
+        """
+        now = now or datetime.now(timezone.utc)
+        todays_reservation = exists().where(
+            _table_key(Reservation.table_id).op("&&")(_table_key(Table.id)),
+            Reservation.end_time > now,
+            Reservation.reservation_time <= _end_of_day(now),
+        )
+        stmt = (
+            update(Table)
+            .where(Table.status == TableStatus.AVAILABLE, todays_reservation)
+            .values(status=TableStatus.RESERVED)
+        )
+        if store_id is not None:
+            stmt = stmt.where(Table.store_id == store_id)
+        result = await db.execute(stmt)
+        await db.commit()
+        return result.rowcount
+
+    async def status_after_release(
+        self, db: AsyncSession, *, table_id: int, exclude_id: Optional[int] = None
+    ) -> TableStatus:
+        """
+        Status de uma mesa que acaba de ser liberada (comanda paga, cancelada ou transferida,
+        reserva apagada): volta a RESERVADA se ainda tem reserva válida para hoje. O agendador só
+        ativa na virada do dia, então quem libera a mesa no meio do dia decide aqui.
         """
         now = datetime.now(timezone.utc)
-        end_of_day = now.replace(hour=23, minute=59, second=59)
-        
-        # Busca reservas de hoje (do momento atual até o fim do dia)
-        stmt = select(self.model).where(
-            self.model.store_id == current_user.store_id,
-            self.model.reservation_time >= now,
-            self.model.reservation_time <= end_of_day
-        ).options(selectinload(self.model.table))
-        
+        filters = [
+            _table_key(Reservation.table_id).op("&&")(_table_key(table_id)),
+            Reservation.end_time > now,
+            Reservation.reservation_time <= _end_of_day(now),
+        ]
+        if exclude_id is not None:
+            filters.append(Reservation.id != exclude_id)
+        reserved_today = await db.scalar(select(exists().where(*filters)))
+        return TableStatus.RESERVED if reserved_today else TableStatus.AVAILABLE
+
+    async def get_upcoming_transitions(
+        self, db: AsyncSession, *, now: datetime, until: datetime
+    ) -> List[Tuple[int, datetime, datetime]]:
+        """
+        (store_id, reservation_time, end_time) das reservas ainda válidas cuja ativação
+        (virada do dia) ou expiração cai até `until`. Base do heap do agendador.
+        """
+        stmt = select(Reservation.store_id, Reservation.reservation_time, Reservation.end_time).where(
+            Reservation.end_time > now,
+            or_(
+                Reservation.end_time <= until,
+                Reservation.reservation_time < _start_of_day(until) + timedelta(days=1),
+            ),
+        )
         result = await db.execute(stmt)
-        todays_reservations = result.scalars().all()
-        
-        updated = False
-        for reservation in todays_reservations:
-            if reservation.table and reservation.table.status == TableStatus.AVAILABLE:
-                reservation.table.status = TableStatus.RESERVED
-                db.add(reservation.table)
-                updated = True
-        
-        if updated:
-            await db.commit()
-    # ------------------------------------------
+        return [tuple(row) for row in result.all()]
 
     async def get_reservations_by_date_range(
         self, db: AsyncSession, *, start_date: datetime, end_date: datetime, current_user: User
     ) -> List[Reservation]:
-        await self.cleanup_expired_reservations(db, current_user)
-
+        """ Só leitura: as reservas vencidas são apagadas pela tarefa periódica, não aqui. """
         stmt = (
             select(self.model)
             .where(
                 self.model.store_id == current_user.store_id,
                 self.model.reservation_time >= start_date,
                 self.model.reservation_time <= end_date,
+                self.model.end_time > datetime.now(timezone.utc),
             )
             .options(selectinload(self.model.table))
             .order_by(self.model.reservation_time)
@@ -89,11 +199,10 @@ class CRUDReservation(CRUDBase[Reservation, ReservationCreate, ReservationUpdate
         return result.scalars().all()
 
     async def create(self, db: AsyncSession, *, obj_in: ReservationCreate, current_user: User) -> Reservation:
-        res_time = obj_in.reservation_time
-        if res_time.tzinfo is None:
-            res_time = res_time.replace(tzinfo=timezone.utc)
-        
-        if res_time < datetime.now(timezone.utc):
+        res_time = _as_utc(obj_in.reservation_time)
+        now = datetime.now(timezone.utc)
+
+        if res_time < now:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Não é possível criar reservas para datas ou horários passados."
@@ -106,28 +215,39 @@ class CRUDReservation(CRUDBase[Reservation, ReservationCreate, ReservationUpdate
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Mesa não encontrada ou não pertence a esta loja."
             )
+        if obj_in.number_of_people > table.capacity:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"A mesa {table.number} comporta no máximo {table.capacity} pessoas."
+            )
 
-        # --- LÓGICA MODIFICADA ---
-        # Verifica se a reserva é para "hoje"
-        is_today = res_time.date() == datetime.now(timezone.utc).date()
+        duration = timedelta(minutes=obj_in.duration_minutes or settings.RESERVATION_DURATION_MINUTES)
+        reservation_data = obj_in.model_dump(exclude={"duration_minutes"})
+        reservation_data.update(
+            reservation_time=res_time,
+            end_time=res_time + duration,
+            store_id=current_user.store_id,
+        )
 
-        if is_today:
-            # Se for para hoje, a mesa PRECISA estar livre agora
-            if table.status != TableStatus.AVAILABLE:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"A mesa {table.number} não está disponível para reserva HOJE (Status: {table.status})."
-                )
-            # Bloqueia a mesa imediatamente
+        # Reserva de hoje numa mesa livre: a mesa já aparece como RESERVADA no salão.
+        # Conflito de horário com outra reserva é barrado pelo ExcludeConstraint (409 abaixo).
+        if res_time <= _end_of_day(now) and table.status == TableStatus.AVAILABLE:
             table.status = TableStatus.RESERVED
             db.add(table)
-        else:
-            # Se for para data futura, permitimos criar mesmo que a mesa esteja ocupada AGORA (por outro cliente),
-            # e NÃO mudamos o status da mesa para RESERVED ainda.
-            pass
-        # -------------------------
 
-        db_obj = await super().create(db=db, obj_in=obj_in, current_user=current_user)
+        table_number = table.number  # após o rollback os atributos da mesa expiram
+        db_obj = self.model(**reservation_data)
+        db.add(db_obj)
+        try:
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            if "ex_reservations_table_period" in str(e.orig):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"A mesa {table_number} já tem uma reserva nesse horário."
+                )
+            raise
         await db.refresh(db_obj, attribute_names=["table"])
 
         return db_obj
@@ -142,10 +262,13 @@ class CRUDReservation(CRUDBase[Reservation, ReservationCreate, ReservationUpdate
                 return None
 
             if db_obj.table:
-                # Só libera a mesa se o status for RESERVED. 
+                # Só libera a mesa se o status for RESERVED.
                 # Se estiver OCCUPIED (cliente chegou), não mexe.
+                # Outra reserva da mesa no mesmo dia a mantém RESERVADA.
                 if db_obj.table.status == TableStatus.RESERVED:
-                    db_obj.table.status = TableStatus.AVAILABLE
+                    db_obj.table.status = await self.status_after_release(
+                        db, table_id=db_obj.table_id, exclude_id=db_obj.id
+                    )
                     db.add(db_obj.table)
 
             await db.delete(db_obj)
@@ -153,4 +276,4 @@ class CRUDReservation(CRUDBase[Reservation, ReservationCreate, ReservationUpdate
 
         return db_obj
 
-reservation = CRUDReservation(Reservation)
\ No newline at end of file
+reservation = CRUDReservation(Reservation)
@@ -2,8 +2,11 @@
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import insert, update, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session, selectinload, joinedload
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from fastapi import HTTPException, status
 from decimal import Decimal, ROUND_HALF_UP
 from loguru import logger
@@ -12,17 +15,20 @@ from app.crud.base import CRUDBase
 from app.models.sale import Sale, SaleItem as SaleItemModel
 from app.models.payment import Payment
 from app.models.product import Product
+from app.models.variation import ProductVariation
 from app.models.user import User
 # --- IMPORTAÇÕES NOVAS ---
 from app.models.order import Order # Para fechar o pedido
 from app.schemas.enums import OrderStatus # Para o status CLOSED
 # -------------------------
 from app.models.category import ProductCategory
-from app.schemas.sale import SaleCreate, SaleUpdate
+from app.models.customer import Customer
+from app.schemas.enums import SaleSyncStatus
+from app.schemas.sale import SaleCreate, SaleUpdate, SaleSyncEntry, SaleSyncResult
 
 from app.services.crm_service import crm_service
 from app.services.stock_service import stock_service
-from app.services.cash_register_service import cash_register_service
+from app.services.cash_register_service import cash_register_service, payment_method_value
 
 
 async def get_full_sale(db: AsyncSession, *, id: int) -> Optional[Sale]:
@@ -52,6 +58,48 @@ def _run_sync_post_sale_services(db_session: Session, *, sale: Sale):
     db_session.commit()
 
 
+def _run_sync_post_sales_batch(
+    db_session: Session,
+    *,
+    store_id: int,
+    user_id: int,
+    payments: List[Tuple[int, object]],
+    customer_totals: List[Tuple[Optional[int], float]],
+    stock_lines: List[Tuple[int, int, Optional[int], int]],
+):
+    """
+    Serviços pós-venda de um lote inteiro de vendas, cada um com um número fixo de comandos
+    (independente do tamanho do lote). Não faz commit: roda na transação que gravou as vendas.
+    """
+    cash_register_service.add_sales_transactions(db_session, store_id=store_id, payments=payments)
+    crm_service.update_customer_stats_from_sales(db_session, sales=customer_totals)
+    stock_service.deduct_stock_from_sales(db_session, store_id=store_id, user_id=user_id, lines=stock_lines)
+
+
+def _sale_total(items_data: List[dict], payments_data: List[dict]) -> float:
+    """ Valida itens e pagamentos e devolve o total da venda (calculado pelos itens, nunca pelo cliente). """
+    if not items_data or not payments_data:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="A venda deve conter itens e pagamento.")
+
+    total_amount = sum(Decimal(str(item['price_at_sale'])) * Decimal(item['quantity']) for item in items_data)
+    total_amount = float(total_amount.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+
+    total_paid = sum(p['amount'] for p in payments_data)
+    # Pequena margem de erro para floats
+    if total_paid < (total_amount - 0.05): 
+         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Valor pago insuficiente.")
+    return total_amount
+
+
+def _client_timestamp(value: Optional[datetime]):
+    """ Horário informado pelo terminal, no mesmo formato (sem fuso) das colunas; sem ele, a hora do banco. """
+    if value is None:
+        return func.now()
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
 class CRUDSale(CRUDBase[Sale, SaleCreate, SaleUpdate]):
     
     async def get_multi_detailed(
@@ -78,7 +126,84 @@ class CRUDSale(CRUDBase[Sale, SaleCreate, SaleUpdate]):
         result = await db.execute(stmt)
         return result.scalars().all()
 
-    async def create_with_items(self, db: AsyncSession, *, obj_in: SaleCreate, current_user: User) -> Sale:
+    async def get_history(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100, current_user: User
+    ) -> List[dict]:
+        """
+        Histórico de vendas como dicionários planos (formato SaleHistoryEntry), em três
+        consultas só de colunas: vendas (+ usuário/cliente), itens (+ produto) e pagamentos.
+        Nada de ORM carregado: categoria, subcategorias e variações não entram no histórico.
+        """
+        sales_rows = (await db.execute(
+            select(
+                Sale.id, Sale.created_at, Sale.total_amount, Sale.payment_method,
+                Sale.user_id, Sale.customer_id,
+                User.full_name.label("user_name"),
+                Customer.full_name.label("customer_name"),
+            )
+            .join(User, User.id == Sale.user_id)
+            .outerjoin(Customer, Customer.id == Sale.customer_id)
+            .where(Sale.store_id == current_user.store_id)
+            .order_by(Sale.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+        )).all()
+        if not sales_rows:
+            return []
+
+        sales: Dict[int, dict] = {}
+        for row in sales_rows:
+            sales[row.id] = {
+                "id": row.id,
+                "created_at": row.created_at,
+                "total_amount": row.total_amount,
+                "payment_method": row.payment_method,
+                "user_id": row.user_id,
+                "customer_id": row.customer_id,
+                "user": {"id": row.user_id, "full_name": row.user_name},
+                "customer": {"id": row.customer_id, "full_name": row.customer_name} if row.customer_id else None,
+                "items": [],
+                "payments": [],
+            }
+
+        item_rows = await db.execute(
+            select(
+                SaleItemModel.id, SaleItemModel.sale_id, SaleItemModel.product_id, SaleItemModel.variation_id,
+                SaleItemModel.quantity, SaleItemModel.price_at_sale,
+                Product.name.label("product_name"), Product.image_url,
+            )
+            .outerjoin(Product, Product.id == SaleItemModel.product_id)
+            .where(SaleItemModel.sale_id.in_(sales.keys()))
+            .order_by(SaleItemModel.id)
+        )
+        for row in item_rows:
+            sales[row.sale_id]["items"].append({
+                "id": row.id,
+                "product_id": row.product_id,
+                "variation_id": row.variation_id,
+                "quantity": row.quantity,
+                "price_at_sale": row.price_at_sale,
+                "product": (
+                    {"id": row.product_id, "name": row.product_name, "image_url": row.image_url}
+                    if row.product_name is not None else None
+                ),
+            })
+
+        payment_rows = await db.execute(
+            select(Payment.id, Payment.sale_id, Payment.payment_method, Payment.amount)
+            .where(Payment.sale_id.in_(sales.keys()))
+            .order_by(Payment.id)
+        )
+        for row in payment_rows:
+            sales[row.sale_id]["payments"].append(
+                {"id": row.id, "payment_method": row.payment_method, "amount": row.amount}
+            )
+
+        return list(sales.values())
+
+    async def create_with_items(
+        self, db: AsyncSession, *, obj_in: SaleCreate, current_user: User, idempotency_key: Optional[str] = None
+    ) -> Sale:
         sale_data = obj_in.model_dump()
         items_data = sale_data.pop("items", [])
         payments_data = sale_data.pop("payments", [])
@@ -87,16 +212,26 @@ class CRUDSale(CRUDBase[Sale, SaleCreate, SaleUpdate]):
         order_id = sale_data.pop("order_id", None) # Extrai o ID do pedido
         # --------------------------------------
 
-        if not items_data or not payments_data:
-            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="A venda deve conter itens e pagamento.")
+        total_amount = _sale_total(items_data, payments_data)
 
-        total_amount = sum(Decimal(str(item['price_at_sale'])) * Decimal(item['quantity']) for item in items_data)
-        total_amount = float(total_amount.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+        # Valida todas as variações (SKUs) da venda com uma única consulta
+        variation_ids = {item['variation_id'] for item in items_data if item.get('variation_id')}
+        if variation_ids:
+            result = await db.execute(
+                select(ProductVariation.id, ProductVariation.product_id).where(ProductVariation.id.in_(variation_ids))
+            )
+            variation_owner = dict(result.all())
+            for item in items_data:
+                variation_id = item.get('variation_id')
+                if variation_id and variation_owner.get(variation_id) != item['product_id']:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Variação ID {variation_id} não pertence ao produto ID {item['product_id']}."
+                    )
 
-        total_paid = sum(p['amount'] for p in payments_data)
-        # Pequena margem de erro para floats
-        if total_paid < (total_amount - 0.05): 
-             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Valor pago insuficiente.")
+        # Sem caixa aberto a venda é recusada antes de gravar qualquer coisa
+        # (os serviços pós-venda rodam depois do commit da venda e não a desfazem)
+        await db.run_sync(lambda sync_db: cash_register_service.resolve_open_register_id(sync_db, store_id=current_user.store_id))
 
         primary_payment_method = payments_data[0]['payment_method'] if payments_data else "other"
 
@@ -106,6 +241,7 @@ class CRUDSale(CRUDBase[Sale, SaleCreate, SaleUpdate]):
             user_id=current_user.id,
             store_id=current_user.store_id,
             customer_id=obj_in.customer_id,
+            idempotency_key=idempotency_key,
             items=[SaleItemModel(**item) for item in items_data],
             payments=[Payment(**p) for p in payments_data]
         )
@@ -127,7 +263,16 @@ class CRUDSale(CRUDBase[Sale, SaleCreate, SaleUpdate]):
                     logger.info(f"Comanda #{order_id} fechada automaticamente pela Venda.")
         # ----------------------------------------
 
-        await db.commit()
+        try:
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            if "uq_sales_store_idempotency_key" not in str(e.orig):
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Já existe uma venda registrada com esta Idempotency-Key."
+            )
         await db.refresh(db_sale)
 
         # Serviços Pós-Venda (Estoque, Caixa, CRM)
@@ -135,6 +280,154 @@ class CRUDSale(CRUDBase[Sale, SaleCreate, SaleUpdate]):
         
         return await get_full_sale(db, id=db_sale.id)
 
+    async def sync_batch(
+        self, db: AsyncSession, *, sales_in: List[SaleSyncEntry], current_user: User
+    ) -> List[SaleSyncResult]:
+        """
+        Grava um lote de vendas feitas no terminal (fila offline do POS) em UMA transação.
+
+        - Cada venda traz uma `idempotency_key`; chaves já sincronizadas voltam como DUPLICATE
+          com o ID original (o índice único parcial garante isso também entre envios simultâneos).
+        - Vendas inválidas voltam como REJECTED e não impedem as demais.
+        - Vendas, itens e pagamentos são gravados com um INSERT cada; caixa, CRM e estoque
+          recebem o efeito do lote inteiro de uma vez (ver _run_sync_post_sales_batch).
+
+        Sem caixa aberto a sincronização inteira é recusada (400) e nada é gravado:
+        o terminal mantém a fila e tenta de novo.
+        """
+        store_id = current_user.store_id
+        entries: Dict[str, SaleSyncEntry] = {}
+        for entry in sales_in:
+            # A mesma chave repetida no próprio lote é a mesma venda: vale a primeira
+            entries.setdefault(entry.idempotency_key, entry)
+        results: Dict[str, SaleSyncResult] = {}
+
+        def mark(key: str, status_: SaleSyncStatus, sale_id: Optional[int] = None, detail: Optional[str] = None):
+            results[key] = SaleSyncResult(idempotency_key=key, status=status_, sale_id=sale_id, detail=detail)
+
+        async def mark_existing(keys) -> None:
+            if not keys:
+                return
+            rows = await db.execute(
+                select(Sale.idempotency_key, Sale.id).where(Sale.store_id == store_id, Sale.idempotency_key.in_(keys))
+            )
+            for key, sale_id in rows.all():
+                mark(key, SaleSyncStatus.DUPLICATE, sale_id=sale_id)
+
+        # 1. Chaves já sincronizadas (reenvio após timeout, por exemplo)
+        await mark_existing(list(entries))
+
+        # 2. Validação de todas as vendas restantes, com uma consulta por tipo de entidade
+        pending = {key: entry for key, entry in entries.items() if key not in results}
+        items_by_key = {key: [item.model_dump() for item in entry.items] for key, entry in pending.items()}
+        product_ids = {item['product_id'] for items in items_by_key.values() for item in items}
+        variation_ids = {item['variation_id'] for items in items_by_key.values() for item in items if item.get('variation_id')}
+        customer_ids = {entry.customer_id for entry in pending.values() if entry.customer_id}
+
+        store_products = set()
+        if product_ids:
+            store_products = set((await db.execute(
+                select(Product.id).where(Product.id.in_(product_ids), Product.store_id == store_id)
+            )).scalars().all())
+        variation_owner = {}
+        if variation_ids:
+            variation_owner = dict((await db.execute(
+                select(ProductVariation.id, ProductVariation.product_id).where(ProductVariation.id.in_(variation_ids))
+            )).all())
+        store_customers = set()
+        if customer_ids:
+            store_customers = set((await db.execute(
+                select(Customer.id).where(Customer.id.in_(customer_ids), Customer.store_id == store_id)
+            )).scalars().all())
+
+        totals: Dict[str, float] = {}
+        for key, entry in pending.items():
+            try:
+                totals[key] = _sale_total(items_by_key[key], [p.model_dump() for p in entry.payments])
+            except HTTPException as e:
+                mark(key, SaleSyncStatus.REJECTED, detail=e.detail)
+                continue
+            for item in items_by_key[key]:
+                variation_id = item.get('variation_id')
+                if item['product_id'] not in store_products:
+                    mark(key, SaleSyncStatus.REJECTED, detail=f"Produto ID {item['product_id']} não encontrado.")
+                    break
+                if variation_id and variation_owner.get(variation_id) != item['product_id']:
+                    mark(key, SaleSyncStatus.REJECTED, detail=f"Variação ID {variation_id} não pertence ao produto ID {item['product_id']}.")
+                    break
+            else:
+                if entry.customer_id and entry.customer_id not in store_customers:
+                    mark(key, SaleSyncStatus.REJECTED, detail=f"Cliente ID {entry.customer_id} não encontrado.")
+
+        to_insert = [key for key in pending if key not in results]
+        if to_insert:
+            # 3. Vendas: um INSERT; conflito na chave = outro envio gravou a mesma venda nesse meio tempo
+            stmt = (
+                pg_insert(Sale)
+                .values([
+                    {
+                        "idempotency_key": key,
+                        "total_amount": totals[key],
+                        "payment_method": payment_method_value(pending[key].payments[0].payment_method),
+                        "user_id": current_user.id,
+                        "store_id": store_id,
+                        "customer_id": pending[key].customer_id,
+                        "created_at": _client_timestamp(pending[key].created_at),
+                    }
+                    for key in to_insert
+                ])
+                .on_conflict_do_nothing(
+                    index_elements=[Sale.store_id, Sale.idempotency_key],
+                    index_where=Sale.idempotency_key.isnot(None),
+                )
+                .returning(Sale.idempotency_key, Sale.id)
+            )
+            created: Dict[str, int] = dict((await db.execute(stmt)).all())
+            await mark_existing([key for key in to_insert if key not in created])
+
+            if created:
+                # 4. Itens e pagamentos: um INSERT cada
+                await db.execute(insert(SaleItemModel), [
+                    {**item, "sale_id": sale_id}
+                    for key, sale_id in created.items() for item in items_by_key[key]
+                ])
+                await db.execute(insert(Payment), [
+                    {"sale_id": sale_id, "payment_method": payment_method_value(payment.payment_method), "amount": payment.amount}
+                    for key, sale_id in created.items() for payment in pending[key].payments
+                ])
+
+                # Comandas pagas por essas vendas são fechadas, como no fluxo unitário
+                order_ids = {pending[key].order_id for key in created if pending[key].order_id}
+                if order_ids:
+                    await db.execute(
+                        update(Order)
+                        .where(Order.id.in_(order_ids), Order.store_id == store_id)
+                        .values(status=OrderStatus.CLOSED, closed_at=datetime.utcnow())
+                        .execution_options(synchronize_session=False)
+                    )
+
+                # 5. Caixa, CRM e estoque do lote inteiro
+                await db.run_sync(
+                    _run_sync_post_sales_batch,
+                    store_id=store_id,
+                    user_id=current_user.id,
+                    payments=[
+                        (sale_id, payment)
+                        for key, sale_id in created.items() for payment in pending[key].payments
+                    ],
+                    customer_totals=[(pending[key].customer_id, totals[key]) for key in created],
+                    stock_lines=[
+                        (sale_id, item['product_id'], item.get('variation_id'), item['quantity'])
+                        for key, sale_id in created.items() for item in items_by_key[key]
+                    ],
+                )
+                for key, sale_id in created.items():
+                    mark(key, SaleSyncStatus.CREATED, sale_id=sale_id)
+                logger.info(f"Sincronização da loja {store_id}: {len(created)} venda(s) gravada(s) em lote.")
+
+        await db.commit()
+        return [results[key] for key in entries]
+
     async def get_sales_by_customer(self, db: AsyncSession, *, customer_id: int, current_user: User) -> List[Sale]:
         stmt = (
             select(self.model)
@@ -6,7 +6,7 @@ class CRUDSupplier(CRUDBase[Supplier, SupplierCreate, SupplierUpdate]):
     # A classe CRUDBase já contém toda a lógica necessária para
     # criar, ler, atualizar e deletar fornecedores,
     # garantindo que cada operação seja restrita à loja do usuário logado.
-    pass
+    cache_entity = "suppliers"
 
 # Exporta uma instância da classe, que será importada como 'crud.supplier'
 supplier = CRUDSupplier(Supplier)
\ No newline at end of file
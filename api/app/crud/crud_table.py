@@ -1,25 +1,81 @@
 # api/app/crud/crud_table.py
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+import sqlalchemy as sa
 from typing import List
 
 from app.crud.base import CRUDBase
 from app.models.table import Table
+from app.models.order import Order, OrderItem
 from app.models.user import User
+from app.schemas.enums import OrderStatus, OrderItemStatus, TableStatus
 from app.schemas.table import TableCreate, TableUpdate, TableLayoutUpdate
+
 class CRUDTable(CRUDBase[Table, TableCreate, TableUpdate]):
     """
     Operações CRUD para Mesas, herdando a funcionalidade padrão da CRUDBase.
     """
     async def update_layout(self, db: AsyncSession, *, tables_layout: List[TableLayoutUpdate], current_user: User) -> List[Table]:
-        # Esta função já espera a lista corretamente
-        updated_tables = []
-        for table_update in tables_layout:
-            db_table = await self.get(db, id=table_update.id, current_user=current_user)
-            if db_table:
-                updated_table = await self.update(db=db, db_obj=db_table, obj_in=table_update, current_user=current_user)
-                updated_tables.append(updated_table)
-        # Atenção: O commit ocorre dentro de cada chamada self.update.
-        # Se precisar de uma única transação, a lógica precisaria ser ajustada aqui.
-        return updated_tables
+        """
+        Salva posição e rotação de todas as mesas com um único UPDATE ... FROM (VALUES ...),
+        restrito à loja do usuário. Não faz commit: o chamador decide a transação
+        (ex.: mesas e paredes salvas juntas).
+        """
+        return await self.bulk_update_columns(
+            db,
+            rows=[t.model_dump() for t in tables_layout],
+            columns=["pos_x", "pos_y", "rotation"],
+            current_user=current_user,
+        )
+
+    async def get_floor_tables(self, db: AsyncSession, *, current_user: User) -> List[dict]:
+        """
+        Mesas da loja com a comanda aberta de cada uma (se ocupada), como dicionários planos
+        no formato do schema Table, ordenadas pelo número (numéricos primeiro).
+        """
+        # Comanda aberta de cada mesa (com itens): uma linha por mesa, a mais recente
+        open_orders = (
+            select(
+                Order.table_id,
+                Order.id.label("open_order_id"),
+                Order.created_at.label("open_order_created_at"),
+                sa.func.bool_or(OrderItem.status == OrderItemStatus.READY).label("has_ready_items")
+            )
+            .join(OrderItem, Order.id == OrderItem.order_id)
+            .where(
+                Order.store_id == current_user.store_id,
+                Order.status == OrderStatus.OPEN,
+                Order.table_id.is_not(None)
+            )
+            .group_by(Order.table_id, Order.id, Order.created_at)
+            .order_by(Order.table_id, Order.created_at.desc())
+            .distinct(Order.table_id)
+            .subquery()
+        )
+
+        # Mesas + comanda aberta numa única consulta de colunas
+        stmt = (
+            select(
+                Table.id, Table.number, Table.capacity, Table.shape, Table.status,
+                Table.pos_x, Table.pos_y, Table.rotation, Table.store_id,
+                open_orders.c.open_order_id, open_orders.c.open_order_created_at, open_orders.c.has_ready_items,
+            )
+            .outerjoin(
+                open_orders,
+                sa.and_(open_orders.c.table_id == Table.id, Table.status == TableStatus.OCCUPIED)
+            )
+            .where(Table.store_id == current_user.store_id)
+        )
+        response_tables = []
+        for row in (await db.execute(stmt)).mappings():
+            entry = dict(row)
+            entry["pos_x"] = entry["pos_x"] or 0
+            entry["pos_y"] = entry["pos_y"] or 0
+            entry["rotation"] = entry["rotation"] or 0
+            entry["has_ready_items"] = bool(entry["has_ready_items"])
+            response_tables.append(entry)
+
+        response_tables.sort(key=lambda t: (0, int(t["number"])) if t["number"].isdigit() else (1, t["number"]))
+        return response_tables
 
 table = CRUDTable(Table)
\ No newline at end of file
@@ -6,7 +6,8 @@ from sqlalchemy.orm import selectinload
 from app.crud.base import CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash_async, verify_and_update_password
+from loguru import logger
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
@@ -24,8 +25,15 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         user = await self.get_by_email(db, email=email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        is_valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+        if not is_valid:
             return None
+        if new_hash:
+            # Custo do bcrypt mudou desde que a senha foi gravada: regrava de forma transparente
+            user.hashed_password = new_hash
+            db.add(user)
+            await db.commit()
+            logger.info(f"Hash de senha do usuário ID {user.id} atualizado para os parâmetros atuais.")
         return user
 
     # --- INÍCIO DA CORREÇÃO ---
@@ -36,7 +44,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         # e criar o objeto User corretamente.
         db_obj = User(
             email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
+            hashed_password=await get_password_hash_async(obj_in.password),
             full_name=obj_in.full_name,
             is_active=True,  # Usuários são criados como ativos por padrão
             role=obj_in.role,
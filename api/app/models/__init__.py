@@ -1,2 +1,2 @@
 from .campaign import Campaign
-from app.models.feedback import Feedback
\ No newline at end of file
+from app.models.feedback import Feedback, FeedbackImage
\ No newline at end of file
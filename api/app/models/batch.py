@@ -1,12 +1,19 @@
-from sqlalchemy import Integer, Float, ForeignKey, DateTime, func, Date
+from sqlalchemy import Integer, Float, ForeignKey, DateTime, func, Date, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
+from typing import Optional
 
 from app.db.base import Base
 
 class ProductBatch(Base):
     """ Modelo para Lotes de Produto com controle de validade. """
     __tablename__ = "product_batches"
+    __table_args__ = (
+        # Lotes com saldo ordenados por validade dentro de cada loja (controle de vencimento)
+        Index("ix_product_batches_store_expiration", "store_id", "expiration_date", postgresql_where=text("quantity > 0")),
+        # Fila FEFO de cada produto: lotes com saldo na ordem de vencimento
+        Index("ix_product_batches_product_fefo", "product_id", "expiration_date", "id", postgresql_where=text("quantity > 0")),
+    )
     store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"), nullable=False)
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
@@ -18,4 +25,21 @@ class ProductBatch(Base):
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
 
     # Relação
-    product: Mapped["Product"] = relationship(back_populates="batches")
\ No newline at end of file
+    product: Mapped["Product"] = relationship(back_populates="batches")
+
+class SaleBatchAllocation(Base):
+    """
+    Quanto de cada lote uma venda consumiu (baixa FEFO: primeiro a vencer, primeiro a sair).
+    Permite rastrear de quais lotes saiu cada venda e conferir o saldo dos lotes.
+    """
+    __tablename__ = "sale_batch_allocations"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    sale_id: Mapped[int] = mapped_column(ForeignKey("sales.id"), nullable=False, index=True)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), nullable=False)
+    # O histórico da venda sobrevive à baixa manual (exclusão) do lote
+    batch_id: Mapped[Optional[int]] = mapped_column(ForeignKey("product_batches.id", ondelete="SET NULL"), nullable=True, index=True)
+    quantity: Mapped[float] = mapped_column(Float, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+    batch: Mapped[Optional["ProductBatch"]] = relationship()
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Float, Integer, DateTime, func, ForeignKey, Enum as SQLAlchemyEnum
+from sqlalchemy import String, Float, Integer, DateTime, func, ForeignKey, Enum as SQLAlchemyEnum, UniqueConstraint, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import List
@@ -19,6 +19,12 @@ class TransactionType(str, enum.Enum):
 
 class CashRegister(Base):
     __tablename__ = "cash_registers"
+    __table_args__ = (
+        # No máximo um caixa aberto por loja; também é o índice da busca do caixa aberto a cada venda
+        Index("uq_cash_registers_open_store", "store_id", unique=True, postgresql_where=text("status = 'OPEN'")),
+        # Paginação do histórico por (closed_at, id) dentro da loja
+        Index("ix_cash_registers_store_closed", "store_id", "closed_at", "id", postgresql_where=text("status = 'CLOSED'")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     
@@ -44,15 +50,48 @@ class CashRegister(Base):
     opened_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
     closed_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
 
+    # --- Saldo corrente (ledger) ---
+    # Atualizados no mesmo comando/transação de cada CashRegisterTransaction inserida
+    # (ver cash_register_service.record_transactions), então o fechamento e o status
+    # não precisam somar transações nem varrer comandas.
+    current_balance: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
+    total_sales: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
+
     user: Mapped["User"] = relationship(lazy="selectin") # Adicionado lazy="selectin" para consistência
+    # Carregamento sob demanda: com selectin, toda leitura do caixa (inclusive a cada venda)
+    # trazia todas as transações do turno. Saldos e totais vêm do ledger acima.
     transactions: Mapped[List["CashRegisterTransaction"]] = relationship(
         back_populates="cash_register",
         cascade="all, delete-orphan",
-        lazy="selectin" # Adicionado lazy="selectin" para consistência
+        lazy="select"
+    )
+    balances: Mapped[List["CashRegisterBalance"]] = relationship(
+        back_populates="cash_register",
+        cascade="all, delete-orphan",
+        lazy="selectin",
+        order_by="CashRegisterBalance.payment_method",
+    )
+
+class CashRegisterBalance(Base):
+    """ Saldo corrente do caixa por forma de pagamento (uma linha por caixa + forma). """
+    __tablename__ = "cash_register_balances"
+    __table_args__ = (
+        UniqueConstraint("cash_register_id", "payment_method", name="uq_cash_register_balances_method"),
     )
 
+    id: Mapped[int] = mapped_column(primary_key=True)
+    cash_register_id: Mapped[int] = mapped_column(ForeignKey("cash_registers.id"), nullable=False)
+    payment_method: Mapped[str] = mapped_column(String(50), nullable=False)
+    amount: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
+
+    cash_register: Mapped["CashRegister"] = relationship(back_populates="balances")
+
 class CashRegisterTransaction(Base):
     __tablename__ = "cash_register_transactions"
+    __table_args__ = (
+        # Totais e detalhe de um turno (agregação do histórico e streaming das transações)
+        Index("ix_cash_register_transactions_register", "cash_register_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     cash_register_id: Mapped[int] = mapped_column(ForeignKey("cash_registers.id"), nullable=False)
@@ -60,6 +99,8 @@ class CashRegisterTransaction(Base):
     
     transaction_type: Mapped[TransactionType] = mapped_column(SQLAlchemyEnum(TransactionType), nullable=False)
     amount: Mapped[float] = mapped_column(Float, nullable=False)
+    # Forma de pagamento da movimentação (suprimento/sangria são sempre em dinheiro)
+    payment_method: Mapped[str] = mapped_column(String(50), nullable=True)
     description: Mapped[str] = mapped_column(String(255), nullable=True)
     
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Text, ForeignKey, Enum as SQLAlchemyEnum, DateTime, func, JSON # <-- Importe o JSON
+from sqlalchemy import String, Text, ForeignKey, Enum as SQLAlchemyEnum, DateTime, func, Integer, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import Optional, List
@@ -20,8 +20,6 @@ class Feedback(Base):
     subject: Mapped[str] = mapped_column(String(150), nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=False)
     
-    # --- ALTERADO PARA JSON PARA SUPORTAR VÁRIAS IMAGENS ---
-    image_data: Mapped[Optional[list]] = mapped_column(JSON, nullable=True) 
     
     status: Mapped[FeedbackStatus] = mapped_column(
         SQLAlchemyEnum(FeedbackStatus), 
@@ -32,4 +30,29 @@ class Feedback(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
 
     user: Mapped["User"] = relationship(lazy="selectin")
-    store: Mapped[Optional["Store"]] = relationship(lazy="selectin")
\ No newline at end of file
+    store: Mapped[Optional["Store"]] = relationship(lazy="selectin")
+    # As imagens ficam fora da linha: só a referência ao arquivo (ver app/services/blob_store.py)
+    images: Mapped[List["FeedbackImage"]] = relationship(
+        back_populates="feedback", cascade="all, delete-orphan", order_by="FeedbackImage.position"
+    )
+
+class FeedbackImage(Base):
+    __tablename__ = "feedback_images"
+    __table_args__ = (
+        Index("ix_feedback_images_feedback_id_position", "feedback_id", "position"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    feedback_id: Mapped[int] = mapped_column(ForeignKey("feedbacks.id", ondelete="CASCADE"), nullable=False)
+    position: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # SHA-256 do conteúdo: nome do arquivo no blob store (o mesmo arquivo pode servir vários chamados)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    content_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    width: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    height: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+
+    feedback: Mapped["Feedback"] = relationship(back_populates="images")
\ No newline at end of file
@@ -0,0 +1,30 @@
+from sqlalchemy import String, Integer, DateTime, LargeBinary, func, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from typing import Optional
+
+from app.db.base import Base
+
+class IdempotencyKey(Base):
+    """
+    Resposta guardada de uma requisição de escrita enviada com o header Idempotency-Key.
+    Enquanto `status_code` é nulo a requisição original ainda está em andamento.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # Usuário do token: a mesma chave enviada por outro usuário é outra requisição
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    key: Mapped[str] = mapped_column(String(255), nullable=False)
+    # sha256 de método + caminho (com query string) + corpo: a chave não pode ser reaproveitada para outra requisição
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    status_code: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    content_type: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    response_body: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
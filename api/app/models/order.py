@@ -36,6 +36,10 @@ class Order(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     closed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
 
+    # Incrementada a cada alteração da comanda (itens, pagamentos, status).
+    # Usada no controle otimista: o cliente envia a versão que leu e recebe 409 se ela mudou.
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
     table_id: Mapped[Optional[int]] = mapped_column(ForeignKey("tables.id"))
     customer_id: Mapped[Optional[int]] = mapped_column(ForeignKey("customers.id"))
     
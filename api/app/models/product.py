@@ -1,5 +1,5 @@
 # /api/app/models/product.py
-from sqlalchemy import String, Float, Integer, DateTime, func, ForeignKey, Enum as SQLAlchemyEnum, Boolean
+from sqlalchemy import String, Float, Integer, DateTime, func, ForeignKey, Enum as SQLAlchemyEnum, Boolean, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import List, Optional
@@ -21,6 +21,11 @@ class ProductType(str, enum.Enum):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Índice parcial: contém apenas os produtos abaixo do limite mínimo,
+        # então a lista de estoque baixo de uma loja é lida sem varrer o catálogo.
+        Index("ix_products_low_stock", "store_id", postgresql_where=text("stock <= low_stock_threshold")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(100), index=True, nullable=False)
@@ -1,7 +1,8 @@
 # api/app/models/reservation.py
 from sqlalchemy import (
-    String, Integer, ForeignKey, DateTime, func
+    String, Integer, ForeignKey, DateTime, func, column, literal_column
 )
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import Optional
@@ -10,6 +11,17 @@ from app.db.base import Base
 
 class Reservation(Base):
     __tablename__ = "reservations"
+    __table_args__ = (
+        # Duas reservas da mesma mesa não podem ter períodos sobrepostos ([início, fim)).
+        # A mesa entra como int4range(id, id) para o GiST indexar as duas colunas sem a
+        # extensão btree_gist; o índice também atende a busca de mesas livres.
+        ExcludeConstraint(
+            (func.int4range(column("table_id"), column("table_id"), literal_column("'[]'")), "&&"),
+            (func.tstzrange(column("reservation_time"), column("end_time"), literal_column("'[)'")), "&&"),
+            name="ex_reservations_table_period",
+            using="gist",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     
@@ -18,6 +30,8 @@ class Reservation(Base):
     # --- CORREÇÃO AQUI ---
     reservation_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
     # --- FIM DA CORREÇÃO ---
+    # Fim do período em que a mesa fica reservada (início + duração). Passado o fim, a reserva expira.
+    end_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
     number_of_people: Mapped[int] = mapped_column(Integer, nullable=False)
     notes: Mapped[Optional[str]] = mapped_column(String(500))
     status: Mapped[str] = mapped_column(String(50), default="confirmed")
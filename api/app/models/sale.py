@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, Float, DateTime, String, func, ForeignKey
+from sqlalchemy import Integer, Float, DateTime, String, func, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import List, Optional
@@ -12,6 +12,13 @@ from .payment import Payment # Importação do modelo Payment
 
 class Sale(Base):
     __tablename__ = "sales"
+    __table_args__ = (
+        # Uma chave de idempotência por loja: reenviar a mesma venda (fila offline do POS) não a duplica
+        Index(
+            "uq_sales_store_idempotency_key", "store_id", "idempotency_key",
+            unique=True, postgresql_where=text("idempotency_key IS NOT NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     total_amount: Mapped[float] = mapped_column(Float, nullable=False)
@@ -21,6 +28,8 @@ class Sale(Base):
     customer_id: Mapped[Optional[int]] = mapped_column(ForeignKey("customers.id"), nullable=True)
     cash_register_id: Mapped[Optional[int]] = mapped_column(ForeignKey("cash_registers.id"), nullable=True)
     store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"), nullable=False)
+    # Chave gerada pelo terminal (ex.: UUID) para vendas enviadas pela fila de sincronização
+    idempotency_key: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
@@ -46,7 +55,10 @@ class SaleItem(Base):
 
     sale_id: Mapped[int] = mapped_column(ForeignKey("sales.id"))
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
+    # Variação (SKU) vendida, quando o produto tem grade (tamanho/cor etc.)
+    variation_id: Mapped[Optional[int]] = mapped_column(ForeignKey("product_variations.id"), nullable=True, index=True)
 
     # Relações usando strings
     sale: Mapped["Sale"] = relationship(back_populates="items")
-    product: Mapped["Product"] = relationship()
\ No newline at end of file
+    product: Mapped["Product"] = relationship()
+    variation: Mapped[Optional["ProductVariation"]] = relationship()
\ No newline at end of file
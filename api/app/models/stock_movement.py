@@ -1,6 +1,7 @@
 from sqlalchemy import String, Integer, DateTime, func, ForeignKey, Enum as SQLAlchemyEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
+from typing import Optional
 import enum
 
 from app.db.base import Base
@@ -18,6 +19,7 @@ class StockMovement(Base):
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), nullable=False)
+    variation_id: Mapped[Optional[int]] = mapped_column(ForeignKey("product_variations.id"), nullable=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=True)
     
     movement_type: Mapped[MovementType] = mapped_column(SQLAlchemyEnum(MovementType), nullable=False)
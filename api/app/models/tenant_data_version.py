@@ -0,0 +1,16 @@
+from sqlalchemy import String, BigInteger, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+class TenantDataVersion(Base):
+    """
+    Versão dos dados de referência de uma loja (categorias, fornecedores, paredes...).
+    Cada escrita incrementa a versão na mesma transação; o cache por loja
+    (app.core.tenant_cache) e os ETags das respostas usam esse número.
+    """
+    __tablename__ = "tenant_data_versions"
+
+    store_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    entity: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
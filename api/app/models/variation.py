@@ -36,7 +36,7 @@ class ProductVariation(Base):
     barcode: Mapped[str] = mapped_column(String(100), unique=True, nullable=True)
 
     product: Mapped["Product"] = relationship(back_populates="variations")
-    options: Mapped[List["AttributeOption"]] = relationship(secondary="variation_options_association")
+    options: Mapped[List["AttributeOption"]] = relationship(secondary="variation_options_association", lazy="selectin")
 
 class VariationOptionsAssociation(Base):
     """ Tabela de associação para ligar uma Variação a suas Opções. """
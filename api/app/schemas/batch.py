@@ -24,4 +24,15 @@ class ProductBatch(ProductBatchBase):
     product: Optional[ProductInfo] = None # <-- Relacionamento para exibir o nome
 
     # Substitui a 'class Config' obsoleta pela nova sintaxe do Pydantic V2
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class SaleBatchAllocation(BaseModel):
+    """ Quanto uma venda consumiu de cada lote (baixa FEFO). """
+    batch_id: Optional[int] = None
+    product_id: int
+    product_name: str
+    quantity: float
+    expiration_date: Optional[date] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 
 class CashRegisterBase(BaseModel):
     opening_balance: float
@@ -32,12 +32,23 @@ class CashRegisterStatus(CashRegisterSession):
     total_sales: float
     expected_balance: float
 
+class CashRegisterBalance(BaseModel):
+    payment_method: str
+    amount: float
+
+    class Config:
+        from_attributes = True
+
 class CashRegister(CashRegisterBase):
     id: int
     status: str # Ou o Enum apropriado
     opened_at: datetime
     closed_at: Optional[datetime]
     closing_balance: Optional[float] = None
+    # Saldo corrente (ledger), mantido a cada transação do caixa
+    current_balance: float = 0.0
+    total_sales: float = 0.0
+    balances: List[CashRegisterBalance] = []
 
     class Config:
         orm_mode = True
@@ -52,4 +63,27 @@ class CashRegisterUpdate(BaseModel):
     closing_balance: Optional[float] = None
 
 class CashRegisterClose(BaseModel):
-    closing_balance: float
\ No newline at end of file
+    closing_balance: float
+
+# --- Histórico resumido (uma linha por turno, sem carregar transações) ---
+class CashRegisterSummary(BaseModel):
+    id: int
+    user_id: int
+    user_name: Optional[str] = None
+    status: str
+    opened_at: datetime
+    closed_at: Optional[datetime] = None
+    opening_balance: float
+    closing_balance: Optional[float] = None
+    expected_balance: Optional[float] = None
+    balance_difference: Optional[float] = None
+    total_sales: float = 0.0
+    transaction_count: int = 0
+    # Somas calculadas no banco (GROUP BY), por tipo de transação e por forma de pagamento
+    totals_by_type: Dict[str, float] = {}
+    totals_by_method: Dict[str, float] = {}
+
+class CashRegisterHistory(BaseModel):
+    items: List[CashRegisterSummary]
+    # Passe em `cursor` para buscar a próxima página; None quando não há mais turnos
+    next_cursor: Optional[str] = None
@@ -49,4 +49,13 @@ class OrderItemStatus(str, Enum):
     PENDING = "pending"
     PREPARING = "preparing"
     READY = "ready"
-    DELIVERED = "delivered"
\ No newline at end of file
+    DELIVERED = "delivered"
+
+class StockAlertType(str, enum.Enum):
+    LOW_STOCK = "LOW_STOCK"   # O estoque caiu para o limite mínimo ou abaixo dele
+    RESTOCKED = "RESTOCKED"   # O estoque voltou a ficar acima do limite mínimo
+
+class SaleSyncStatus(str, enum.Enum):
+    CREATED = "created"       # Venda gravada nesta sincronização
+    DUPLICATE = "duplicate"   # A chave já tinha sido sincronizada antes: nada foi gravado de novo
+    REJECTED = "rejected"     # Venda inválida (itens, pagamento, produto de outra loja...): não gravada
@@ -1,10 +1,40 @@
 from pydantic import BaseModel
 from typing import Optional, List
+from datetime import datetime
 
 class FeedbackCreate(BaseModel):
     subject: str
     description: str
+    # Imagens em data URL base64 (como o navegador lê o arquivo). São gravadas no blob store,
+    # não na linha do chamado.
     image_data: Optional[List[str]] = None # --- AGORA É UMA LISTA ---
 
 class FeedbackUpdateStatus(BaseModel):
-    status: str
\ No newline at end of file
+    status: str
+
+# --- Listagem paginada (painel do super admin) ---
+class FeedbackImageRef(BaseModel):
+    id: int
+    sha256: str
+    content_type: str
+    size_bytes: int
+    width: Optional[int] = None
+    height: Optional[int] = None
+    # URLs assinadas (com validade): podem ir direto no <img src>
+    url: str
+    thumbnail_url: str
+
+class FeedbackSummary(BaseModel):
+    id: int
+    subject: str
+    description: str
+    status: str
+    created_at: datetime
+    user_name: Optional[str] = None
+    store_name: str
+    images: List[FeedbackImageRef] = []
+
+class FeedbackPage(BaseModel):
+    items: List[FeedbackSummary]
+    # Passe em `cursor` para buscar a próxima página; None quando não há mais chamados
+    next_cursor: Optional[str] = None
@@ -28,16 +28,19 @@ class OrderItemBase(BaseModel):
 class OrderItemCreate(OrderItemBase):
     pass
 
-class OrderItem(OrderItemBase):
+class OrderItemCompact(OrderItemBase):
+    """ Item da comanda sem o produto aninhado (respostas compactas). """
     id: int
     price_at_order: float
-    product: Optional[Product] = None
     paid_quantity: int
     status: Optional[OrderItemStatus] = None
-    
+
     class Config:
         from_attributes = True
 
+class OrderItem(OrderItemCompact):
+    product: Optional[Product] = None
+
 # --- Schemas de Pedido (Order) ---
 class OrderBase(BaseModel):
     order_type: OrderType
@@ -56,6 +59,7 @@ class OrderUpdate(BaseModel):
 class Order(OrderBase):
     id: int
     status: OrderStatus
+    version: int = 1
     created_at: datetime
     user: Optional[User] = None
     items: List[OrderItem] = []
@@ -64,6 +68,52 @@ class Order(OrderBase):
     class Config:
         from_attributes = True
 
+# --- Resposta compacta das alterações de comanda (?view=compact) ---
+class OrderTotals(BaseModel):
+    items_quantity: int
+    total_amount: float
+    paid_amount: float
+    pending_amount: float
+
+class OrderMutationResult(BaseModel):
+    """
+    Só o que mudou: os itens alterados, os removidos, os totais e a nova versão da comanda.
+    A comanda completa continua disponível em GET /orders/{id} (ou sem ?view=compact).
+    """
+    id: int
+    status: OrderStatus
+    version: int
+    items: List[OrderItemCompact] = []
+    removed_item_ids: List[int] = []
+    totals: OrderTotals
+    sale_id: Optional[int] = None
+
+# --- Painel da cozinha (KDS): formato plano montado direto das linhas ---
+class KitchenProduct(BaseModel):
+    id: int
+    name: str
+
+class KitchenOrderItem(BaseModel):
+    id: int
+    product_id: int
+    quantity: int
+    notes: Optional[str] = None
+    status: Optional[OrderItemStatus] = None
+    product: Optional[KitchenProduct] = None
+
+class KitchenTable(BaseModel):
+    id: int
+    number: str
+
+class KitchenOrder(BaseModel):
+    id: int
+    order_type: OrderType
+    status: OrderStatus
+    created_at: datetime
+    table_id: Optional[int] = None
+    table: Optional[KitchenTable] = None
+    items: List[KitchenOrderItem] = []
+
 # --- Outros Schemas ---
 class OrderItemStatusUpdate(BaseModel):
     status: OrderItemStatus
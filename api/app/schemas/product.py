@@ -81,4 +81,28 @@ class Product(ProductBase):
     variations: List[ProductVariation] = []
     # recipe_items: List[RecipeItemSchema] = [] # Adicionar se/quando implementar receitas
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# =====================================================================================
+# Schema de retorno da leitura de código de barras (PDV)
+# =====================================================================================
+class ProductBarcodeMatch(BaseSchema):
+    product: Product
+    variation: Optional[ProductVariation] = None # Preenchido quando o código é de uma variação (SKU)
+
+# =====================================================================================
+# Schema plano da busca rápida do PDV (GET /products/lookup)
+# =====================================================================================
+class ProductLookup(BaseSchema):
+    """ Só as colunas que o PDV usa na busca, sem categoria/fornecedor/variações aninhados. """
+    id: int
+    name: str
+    price: float
+    stock: int
+    low_stock_threshold: int
+    image_url: Optional[str] = None
+    barcode: Optional[str] = None
+    category_id: Optional[int] = None
+    product_type: ProductType
+    send_to_kitchen: bool
+    has_variations: bool = False
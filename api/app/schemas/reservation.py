@@ -16,7 +16,10 @@ class ReservationBase(BaseModel):
 
 class ReservationCreate(ReservationBase):
     # Schema usado para criar a reserva, herda todos os campos da Base
-    pass
+    duration_minutes: Optional[int] = Field(
+        None, gt=0, le=24 * 60,
+        description="Por quanto tempo a mesa fica reservada. Padrão: RESERVATION_DURATION_MINUTES."
+    )
 
 class ReservationUpdate(BaseModel):
     # Schema para atualizações (não usado na criação)
@@ -33,6 +36,7 @@ class Reservation(ReservationBase):
     id: int
     store_id: int
     status: str
+    end_time: datetime
     created_at: datetime
     table: TableSchema # Inclui os detalhes da mesa relacionada
 
@@ -7,6 +7,7 @@ from .sale_item import SaleItem, SaleItemCreate
 from .payment import PaymentCreate, Payment as PaymentSchema
 from .user import User
 from .customer import Customer
+from .enums import SaleSyncStatus
 
 # =====================================================================================
 # Schema Base e de Criação
@@ -25,6 +26,28 @@ class SaleCreate(SaleBase):
 class SaleUpdate(BaseModel):
     pass
 
+# =====================================================================================
+# Sincronização em lote (fila offline do POS)
+# =====================================================================================
+class SaleSyncEntry(SaleCreate):
+    idempotency_key: str = Field(
+        ..., min_length=8, max_length=64,
+        description="Chave única gerada no terminal (ex.: UUID). Reenviar a mesma chave não duplica a venda."
+    )
+    created_at: Optional[datetime] = Field(None, description="Momento em que a venda foi feita no terminal.")
+
+class SaleSyncRequest(BaseModel):
+    sales: List[SaleSyncEntry] = Field(..., min_length=1, max_length=500)
+
+class SaleSyncResult(BaseModel):
+    idempotency_key: str
+    status: SaleSyncStatus
+    sale_id: Optional[int] = None
+    detail: Optional[str] = None
+
+class SaleSyncResponse(BaseModel):
+    results: List[SaleSyncResult]
+
 # =====================================================================================
 # Schema para Leitura/Retorno da Venda
 # =====================================================================================
@@ -39,4 +62,40 @@ class Sale(SaleBase):
     customer: Optional[Customer] = None
     payments: List[PaymentSchema] = []
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+# =====================================================================================
+# Histórico de vendas (GET /sales/): formato plano montado direto das linhas
+# =====================================================================================
+class SaleHistoryPerson(BaseModel):
+    id: int
+    full_name: str
+
+class SaleHistoryProduct(BaseModel):
+    id: int
+    name: str
+    image_url: Optional[str] = None
+
+class SaleHistoryItem(BaseModel):
+    id: int
+    product_id: int
+    variation_id: Optional[int] = None
+    quantity: int
+    price_at_sale: float
+    product: Optional[SaleHistoryProduct] = None
+
+class SaleHistoryPayment(BaseModel):
+    id: int
+    payment_method: str
+    amount: float
+
+class SaleHistoryEntry(BaseModel):
+    id: int
+    created_at: datetime
+    total_amount: float
+    payment_method: str
+    user_id: int
+    customer_id: Optional[int] = None
+    user: Optional[SaleHistoryPerson] = None
+    customer: Optional[SaleHistoryPerson] = None
+    items: List[SaleHistoryItem] = []
+    payments: List[SaleHistoryPayment] = []
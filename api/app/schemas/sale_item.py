@@ -6,6 +6,7 @@ from .product import Product
 
 class SaleItemBase(BaseModel):
     product_id: int
+    variation_id: Optional[int] = Field(None, description="Variação (SKU) vendida, para produtos com grade.")
     quantity: int = Field(..., gt=0)
     price_at_sale: float = Field(..., gt=0)
 
@@ -1,6 +1,19 @@
 from pydantic import BaseModel, Field
 from typing import Optional
+from datetime import datetime
+
+from app.schemas.enums import StockAlertType
 
 class StockAdjustment(BaseModel):
     new_stock_level: int = Field(..., ge=0, description="A nova quantidade total em estoque para o produto.")
-    reason: str = Field(..., min_length=5, max_length=255, description="A justificativa para o ajuste de estoque.")
\ No newline at end of file
+    reason: str = Field(..., min_length=5, max_length=255, description="A justificativa para o ajuste de estoque.")
+
+class StockAlertEvent(BaseModel):
+    """ Evento emitido quando o estoque de um produto cruza o limite mínimo. """
+    alert_type: StockAlertType
+    product_id: int
+    product_name: str
+    store_id: int
+    current_stock: float
+    low_stock_threshold: int
+    created_at: datetime = Field(default_factory=datetime.now)
@@ -3,6 +3,8 @@ from typing import Optional, List
 from app.schemas.enums import TableStatus, TableShape
 from datetime import datetime
 
+from .wall import Wall, WallLayoutUpdate
+
 class TableBase(BaseModel):
     number: str
     capacity: int = Field(4, gt=0)
@@ -59,4 +61,13 @@ class TableLayoutUpdate(BaseModel):
     rotation: Optional[int] = None
 
 class TableLayoutUpdateRequest(BaseModel):
-    tables: List[TableLayoutUpdate]
\ No newline at end of file
+    tables: List[TableLayoutUpdate]
+
+# Salvamento do salão inteiro (mesas + paredes) numa única transação
+class FloorPlanLayoutUpdate(BaseModel):
+    tables: List[TableLayoutUpdate] = []
+    walls: List[WallLayoutUpdate] = []
+
+class FloorPlanLayout(BaseModel):
+    tables: List[Table] = []
+    walls: List[Wall] = []
@@ -33,4 +33,7 @@ class WallLayoutUpdate(BaseModel):
     id: int
     pos_x: int
     pos_y: int
-    rotation: int
\ No newline at end of file
+    rotation: int
+    # Tamanho é opcional: None mantém o valor atual
+    width: Optional[int] = Field(None, gt=0)
+    height: Optional[int] = Field(None, gt=0)
\ No newline at end of file
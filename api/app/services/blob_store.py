@@ -0,0 +1,214 @@
+# api/app/services/blob_store.py
+"""
+Armazenamento local de arquivos endereçado por conteúdo (capturas de tela dos chamados).
+
+Cada arquivo é gravado uma única vez com o nome igual ao SHA-256 do conteúdo
+(`<raiz>/ab/cd/abcd...`): a mesma imagem enviada em dois chamados ocupa um arquivo só,
+e o hash serve como ETag forte (o conteúdo de um nome nunca muda).
+
+As miniaturas (JPEG) ficam ao lado, em `<raiz>/thumbs/ab/abcd....jpg`, e são geradas
+num pool de threads dedicado: o Pillow libera o GIL durante o decode/resize, e o pool
+limitado evita que uma leva de uploads dispute a CPU com o resto da API.
+
+As URLs entregues ao painel são assinadas (HMAC com a SECRET_KEY e validade), porque
+<img src> não envia o header Authorization.
+"""
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import io
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+from loguru import logger
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.core.config import settings
+
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+DATA_URL_RE = re.compile(r"^data:(?P<content_type>[\w.+-]+/[\w.+-]+)?(;[\w-]+=[\w.-]+)*;base64,(?P<data>.*)$", re.DOTALL)
+ALLOWED_IMAGE_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp"}
+
+_thumbnail_executor = ThreadPoolExecutor(
+    max_workers=settings.THUMBNAIL_WORKERS, thread_name_prefix="thumbnail"
+)
+
+
+class StoredBlob(NamedTuple):
+    sha256: str
+    size: int
+
+
+class ImageInfo(NamedTuple):
+    content_type: str
+    width: Optional[int]
+    height: Optional[int]
+
+
+def decode_data_url(value: str) -> Tuple[bytes, Optional[str]]:
+    """
+    Converte uma imagem enviada pelo navegador (data URL base64, ou base64 puro) em bytes.
+    Retorna (conteúdo, content type declarado). Lança ValueError se não for base64 válido.
+    """
+    match = DATA_URL_RE.match(value.strip())
+    content_type, payload = (match.group("content_type"), match.group("data")) if match else (None, value)
+    try:
+        return base64.b64decode(payload, validate=True), content_type
+    except (binascii.Error, ValueError):
+        raise ValueError("Imagem em base64 inválida.")
+
+
+class BlobStore:
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    # --- Caminhos ---
+
+    @staticmethod
+    def is_valid_sha256(sha256: str) -> bool:
+        return bool(SHA256_RE.match(sha256))
+
+    def path(self, sha256: str) -> Path:
+        if not self.is_valid_sha256(sha256):
+            raise ValueError("Hash de arquivo inválido.")
+        return self.root / sha256[:2] / sha256[2:4] / sha256
+
+    def thumbnail_path(self, sha256: str) -> Path:
+        if not self.is_valid_sha256(sha256):
+            raise ValueError("Hash de arquivo inválido.")
+        return self.root / "thumbs" / sha256[:2] / f"{sha256}.jpg"
+
+    # --- Gravação (síncrona: chame pelas versões async dentro das rotas) ---
+
+    @staticmethod
+    def _write_atomic(target: Path, data: bytes) -> None:
+        """ Grava num temporário do mesmo diretório e renomeia: um leitor nunca vê arquivo pela metade. """
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_name, target)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+    def put(self, data: bytes) -> StoredBlob:
+        """ Grava o conteúdo (se ainda não existir) e retorna o hash. """
+        sha256 = hashlib.sha256(data).hexdigest()
+        target = self.path(sha256)
+        if not target.exists():
+            self._write_atomic(target, data)
+        return StoredBlob(sha256, len(data))
+
+    @staticmethod
+    def inspect_image(data: bytes) -> ImageInfo:
+        """
+        Tipo e dimensões reais da imagem (não confia no content type enviado). A imagem é
+        decodificada inteira: um arquivo truncado é recusado aqui, e não depois, na miniatura.
+        """
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                content_type = Image.MIME.get(image.format)
+                width, height = image.size
+                image.load()
+        except Image.DecompressionBombError:
+            raise ValueError("A imagem enviada tem dimensões grandes demais.")
+        except (UnidentifiedImageError, OSError):
+            raise ValueError("O arquivo enviado não é uma imagem válida.")
+        if content_type not in ALLOWED_IMAGE_TYPES:
+            raise ValueError("Formato de imagem não suportado (use PNG, JPEG, GIF ou WEBP).")
+        return ImageInfo(content_type, width, height)
+
+    def make_thumbnail(self, sha256: str) -> Path:
+        """
+        Gera a miniatura JPEG (se ainda não existir) e retorna o caminho. Lança ValueError se o
+        arquivo não for uma imagem (arquivos brutos vindos da migração dos chamados antigos).
+        """
+        target = self.thumbnail_path(sha256)
+        if target.exists():
+            return target
+        try:
+            image = Image.open(self.path(sha256))
+        except UnidentifiedImageError:
+            raise ValueError("O arquivo não é uma imagem: não há miniatura.")
+        with image:
+            image.seek(0)  # GIF animado: primeiro quadro
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((settings.THUMBNAIL_SIZE, settings.THUMBNAIL_SIZE))
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=80, optimize=True)
+        self._write_atomic(target, buffer.getvalue())
+        return target
+
+    # --- Versões assíncronas ---
+
+    async def put_image(self, data: bytes) -> Tuple[StoredBlob, ImageInfo]:
+        """ Valida e grava uma imagem fora do event loop. """
+        loop = asyncio.get_running_loop()
+
+        def _put() -> Tuple[StoredBlob, ImageInfo]:
+            info = self.inspect_image(data)
+            return self.put(data), info
+
+        return await loop.run_in_executor(_thumbnail_executor, _put)
+
+    async def ensure_thumbnail(self, sha256: str) -> Path:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_thumbnail_executor, self.make_thumbnail, sha256)
+
+    def schedule_thumbnails(self, hashes: Iterable[str]) -> None:
+        """
+        Enfileira as miniaturas no pool sem esperar (chamado depois do commit do chamado).
+        Se uma falhar, ela é gerada de novo na primeira vez que for pedida.
+        """
+        for sha256 in set(hashes):
+            future = _thumbnail_executor.submit(self.make_thumbnail, sha256)
+            future.add_done_callback(_log_thumbnail_error(sha256))
+
+    # --- URLs assinadas ---
+
+    @staticmethod
+    def _signature(sha256: str, variant: str, expires: int) -> str:
+        message = f"{sha256}:{variant}:{expires}".encode()
+        return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()[:32]
+
+    def signed_query(self, sha256: str, variant: str) -> str:
+        """
+        Query string `expires=...&sig=...` para a URL pública do arquivo. `expires` é arredondado para
+        cima até o fim da janela BLOB_URL_BUCKET_SECONDS: dentro dela a URL é a mesma em toda listagem
+        (e o navegador usa o cache), e a validade nunca fica menor que BLOB_URL_TTL_SECONDS.
+        """
+        bucket = max(1, settings.BLOB_URL_BUCKET_SECONDS)
+        expires = -(-(int(time.time()) + settings.BLOB_URL_TTL_SECONDS) // bucket) * bucket
+        return f"expires={expires}&sig={self._signature(sha256, variant, expires)}"
+
+    def verify_signature(self, sha256: str, variant: str, expires: int, sig: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._signature(sha256, variant, expires), sig)
+
+
+def _log_thumbnail_error(sha256: str):
+    def _callback(future) -> None:
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Erro ao gerar a miniatura do arquivo {sha256}: {error}")
+    return _callback
+
+
+blob_store = BlobStore(settings.BLOB_STORAGE_DIR)
@@ -1,18 +1,189 @@
 # api/app/services/cash_register_service.py
 
+from collections import defaultdict
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import update, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 from fastapi import HTTPException, status
 from loguru import logger
 from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
-from app.models.cash_register import CashRegister, CashRegisterTransaction, TransactionType, CashRegisterStatus
+from app.models.cash_register import CashRegister, CashRegisterBalance, CashRegisterTransaction, TransactionType, CashRegisterStatus
+from app.schemas.enums import PaymentMethod
 from app.crud import crud_cash_register
 from app.models.user import User
 from app.models.sale import Sale
 from app.schemas.cash_register import CashRegisterOpen, CashRegisterClose
 
+# Movimentações que não entram no saldo: o fechamento é uma contagem, não uma entrada/saída
+NON_LEDGER_TYPES = {TransactionType.CLOSING_BALANCE}
+
+
+def payment_method_value(method) -> str:
+    """ Normaliza a forma de pagamento (Enum ou str) para o valor gravado no banco. """
+    return getattr(method, "value", method) or PaymentMethod.OTHER.value
+
+
+def ledger_statements(cash_register_id: int, entries: List[Dict]) -> List:
+    """
+    Comandos que gravam as transações e atualizam o saldo corrente do caixa, na ordem:
+
+    1. UPDATE cash_registers SET current_balance = current_balance + :total, ... WHERE status = 'OPEN'
+       (trava a linha do caixa: um fechamento concorrente espera, e uma venda que chega
+       depois do fechamento não encontra a linha e é recusada);
+    2. INSERT das transações (um único comando);
+    3. INSERT ... ON CONFLICT DO UPDATE no saldo por forma de pagamento.
+
+    Todos rodam na transação de quem chamou, então saldo e transações são confirmados juntos.
+    `entries` são dicts com os campos de CashRegisterTransaction (amount com sinal).
+    """
+    ledger_total = 0.0
+    sales_total = 0.0
+    by_method: Dict[str, float] = defaultdict(float)
+    rows = []
+    for entry in entries:
+        row = {**entry, "cash_register_id": cash_register_id}
+        if row.get("payment_method") is not None:
+            row["payment_method"] = payment_method_value(row["payment_method"])
+        rows.append(row)
+        if row["transaction_type"] in NON_LEDGER_TYPES:
+            continue
+        ledger_total += row["amount"]
+        by_method[row.get("payment_method") or PaymentMethod.OTHER.value] += row["amount"]
+        if row["transaction_type"] == TransactionType.SALE_PAYMENT:
+            sales_total += row["amount"]
+
+    statements = [
+        update(CashRegister)
+        .where(CashRegister.id == cash_register_id, CashRegister.status == CashRegisterStatus.OPEN)
+        .values(
+            current_balance=CashRegister.current_balance + ledger_total,
+            total_sales=CashRegister.total_sales + sales_total,
+        )
+        .returning(CashRegister.current_balance, CashRegister.total_sales)
+        .execution_options(synchronize_session=False),
+        insert(CashRegisterTransaction).values(rows),
+    ]
+    if by_method:
+        upsert = pg_insert(CashRegisterBalance).values([
+            {"cash_register_id": cash_register_id, "payment_method": method, "amount": amount}
+            for method, amount in by_method.items()
+        ])
+        statements.append(
+            upsert.on_conflict_do_update(
+                constraint="uq_cash_register_balances_method",
+                set_={"amount": CashRegisterBalance.amount + upsert.excluded.amount},
+            )
+        )
+    return statements
+
+
+def _register_closed_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Operação falhou: o caixa foi fechado. Abra um novo caixa e tente novamente.",
+    )
+
+
+def _apply_ledger_result(register: Optional[CashRegister], result) -> None:
+    if result is None:
+        raise _register_closed_error()
+    if register is not None:
+        # Mesmo padrão do estoque: não marca como alterado, o flush não regrava um saldo velho
+        set_committed_value(register, "current_balance", result.current_balance)
+        set_committed_value(register, "total_sales", result.total_sales)
+
+
+class OpenRegisterCache:
+    """
+    Cache em memória (por processo) do ID do caixa aberto de cada loja.
+
+    Invalidado na abertura e no fechamento. Um ID velho (ex.: caixa fechado por outro
+    worker) nunca grava nada: o UPDATE do ledger só afeta caixas OPEN, e quem usa o
+    cache descarta a entrada e resolve de novo nesse caso.
+    """
+
+    def __init__(self):
+        self._ids: Dict[int, int] = {}
+
+    def get(self, store_id: int) -> Optional[int]:
+        return self._ids.get(store_id)
+
+    def set(self, store_id: int, cash_register_id: int) -> None:
+        self._ids[store_id] = cash_register_id
+
+    def invalidate(self, store_id: int) -> None:
+        self._ids.pop(store_id, None)
+
+
+open_register_cache = OpenRegisterCache()
+
+
+def open_register_id_query(store_id: int):
+    """ Só o ID do caixa aberto (usa o índice único parcial uq_cash_registers_open_store). """
+    return select(CashRegister.id).where(
+        CashRegister.store_id == store_id,
+        CashRegister.status == CashRegisterStatus.OPEN
+    )
+
+
 class CashRegisterService:
+
+    def resolve_open_register_id(self, db: Session, *, store_id: int, use_cache: bool = True) -> int:
+        """
+        ID do caixa aberto da loja, sem carregar o objeto CashRegister.
+        Levanta 400 se não houver caixa aberto (a ausência não é cacheada).
+        """
+        if use_cache:
+            cached_id = open_register_cache.get(store_id)
+            if cached_id is not None:
+                return cached_id
+
+        register_id = db.execute(open_register_id_query(store_id)).scalar_one_or_none()
+        if register_id is None:
+            logger.warning(f"Tentativa de operação em caixa, mas nenhum caixa aberto foi encontrado para a loja ID {store_id}.")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Operação falhou: Nenhum caixa aberto encontrado para a loja ID {store_id}.",
+            )
+        open_register_cache.set(store_id, register_id)
+        return register_id
+
+    def _execute_ledger(
+        self, db: Session, *, cash_register_id: int, entries: List[Dict], register: Optional[CashRegister] = None
+    ) -> bool:
+        """ Executa os comandos do ledger. Retorna False (sem gravar nada) se o caixa não está mais aberto. """
+        update_stmt, *other_statements = ledger_statements(cash_register_id, entries)
+        result = db.execute(update_stmt).first()
+        if result is None:
+            return False
+        _apply_ledger_result(register, result)
+        for stmt in other_statements:
+            db.execute(stmt)
+        if register is not None:
+            db.expire(register, ["balances"])
+        return True
+
+    def record_transactions(
+        self, db: Session, *, cash_register_id: int, entries: List[Dict], register: Optional[CashRegister] = None
+    ) -> None:
+        """ Grava transações e atualiza o saldo corrente do caixa (sessão síncrona). Não faz commit. """
+        if not self._execute_ledger(db, cash_register_id=cash_register_id, entries=entries, register=register):
+            raise _register_closed_error()
+
+    async def record_transactions_async(
+        self, db: AsyncSession, *, cash_register_id: int, entries: List[Dict], register: Optional[CashRegister] = None
+    ) -> None:
+        """ Grava transações e atualiza o saldo corrente do caixa (sessão assíncrona). Não faz commit. """
+        update_stmt, *other_statements = ledger_statements(cash_register_id, entries)
+        _apply_ledger_result(register, (await db.execute(update_stmt)).first())
+        for stmt in other_statements:
+            await db.execute(stmt)
+        if register is not None:
+            db.expire(register, ["balances"])
     
     def get_open_register(self, db: Session, *, store_id: int) -> CashRegister:
         """Busca o caixa aberto para uma loja específica. Levanta uma exceção se não encontrar."""
@@ -40,16 +211,16 @@ class CashRegisterService:
         db.add(cash_register_obj)
         db.flush()
         
-        opening_transaction = CashRegisterTransaction(
-            cash_register_id=cash_register_obj.id,
-            transaction_type=TransactionType.SUPPLY,
-            amount=open_info.opening_balance,
-            description="Saldo de abertura do caixa"
-        )
-        db.add(opening_transaction)
+        self.record_transactions(db, cash_register_id=cash_register_obj.id, register=cash_register_obj, entries=[{
+            "transaction_type": TransactionType.SUPPLY,
+            "amount": open_info.opening_balance,
+            "payment_method": PaymentMethod.CASH,
+            "description": "Saldo de abertura do caixa",
+        }])
         
         db.commit()
         db.refresh(cash_register_obj)
+        open_register_cache.invalidate(user.store_id)
         
         return cash_register_obj
 
@@ -57,57 +228,75 @@ class CashRegisterService:
         """
         Registra os pagamentos de uma venda como transações no caixa aberto.
         """
-        open_register = self.get_open_register(db, store_id=sale.store_id)
-
-        for payment in sale.payments:
-            transaction = CashRegisterTransaction(
-                cash_register_id=open_register.id,
-                sale_id=sale.id,
-                transaction_type=TransactionType.SALE_PAYMENT,
-                amount=payment.amount,
-                description=f"Pagamento da Venda #{sale.id} via {payment.payment_method}"
-            )
-            db.add(transaction)
-        
-        # --- CORREÇÃO AQUI ---
-        # A linha db.flush() foi removida.
-        logger.info(f"Transações de pagamento para a Venda ID {sale.id} adicionadas ao Caixa ID {open_register.id}.")
+        register_id = self.add_sales_transactions(
+            db, store_id=sale.store_id, payments=[(sale.id, payment) for payment in sale.payments]
+        )
+        logger.info(f"Transações de pagamento para a Venda ID {sale.id} adicionadas ao Caixa ID {register_id}.")
+
+    def add_sales_transactions(self, db: Session, *, store_id: int, payments: List[Tuple[int, Any]]) -> int:
+        """
+        Registra os pagamentos de uma ou mais vendas da loja no caixa aberto com um único
+        lançamento no ledger (um UPDATE no caixa e um INSERT com todas as transações).
+        `payments` são pares (sale_id, pagamento), onde o pagamento tem `amount` e `payment_method`.
+        Retorna o ID do caixa usado.
+        """
+        entries = [
+            {
+                "sale_id": sale_id,
+                "transaction_type": TransactionType.SALE_PAYMENT,
+                "amount": payment.amount,
+                "payment_method": payment.payment_method,
+                "description": f"Pagamento da Venda #{sale_id} via {payment_method_value(payment.payment_method)}",
+            }
+            for sale_id, payment in payments
+        ]
+        # Só o ID do caixa (cacheado por loja): nada do caixa nem das suas transações é carregado
+        register_id = self.resolve_open_register_id(db, store_id=store_id)
+        if entries and not self._execute_ledger(db, cash_register_id=register_id, entries=entries):
+            # O caixa do cache foi fechado (talvez por outro worker): resolve de novo uma única vez
+            open_register_cache.invalidate(store_id)
+            register_id = self.resolve_open_register_id(db, store_id=store_id, use_cache=False)
+            self.record_transactions(db, cash_register_id=register_id, entries=entries)
+        return register_id
 
     def close_register(self, db: Session, *, user: User, close_info: CashRegisterClose) -> CashRegister:
         """
         Fecha o caixa aberto, calculando o saldo esperado e a diferença.
         """
         open_register = self.get_open_register(db, store_id=user.store_id)
-
-        total_transactions = (
-            db.query(func.sum(CashRegisterTransaction.amount))
-            .filter(CashRegisterTransaction.cash_register_id == open_register.id)
-            .scalar()
-        ) or 0.0
-
-        expected_balance = total_transactions
-
-        open_register.closing_balance = close_info.closing_balance
-        open_register.expected_balance = expected_balance
-        open_register.balance_difference = close_info.closing_balance - expected_balance
-        open_register.status = CashRegisterStatus.CLOSED
-        open_register.closed_at = datetime.utcnow()
-        
-        db.add(open_register)
-        
-        closing_transaction = CashRegisterTransaction(
-            cash_register_id=open_register.id,
-            transaction_type=TransactionType.CLOSING_BALANCE,
-            amount=close_info.closing_balance,
-            description=f"Fechamento do caixa. Esperado: {expected_balance:.2f}, Diferença: {open_register.balance_difference:.2f}"
-        )
-        db.add(closing_transaction)
+        # Trava o caixa: nenhuma venda altera o saldo entre a leitura e o fechamento
+        db.refresh(open_register, with_for_update=True)
+        self.apply_close(db, register=open_register, close_info=close_info)
         
         db.commit()
         db.refresh(open_register)
+        open_register_cache.invalidate(user.store_id)
         
-        logger.info(f"Caixa ID {open_register.id} fechado. Esperado: {expected_balance:.2f}, Fechado com: {close_info.closing_balance:.2f}, Diferença: {open_register.balance_difference:.2f}")
+        logger.info(f"Caixa ID {open_register.id} fechado. Esperado: {open_register.expected_balance:.2f}, Fechado com: {close_info.closing_balance:.2f}, Diferença: {open_register.balance_difference:.2f}")
 
         return open_register
 
+    def apply_close(self, db: Session | AsyncSession, *, register: CashRegister, close_info: CashRegisterClose) -> None:
+        """
+        Fecha um caixa já travado pelo chamador usando o saldo corrente (O(1), sem somar
+        transações). Serve para as sessões síncrona e assíncrona. Não faz commit.
+        """
+        expected_balance = register.current_balance or 0.0
+
+        register.closing_balance = close_info.closing_balance
+        register.expected_balance = expected_balance
+        register.balance_difference = close_info.closing_balance - expected_balance
+        register.status = CashRegisterStatus.CLOSED
+        register.closed_at = datetime.utcnow()
+        db.add(register)
+
+        # A contagem da gaveta fica no histórico, mas não entra no saldo (NON_LEDGER_TYPES)
+        db.add(CashRegisterTransaction(
+            cash_register_id=register.id,
+            transaction_type=TransactionType.CLOSING_BALANCE,
+            amount=close_info.closing_balance,
+            payment_method=PaymentMethod.CASH.value,
+            description=f"Fechamento do caixa. Esperado: {expected_balance:.2f}, Diferença: {register.balance_difference:.2f}"
+        ))
+
 cash_register_service = CashRegisterService()
\ No newline at end of file
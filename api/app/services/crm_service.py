@@ -1,5 +1,7 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import update, select, values, column, cast, func, Integer, Float
 from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
 
 from app.models.customer import Customer
 from app.models.sale import Sale
@@ -37,5 +39,52 @@ class CRMService:
         # Adiciona o objeto modificado à sessão. O commit será feito pelo chamador.
         db.add(customer)
 
+    def update_customer_stats_from_sales(
+        self, db: Session, *, sales: Iterable[Tuple[Optional[int], float]]
+    ) -> None:
+        """
+        Mesmas regras de update_customer_stats_from_sale para várias vendas de uma vez.
+        `sales` são pares (customer_id, total_amount); agrupa por cliente e aplica tudo com
+        um único UPDATE ... FROM (VALUES ...). Os pontos são calculados venda a venda
+        (1 ponto a cada R$ 10 de cada venda), como no fluxo unitário.
+        """
+        stats: Dict[int, list] = {}
+        for customer_id, total_amount in sales:
+            if not customer_id:
+                continue
+            customer_stats = stats.setdefault(customer_id, [0.0, 0])
+            customer_stats[0] += total_amount
+            customer_stats[1] += int(total_amount // 10)
+        if not stats:
+            return
+
+        stats_values = values(
+            column("customer_id", Integer),
+            column("total", Float),
+            column("points", Integer),
+            name="stats_values",
+        ).data([(customer_id, total, points) for customer_id, (total, points) in stats.items()])
+        stats_cte = select(
+            cast(stats_values.c.customer_id, Integer).label("customer_id"),
+            cast(stats_values.c.total, Float).label("total"),
+            cast(stats_values.c.points, Integer).label("points"),
+        ).cte("customer_stats")
+
+        db.execute(
+            update(Customer)
+            .where(Customer.id == stats_cte.c.customer_id)
+            .values(
+                total_spent=func.coalesce(Customer.total_spent, 0) + stats_cte.c.total,
+                loyalty_points=func.coalesce(Customer.loyalty_points, 0) + stats_cte.c.points,
+                last_seen=datetime.utcnow(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        # Clientes já carregados na sessão não podem ficar com os totais antigos
+        for customer_id in stats:
+            customer = db.identity_map.get(db.identity_key(Customer, customer_id))
+            if customer is not None:
+                db.expire(customer, ["total_spent", "loyalty_points", "last_seen"])
+
 # Instância única do serviço para ser usada na aplicação
 crm_service = CRMService()
\ No newline at end of file
@@ -0,0 +1,210 @@
+# api/app/services/reservation_service.py
+import asyncio
+import contextlib
+import heapq
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.crud.crud_reservation import reservation as crud_reservation
+from app.db.session import AsyncSessionLocal, async_engine
+
+# Chave do pg_advisory_lock que elege o worker responsável pelas transições das reservas
+SCHEDULER_LOCK_KEY = 7_421_003
+
+ACTIVATE = "activate"
+EXPIRE = "expire"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _transitions(reservation_time: datetime, end_time: datetime) -> Iterable[Tuple[datetime, str]]:
+    """ Ativação na virada do dia da reserva (mesmo critério de "hoje" do CRUD, em UTC) e expiração no fim. """
+    start = reservation_time.astimezone(timezone.utc)
+    yield start.replace(hour=0, minute=0, second=0, microsecond=0), ACTIVATE
+    yield end_time.astimezone(timezone.utc), EXPIRE
+
+
+class ReservationScheduler:
+    """
+    Aplica as transições das reservas na hora em que vencem, em vez de a cada leitura de
+    /tables ou /reservations:
+    - ativação: na virada do dia da reserva a mesa DISPONÍVEL passa a RESERVADA;
+    - expiração: no fim do período a reserva é apagada e a mesa é liberada.
+
+    Cada loja tem um min-heap das próximas transições e o laço dorme até a mais próxima (ou até
+    uma reserva nova entrar no heap). A cada releitura a ativação do dia roda de novo para todas
+    as lojas: cobre a mesa que estava OCUPADA na virada do dia e foi liberada por um caminho que
+    não passa por `crud_reservation.status_after_release`. Com vários workers só o que segura o
+    pg_advisory_lock roda as transições; os outros tentam assumir a liderança a cada `resync_seconds`.
+    """
+
+    def __init__(self, resync_seconds: float):
+        self.resync_seconds = resync_seconds
+        self._heaps: Dict[int, List[Tuple[datetime, str]]] = {}
+        self._lock_conn: Optional[AsyncConnection] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_conn is not None
+
+    # --- Liderança (um worker por banco) ---
+
+    async def _try_acquire_leadership(self) -> bool:
+        # O lock é de sessão: a conexão fica reservada enquanto este worker for o líder
+        conn = await async_engine.connect()
+        try:
+            acquired = await conn.scalar(select(func.pg_try_advisory_lock(SCHEDULER_LOCK_KEY)))
+            await conn.commit()
+        except Exception:
+            await conn.close()
+            raise
+        if not acquired:
+            await conn.close()
+            return False
+        self._lock_conn = conn
+        logger.info("Agendador de reservas: este worker assumiu as transições das reservas.")
+        return True
+
+    async def _check_leadership(self) -> None:
+        # Se a conexão caiu, o Postgres já soltou o lock: o erro devolve a liderança
+        await self._lock_conn.execute(select(1))
+        await self._lock_conn.commit()
+
+    async def _release_leadership(self) -> None:
+        conn, self._lock_conn = self._lock_conn, None
+        self._heaps.clear()
+        if conn is None:
+            return
+        try:
+            await conn.execute(select(func.pg_advisory_unlock_all()))
+            await conn.commit()
+        except Exception:
+            # Conexão quebrada: o Postgres solta o lock sozinho quando a sessão cai
+            with contextlib.suppress(Exception):
+                await conn.invalidate()
+        finally:
+            with contextlib.suppress(Exception):
+                await conn.close()
+
+    # --- Heap de transições ---
+
+    def _push(self, store_id: int, due: datetime, kind: str) -> None:
+        heapq.heappush(self._heaps.setdefault(store_id, []), (due, kind))
+
+    def track(self, reservation) -> None:
+        """
+        Coloca no heap uma reserva recém-criada, sem esperar a próxima releitura do banco.
+        Num worker que não é o líder não faz nada: o líder a encontra na releitura.
+        """
+        if not self.is_leader:
+            return
+        now = _utcnow()
+        for due, kind in _transitions(reservation.reservation_time, reservation.end_time):
+            if due > now:
+                self._push(reservation.store_id, due, kind)
+        self._wakeup.set()
+
+    async def _resync(self, now: datetime) -> None:
+        # Janela maior que o intervalo: nada vence entre duas releituras sem estar no heap
+        until = now + timedelta(seconds=2 * self.resync_seconds)
+        async with AsyncSessionLocal() as db:
+            rows = await crud_reservation.get_upcoming_transitions(db, now=now, until=until)
+        self._heaps.clear()
+        for store_id, reservation_time, end_time in rows:
+            for due, kind in _transitions(reservation_time, end_time):
+                if now < due <= until:
+                    self._push(store_id, due, kind)
+
+    def _next_due(self) -> Optional[datetime]:
+        return min((heap[0][0] for heap in self._heaps.values() if heap), default=None)
+
+    async def _apply(self, store_id: Optional[int], now: datetime, kinds: Set[str]) -> None:
+        async with AsyncSessionLocal() as db:
+            if EXPIRE in kinds:
+                await crud_reservation.expire_finished(db, now=now, store_id=store_id)
+            if ACTIVATE in kinds:
+                await crud_reservation.activate_todays_reservations(db, now=now, store_id=store_id)
+
+    async def _apply_due(self, now: datetime) -> None:
+        for store_id, heap in list(self._heaps.items()):
+            kinds = set()
+            while heap and heap[0][0] <= now:
+                kinds.add(heapq.heappop(heap)[1])
+            if kinds:
+                # Várias reservas vencendo juntas na mesma loja: um único DELETE/UPDATE
+                await self._apply(store_id, now, kinds)
+            if not heap:
+                del self._heaps[store_id]
+
+    # --- Laço principal ---
+
+    async def _run(self) -> None:
+        next_resync = _utcnow()
+        while True:
+            try:
+                now = _utcnow()
+                if not self.is_leader:
+                    if not await self._try_acquire_leadership():
+                        await asyncio.sleep(self.resync_seconds)
+                        continue
+                    # O que venceu sem líder (deploy, queda do worker anterior) é aplicado já;
+                    # a ativação roda na releitura logo abaixo
+                    await self._apply(None, now, {EXPIRE})
+                    next_resync = now
+                if now >= next_resync:
+                    await self._check_leadership()
+                    await self._resync(now)
+                    await self._apply(None, now, {ACTIVATE})
+                    next_resync = now + timedelta(seconds=self.resync_seconds)
+                await self._apply_due(now)
+
+                # Sem await entre o clear() e a espera: um track() no meio não se perde
+                self._wakeup.clear()
+                due = min(self._next_due() or next_resync, next_resync)
+                timeout = max(0.0, (due - _utcnow()).total_seconds())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # O stop() cancelou no meio de uma chamada ao banco e o driver trocou o
+                # CancelledError por outro erro: o cancelamento não pode se perder aqui
+                if self._stopping:
+                    raise asyncio.CancelledError() from e
+                # Um erro (ex.: banco fora do ar) não pode matar a tarefa: larga a liderança e tenta de novo
+                logger.opt(exception=e).error("Erro no agendador de reservas.")
+                try:
+                    await self._release_leadership()
+                except Exception as release_error:
+                    logger.opt(exception=release_error).error("Erro ao largar a liderança do agendador de reservas.")
+                await asyncio.sleep(self.resync_seconds)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._run(), name="reservation-scheduler")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._stopping = True
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._release_leadership()
+
+
+reservation_service = ReservationScheduler(settings.RESERVATION_SCHEDULER_RESYNC_SECONDS)
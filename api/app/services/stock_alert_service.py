@@ -0,0 +1,118 @@
+from typing import Callable, List, Optional, Union
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from app.models.product import Product
+from app.schemas.enums import StockAlertType
+from app.schemas.stock import StockAlertEvent
+
+# Chave usada em `session.info` para acumular os alertas até o commit
+PENDING_ALERTS_KEY = "pending_stock_alerts"
+
+StockAlertHandler = Callable[[StockAlertEvent], None]
+
+
+class StockAlertService:
+    """
+    Detecta quando o estoque de um produto cruza o limite mínimo (nas duas direções)
+    e emite um StockAlertEvent para os assinantes.
+
+    Os eventos ficam pendentes na sessão e só são despachados depois do commit,
+    assim um rollback nunca gera um alerta de algo que não aconteceu.
+    """
+
+    def __init__(self):
+        self._handlers: List[StockAlertHandler] = []
+
+    def subscribe(self, handler: StockAlertHandler) -> StockAlertHandler:
+        """ Registra uma função que será chamada a cada alerta emitido. """
+        self._handlers.append(handler)
+        return handler
+
+    def check_threshold(
+        self,
+        db: Union[Session, AsyncSession],
+        *,
+        product: Product,
+        previous_stock: float
+    ) -> None:
+        """
+        Compara o estoque anterior com o atual e, se o limite mínimo foi cruzado,
+        enfileira o evento na sessão. Deve ser chamado por todo caminho que altera `product.stock`.
+        """
+        self.check_threshold_values(
+            db,
+            product_id=product.id,
+            product_name=product.name,
+            store_id=product.store_id,
+            current_stock=product.stock,
+            low_stock_threshold=product.low_stock_threshold,
+            previous_stock=previous_stock,
+        )
+
+    def check_threshold_values(
+        self,
+        db: Union[Session, AsyncSession],
+        *,
+        product_id: int,
+        product_name: str,
+        store_id: int,
+        current_stock: float,
+        low_stock_threshold: Optional[int],
+        previous_stock: float
+    ) -> None:
+        """ Mesma verificação de check_threshold, para quem só tem as colunas (ex.: RETURNING de um UPDATE em lote). """
+        threshold = low_stock_threshold or 0
+        was_low = (previous_stock or 0) <= threshold
+        is_low = (current_stock or 0) <= threshold
+
+        if was_low == is_low:
+            return
+
+        alert = StockAlertEvent(
+            alert_type=StockAlertType.LOW_STOCK if is_low else StockAlertType.RESTOCKED,
+            product_id=product_id,
+            product_name=product_name,
+            store_id=store_id,
+            current_stock=current_stock,
+            low_stock_threshold=threshold,
+        )
+        db.info.setdefault(PENDING_ALERTS_KEY, []).append(alert)
+
+    def _dispatch(self, session: Session) -> None:
+        alerts = session.info.pop(PENDING_ALERTS_KEY, None)
+        if not alerts:
+            return
+        for alert in alerts:
+            for handler in self._handlers:
+                try:
+                    handler(alert)
+                except Exception as e:
+                    # Um assinante com defeito não pode derrubar o commit de uma venda
+                    logger.error(f"Erro ao processar alerta de estoque do produto ID {alert.product_id}: {e}")
+
+    def _discard(self, session: Session) -> None:
+        session.info.pop(PENDING_ALERTS_KEY, None)
+
+
+stock_alert_service = StockAlertService()
+
+# A AsyncSession delega para uma Session síncrona, então um único listener cobre os dois casos.
+event.listen(Session, "after_commit", stock_alert_service._dispatch)
+event.listen(Session, "after_soft_rollback", lambda session, previous_transaction: stock_alert_service._discard(session))
+
+
+@stock_alert_service.subscribe
+def _log_stock_alert(alert: StockAlertEvent) -> None:
+    if alert.alert_type == StockAlertType.LOW_STOCK:
+        logger.warning(
+            f"Estoque baixo para o produto ID {alert.product_id} ('{alert.product_name}'). "
+            f"Estoque atual: {alert.current_stock}, Limite: {alert.low_stock_threshold}."
+        )
+    else:
+        logger.info(
+            f"Estoque do produto ID {alert.product_id} ('{alert.product_name}') normalizado. "
+            f"Estoque atual: {alert.current_stock}, Limite: {alert.low_stock_threshold}."
+        )
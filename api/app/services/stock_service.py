@@ -1,13 +1,64 @@
 # api/app/services/stock_service.py
-from sqlalchemy.orm import Session
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple, Type
+from sqlalchemy import update, select, insert, values, column, func, cast, Integer, Float
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
 from app.models.sale import Sale
 from app.models.product import Product
+from app.models.variation import ProductVariation
+from app.models.batch import ProductBatch, SaleBatchAllocation
 from app.models.user import User
 from app.models.stock_movement import StockMovement, MovementType
+from app.services.stock_alert_service import stock_alert_service
+
+def stock_increment_statement(model: Type, row_id: int, delta: float, column: str = "stock"):
+    """
+    UPDATE <tabela> SET <coluna> = <coluna> + :delta WHERE id = :id RETURNING <coluna>
+
+    A soma é feita pelo Postgres sob o lock de linha do próprio UPDATE: duas vendas
+    simultâneas do mesmo item não se sobrescrevem, e cada uma recebe de volta o saldo
+    exato logo após a sua alteração. Serve para produtos, variações, lotes (`quantity`) e insumos.
+    """
+    target = getattr(model, column)
+    return (
+        update(model)
+        .where(model.id == row_id)
+        .values({target: target + delta})
+        .returning(target)
+        # O objeto já carregado na sessão é sincronizado com o valor retornado (ver _sync_instance)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _sync_instance(instance, column: str, value) -> None:
+    # set_committed_value não marca o atributo como alterado, então um flush posterior
+    # nunca regrava um saldo antigo por cima do incremento atômico.
+    if instance is not None and value is not None:
+        set_committed_value(instance, column, value)
+
 
 class StockService:
+    def apply_increment(
+        self, db: Session, *, model: Type, row_id: int, delta: float, column: str = "stock", instance=None
+    ) -> Optional[float]:
+        """ Incremento atômico (sessão síncrona). Retorna o novo saldo ou None se a linha não existe. """
+        new_value = db.execute(stock_increment_statement(model, row_id, delta, column)).scalar_one_or_none()
+        _sync_instance(instance, column, new_value)
+        return new_value
+
+    async def apply_increment_async(
+        self, db: AsyncSession, *, model: Type, row_id: int, delta: float, column: str = "stock", instance=None
+    ) -> Optional[float]:
+        """ Incremento atômico (sessão assíncrona). Retorna o novo saldo ou None se a linha não existe. """
+        result = await db.execute(stock_increment_statement(model, row_id, delta, column))
+        new_value = result.scalar_one_or_none()
+        _sync_instance(instance, column, new_value)
+        return new_value
+
     def _create_stock_movement(
         self,
         db: Session,
@@ -22,14 +73,10 @@ class StockService:
         Método privado central para criar um registro de movimentação de estoque
         e atualizar o estoque do produto.
         """
-        product.stock += quantity_change
-        
         # --- CORREÇÃO AQUI ---
         # A trava que impedia o estoque de ficar negativo foi removida.
-        # if product.stock < 0:
-        #     product.stock = 0
-            
-        db.add(product)
+        new_stock = self.apply_increment(db, model=Product, row_id=product.id, delta=quantity_change, instance=product)
+        previous_stock = new_stock - quantity_change
         # O commit será feito pela função que chama o serviço
 
         movement = StockMovement(
@@ -37,40 +84,303 @@ class StockService:
             user_id=user_id,
             movement_type=movement_type,
             quantity=quantity_change,
-            stock_after_movement=product.stock,
+            stock_after_movement=new_stock,
             reason=reason,
             store_id=product.store_id # Garante que o store_id seja salvo
         )
         db.add(movement)
         
-        if product.stock <= product.low_stock_threshold:
-            logger.warning(
-                f"Estoque baixo para o produto ID {product.id} ('{product.name}'). "
-                f"Estoque atual: {product.stock}, Limite: {product.low_stock_threshold}."
-            )
-            
+        # Emite o alerta apenas quando o limite mínimo é cruzado (despachado após o commit)
+        stock_alert_service.check_threshold(db, product=product, previous_stock=previous_stock)
+
         return movement
 
+    def _sync_loaded(self, db: Session, model: Type, row_id: int, column: str, value) -> None:
+        """ Atualiza o objeto na identity map (se já estiver carregado) com o valor vindo do banco. """
+        _sync_instance(db.identity_map.get(db.identity_key(model, row_id)), column, value)
+
+    def apply_sale_deltas(
+        self, db: Session, *, store_id: int, deltas: Dict[Tuple[int, Optional[int]], int]
+    ) -> List:
+        """
+        Aplica em UM único comando os deltas de estoque por (produto, variação):
+
+            WITH deltas(product_id, variation_id, delta) AS (VALUES ...),
+                 variation_updates AS (UPDATE product_variations ... RETURNING ...),
+                 product_updates AS (UPDATE products ... RETURNING ...)
+            SELECT ... FROM product_updates LEFT JOIN variation_updates ...
+
+        A variação recebe o delta da sua linha e o produto pai recebe a soma de todas as
+        linhas dele, mantendo o estoque agregado coerente com o das variações.
+        O custo é o mesmo para 1 ou 1000 SKUs (nenhuma consulta por linha).
+        Retorna uma linha por (produto, variação) afetado.
+        """
+        products = Product.__table__
+        variations = ProductVariation.__table__
+        owner = aliased(products, name="owner")
+
+        deltas_values = values(
+            column("product_id", Integer),
+            column("variation_id", Integer),
+            column("delta", Integer),
+            name="deltas_values",
+        ).data([(product_id, variation_id, delta) for (product_id, variation_id), delta in deltas.items()])
+        # CAST explícito: uma coluna só com NULL no VALUES seria inferida como text pelo Postgres
+        deltas_cte = (
+            select(
+                cast(deltas_values.c.product_id, Integer).label("product_id"),
+                cast(deltas_values.c.variation_id, Integer).label("variation_id"),
+                cast(deltas_values.c.delta, Integer).label("delta"),
+            )
+            .cte("deltas")
+        )
+
+        variation_updates = (
+            update(variations)
+            .where(
+                variations.c.id == deltas_cte.c.variation_id,
+                variations.c.product_id == deltas_cte.c.product_id,
+                # A variação só é alterada se o produto pai for da loja da venda
+                owner.c.id == variations.c.product_id,
+                owner.c.store_id == store_id,
+            )
+            .values(stock=variations.c.stock + deltas_cte.c.delta)
+            .returning(variations.c.id, variations.c.product_id, variations.c.stock)
+            .cte("variation_updates")
+        )
+
+        product_totals = (
+            select(deltas_cte.c.product_id, func.sum(deltas_cte.c.delta).label("delta"))
+            .group_by(deltas_cte.c.product_id)
+            .subquery("product_totals")
+        )
+        product_updates = (
+            update(products)
+            .where(products.c.id == product_totals.c.product_id, products.c.store_id == store_id)
+            .values(stock=products.c.stock + product_totals.c.delta)
+            .returning(
+                products.c.id, products.c.name, products.c.store_id,
+                products.c.stock, products.c.low_stock_threshold, product_totals.c.delta
+            )
+            .cte("product_updates")
+        )
+
+        stmt = select(
+            product_updates,
+            variation_updates.c.id.label("variation_id"),
+            variation_updates.c.stock.label("variation_stock"),
+        ).select_from(
+            product_updates.outerjoin(variation_updates, variation_updates.c.product_id == product_updates.c.id)
+        )
+        return db.execute(stmt).all()
+
+    def consume_batches_fefo(
+        self, db: Session, *, store_id: int, demand: Dict[Tuple[int, int], float]
+    ) -> List:
+        """
+        Consome os lotes de uma ou mais vendas em ordem de vencimento (FEFO) com UM único comando.
+        `demand` é {(sale_id, product_id): quantidade}.
+
+            WITH demand(sale_id, product_id, quantity) AS (VALUES ...),
+                 demand_ranges AS (faixa [início, fim) de cada venda na fila do produto, por sale_id),
+                 batch_ranges  AS (faixa [início, fim) de cada lote, por expiration_date, id),
+                 allocations   AS (interseção das faixas: quanto cada lote entrega a cada venda),
+                 consumed AS (UPDATE product_batches ... RETURNING ...)
+            INSERT INTO sale_batch_allocations ... SELECT ... FROM allocations JOIN consumed RETURNING ...
+
+        As somas acumuladas (window functions) colocam lotes e vendas na mesma "régua" por produto:
+        um lote que vai de 3 a 8 e uma venda que vai de 5 a 10 se cruzam em 3 unidades.
+        Lotes sem validade ficam por último. Se os lotes não cobrem a demanda, o restante é
+        tratado como estoque sem lote.
+
+        Deve rodar DEPOIS do UPDATE em `products` da mesma transação: o lock de linha do
+        produto serializa vendas concorrentes do mesmo item, e como cada comando enxerga
+        os dados já confirmados, a soma acumulada nunca é calculada sobre um saldo antigo.
+        Retorna uma linha por (venda, lote) consumido.
+        """
+        if not demand:
+            return []
+        batches = ProductBatch.__table__
+        allocations_table = SaleBatchAllocation.__table__
+
+        demand_values = values(
+            column("sale_id", Integer),
+            column("product_id", Integer),
+            column("quantity", Float),
+            name="demand_values",
+        ).data([(sale_id, product_id, quantity) for (sale_id, product_id), quantity in demand.items()])
+        demand_cte = (
+            select(
+                cast(demand_values.c.sale_id, Integer).label("sale_id"),
+                cast(demand_values.c.product_id, Integer).label("product_id"),
+                cast(demand_values.c.quantity, Float).label("quantity"),
+            )
+            .cte("demand")
+        )
+
+        demand_total = func.sum(demand_cte.c.quantity).over(
+            partition_by=demand_cte.c.product_id, order_by=demand_cte.c.sale_id
+        )
+        demand_ranges = (
+            select(
+                demand_cte.c.sale_id,
+                demand_cte.c.product_id,
+                (demand_total - demand_cte.c.quantity).label("range_start"),
+                demand_total.label("range_end"),
+            )
+            .cte("demand_ranges")
+        )
+        batch_total = func.sum(batches.c.quantity).over(
+            partition_by=batches.c.product_id,
+            order_by=(batches.c.expiration_date.asc().nulls_last(), batches.c.id),
+        )
+        batch_ranges = (
+            select(
+                batches.c.id,
+                batches.c.product_id,
+                (batch_total - batches.c.quantity).label("range_start"),
+                batch_total.label("range_end"),
+            )
+            .where(
+                batches.c.store_id == store_id,
+                batches.c.quantity > 0,
+                batches.c.product_id.in_(select(demand_cte.c.product_id)),
+            )
+            .cte("batch_ranges")
+        )
+        allocations = (
+            select(
+                demand_ranges.c.sale_id,
+                batch_ranges.c.id.label("batch_id"),
+                batch_ranges.c.product_id,
+                (
+                    func.least(batch_ranges.c.range_end, demand_ranges.c.range_end)
+                    - func.greatest(batch_ranges.c.range_start, demand_ranges.c.range_start)
+                ).label("take"),
+            )
+            .join_from(
+                batch_ranges,
+                demand_ranges,
+                (demand_ranges.c.product_id == batch_ranges.c.product_id)
+                & (batch_ranges.c.range_start < demand_ranges.c.range_end)
+                & (demand_ranges.c.range_start < batch_ranges.c.range_end),
+            )
+            .cte("allocations")
+        )
+        batch_takes = (
+            select(allocations.c.batch_id, func.sum(allocations.c.take).label("take"))
+            .group_by(allocations.c.batch_id)
+            .cte("batch_takes")
+        )
+        consumed = (
+            update(batches)
+            .where(batches.c.id == batch_takes.c.batch_id)
+            .values(quantity=batches.c.quantity - batch_takes.c.take)
+            .returning(batches.c.id)
+            .cte("consumed")
+        )
+        stmt = (
+            insert(allocations_table)
+            .from_select(
+                ["sale_id", "batch_id", "product_id", "quantity"],
+                select(allocations.c.sale_id, allocations.c.batch_id, allocations.c.product_id, allocations.c.take)
+                .join_from(allocations, consumed, consumed.c.id == allocations.c.batch_id),
+            )
+            .returning(
+                allocations_table.c.sale_id,
+                allocations_table.c.batch_id,
+                allocations_table.c.product_id,
+                allocations_table.c.quantity,
+            )
+        )
+        rows = db.execute(stmt).all()
+
+        # Lotes já carregados na sessão (ex.: Product.batches) não podem ficar com o saldo antigo
+        for batch_id in {row.batch_id for row in rows}:
+            batch = db.identity_map.get(db.identity_key(ProductBatch, batch_id))
+            if batch is not None:
+                db.expire(batch, ["quantity"])
+        return rows
+
     def deduct_stock_from_sale(self, db: Session, *, sale: Sale) -> None:
-        """Refatorado para usar o método central _create_stock_movement."""
-        for item in sale.items:
-            product = db.get(Product, item.product_id)
-
-            if product:
-                if product.store_id != sale.store_id:
-                    logger.error(f"Tentativa de dedução de estoque para o produto ID {item.product_id} que não pertence à loja da venda ID {sale.id}.")
-                    continue 
-
-                self._create_stock_movement(
-                    db=db,
-                    product=product,
-                    user_id=sale.user_id,
-                    quantity_change=-item.quantity,
-                    movement_type=MovementType.SALE,
-                    reason=f"Venda ID: {sale.id}"
-                )
-            else:
-                logger.error(f"Produto com ID {item.product_id} não encontrado para dedução de estoque na venda {sale.id}.")
+        """ Baixa o estoque de todos os itens de uma venda. Ver deduct_stock_from_sales. """
+        self.deduct_stock_from_sales(
+            db,
+            store_id=sale.store_id,
+            user_id=sale.user_id,
+            lines=[(sale.id, item.product_id, item.variation_id, item.quantity) for item in sale.items],
+        )
+
+    def deduct_stock_from_sales(
+        self, db: Session, *, store_id: int, user_id: int, lines: List[Tuple[int, int, Optional[int], int]]
+    ) -> None:
+        """
+        Baixa o estoque dos itens de uma ou mais vendas da mesma loja com um UPDATE em lote,
+        consome os lotes por validade (FEFO) e grava as movimentações com um único INSERT.
+        `lines` são tuplas (sale_id, product_id, variation_id, quantidade).
+
+        Cada venda ganha a sua movimentação, com o saldo logo após ela (em ordem de venda),
+        como se as vendas tivessem sido feitas uma a uma.
+        """
+        # Consolida linhas repetidas: no UPDATE ... FROM cada linha alvo só recebe um delta
+        deltas: Dict[Tuple[int, Optional[int]], int] = defaultdict(int)
+        sale_deltas: Dict[Tuple[int, int, Optional[int]], int] = defaultdict(int)
+        for sale_id, product_id, variation_id, quantity in sorted(lines, key=lambda line: line[0]):
+            deltas[(product_id, variation_id)] -= quantity
+            sale_deltas[(sale_id, product_id, variation_id)] -= quantity
+        if not deltas:
+            return
+
+        rows = self.apply_sale_deltas(db, store_id=store_id, deltas=deltas)
+
+        updated_products = {}
+        updated_variations = set()
+        for row in rows:
+            updated_products[row.id] = row
+            if row.variation_id is not None:
+                updated_variations.add(row.variation_id)
+                self._sync_loaded(db, ProductVariation, row.variation_id, "stock", row.variation_stock)
+
+        # Saldo de cada produto antes do lote de vendas; cada movimentação soma o seu delta a ele
+        running_stock = {row.id: row.stock - row.delta for row in updated_products.values()}
+        movements = []
+        demand: Dict[Tuple[int, int], float] = defaultdict(float)
+        for (sale_id, product_id, variation_id), delta in sale_deltas.items():
+            if product_id not in updated_products:
+                logger.error(f"Produto com ID {product_id} não encontrado na loja da venda {sale_id}; estoque não deduzido.")
+                continue
+            if variation_id is not None and variation_id not in updated_variations:
+                logger.error(f"Variação ID {variation_id} não pertence ao produto ID {product_id} (venda {sale_id}); apenas o produto foi deduzido.")
+            running_stock[product_id] += delta
+            demand[(sale_id, product_id)] -= delta
+            movements.append({
+                "product_id": product_id,
+                "variation_id": variation_id,
+                "user_id": user_id,
+                "movement_type": MovementType.SALE,
+                "quantity": delta,
+                "stock_after_movement": running_stock[product_id],
+                "reason": f"Venda ID: {sale_id}",
+                "store_id": store_id,
+            })
+
+        if movements:
+            db.execute(insert(StockMovement), movements)
+
+        # Só depois do UPDATE em products (que trava as linhas dos produtos vendidos)
+        self.consume_batches_fefo(db, store_id=store_id, demand=demand)
+
+        for row in updated_products.values():
+            self._sync_loaded(db, Product, row.id, "stock", row.stock)
+            stock_alert_service.check_threshold_values(
+                db,
+                product_id=row.id,
+                product_name=row.name,
+                store_id=row.store_id,
+                current_stock=row.stock,
+                low_stock_threshold=row.low_stock_threshold,
+                previous_stock=row.stock - row.delta,
+            )
 
     def adjust_stock(
         self, db: Session, *, product_id: int, new_stock_level: int, user: User, reason: str
@@ -81,8 +391,13 @@ class StockService:
         product = db.get(Product, product_id)
         if not product:
             return None
-            
-        quantity_change = new_stock_level - product.stock
+
+        # Trava a linha: a diferença precisa ser calculada sobre o saldo atual,
+        # não sobre o que foi lido antes de uma venda concorrente.
+        current_stock = db.execute(
+            select(Product.stock).where(Product.id == product_id).with_for_update()
+        ).scalar_one()
+        quantity_change = new_stock_level - current_stock
 
         return self._create_stock_movement(
             db=db,
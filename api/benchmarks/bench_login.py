@@ -0,0 +1,130 @@
+# api/benchmarks/bench_login.py
+"""
+Benchmark de login na troca de turno: muitos caixas entrando ao mesmo tempo.
+
+Mede vazão (logins/s), latência (p50/p95) e, principalmente, o atraso do event loop
+durante o pico: uma corrotina "sonda" acorda a cada 5ms e registra o quanto atrasou.
+Com o bcrypt rodando direto na rota esse atraso cresce com o número de logins
+simultâneos; com o pool de hash (app.core.security) ele deve ficar perto de zero.
+
+A primeira fase roda o verify inline no loop, só como referência de comparação.
+
+Metade dos usuários é criada com hash de custo baixo (simulando senhas gravadas antes de
+um aumento de BCRYPT_ROUNDS): ao final verifica que todos foram regravados no custo atual.
+
+Uso (banco descartável e migrado, ver benchmarks/common.py):
+    python -m benchmarks.bench_login --users 40 --logins 3
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from passlib.context import CryptContext
+from sqlalchemy import select
+
+from app.core.security import pwd_context, verify_password
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from app.schemas.enums import UserRole
+from benchmarks.common import make_client, seed_store
+
+PASSWORD = "troca-de-turno"
+PROBE_INTERVAL = 0.005
+
+
+async def probe_loop_lag(stop: asyncio.Event, lags: list) -> None:
+    """ Registra quanto cada sleep de 5ms atrasou além do previsto. """
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def measure(coro_factory, count: int):
+    stop = asyncio.Event()
+    lags: list = []
+    probe = asyncio.create_task(probe_loop_lag(stop, lags))
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*[coro_factory(i) for i in range(count)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    return elapsed, sorted(latencies), max(lags, default=0.0)
+
+
+def report(label: str, count: int, elapsed: float, latencies: list, max_lag: float) -> None:
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000
+    print(f"[{label}] {count} logins em {elapsed:.2f}s ({count / elapsed:.1f}/s) | "
+          f"p50={p50:.1f}ms p95={p95:.1f}ms | maior atraso do event loop={max_lag * 1000:.1f}ms")
+
+
+async def run(users: int, logins: int) -> bool:
+    seed = await seed_store(products=0, tables=0)
+    legacy_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    current_hash = pwd_context.hash(PASSWORD)
+    legacy_hash = legacy_context.hash(PASSWORD)
+
+    async with AsyncSessionLocal() as db:
+        cashiers = [
+            User(
+                full_name=f"Caixa {i}",
+                email=f"caixa{i}-{seed['store_id']}@example.com",
+                hashed_password=legacy_hash if i % 2 else current_hash,
+                role=UserRole.CASHIER,
+                store_id=seed["store_id"],
+            )
+            for i in range(users)
+        ]
+        db.add_all(cashiers)
+        await db.commit()
+        emails = [c.email for c in cashiers]
+        user_ids = [c.id for c in cashiers]
+
+    total = users * logins
+
+    # --- Referência: verify inline, bloqueando o event loop ---
+    async def inline_verify(i: int) -> float:
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        verify_password(PASSWORD, current_hash)
+        return time.perf_counter() - start
+
+    report("inline", total, *(await measure(inline_verify, total)))
+
+    # --- Caminho real: POST /login/token ---
+    client = make_client(seed["user_id"])
+    failures = []
+    try:
+        async def login(i: int) -> float:
+            start = time.perf_counter()
+            r = await client.post("/login/token", data={"username": emails[i % users], "password": PASSWORD})
+            if r.status_code != 200:
+                failures.append(r.status_code)
+            return time.perf_counter() - start
+
+        report("api", total, *(await measure(login, total)))
+    finally:
+        await client.aclose()
+
+    async with AsyncSessionLocal() as db:
+        hashes = (await db.execute(select(User.hashed_password).where(User.id.in_(user_ids)))).scalars().all()
+    outdated = sum(1 for h in hashes if pwd_context.needs_update(h))
+    print(f"falhas de login={len(failures)}, hashes ainda no custo antigo={outdated}")
+
+    ok = not failures and outdated == 0
+    print("OK" if ok else "FALHOU")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=40, help="Caixas fazendo login")
+    parser.add_argument("--logins", type=int, default=3, help="Logins por caixa")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.users, args.logins)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# api/benchmarks/bench_serialization.py
+"""
+Benchmark de serialização das leituras quentes: cozinha, mesas, busca do PDV e histórico de vendas.
+
+Para cada rota compara, por requisição:
+- antes:  carrega o grafo do ORM (produto -> categoria -> subcategorias -> variações ...)
+          e valida com o schema aninhado (from_attributes), como o response_model fazia;
+- depois: consulta só de colunas montando dicionários planos + orjson (FlatJSONResponse).
+
+Mede separadamente o tempo da consulta e o da serialização (mediana de --repeat rodadas)
+e o tamanho do JSON. Ao final confere que os dois caminhos devolvem os mesmos registros (IDs).
+
+Uso (banco descartável e migrado, ver benchmarks/common.py):
+    python -m benchmarks.bench_serialization --tables 30 --sales 200 --repeat 30
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import List
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload, selectinload
+
+from app import crud
+from app.core.responses import FlatJSONResponse
+from app.crud.crud_order import order as crud_order
+from app.crud.crud_table import table as crud_table
+from app.db.session import AsyncSessionLocal
+from app.models.category import ProductCategory
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+from app.models.variation import ProductVariation
+from app.models.table import Table as TableModel
+from app.models.user import User
+from app.schemas.enums import OrderItemStatus, OrderStatus
+from app.schemas.order import Order as OrderSchema
+from app.schemas.product import Product as ProductSchema
+from app.schemas.sale import Sale as SaleSchema
+from app.schemas.table import Table as TableSchema
+from benchmarks.common import make_client, seed_store
+
+PRICE = 10.0
+
+
+async def legacy_kitchen_orders(db, current_user) -> list:
+    """ Caminho antigo do GET /orders/kitchen: comandas abertas com o grafo completo de cada produto. """
+    stmt = (
+        select(Order)
+        .where(Order.store_id == current_user.store_id, Order.status == OrderStatus.OPEN)
+        .options(
+            selectinload(Order.table),
+            selectinload(Order.user),
+            selectinload(Order.items).joinedload(OrderItem.product).options(
+                joinedload(Product.category).selectinload(ProductCategory.subcategories),
+                joinedload(Product.subcategory),
+                joinedload(Product.supplier),
+                selectinload(Product.variations).selectinload(ProductVariation.options),
+            ),
+        )
+        .order_by(Order.created_at)
+    )
+    return (await db.execute(stmt)).scalars().all()
+
+
+async def legacy_tables(db, current_user) -> list:
+    """ Caminho antigo do GET /tables/: mesas pelo ORM, comandas abertas à parte e model_validate por mesa. """
+    tables = (await db.execute(select(TableModel).where(TableModel.store_id == current_user.store_id))).scalars().all()
+    result_orders = await db.execute(
+        select(
+            Order.table_id, Order.id, Order.created_at,
+            func.bool_or(OrderItem.status == OrderItemStatus.READY).label("has_ready_items")
+        )
+        .join(OrderItem, Order.id == OrderItem.order_id)
+        .where(
+            Order.store_id == current_user.store_id,
+            Order.status == OrderStatus.OPEN,
+            Order.table_id.in_([t.id for t in tables])
+        )
+        .group_by(Order.table_id, Order.id, Order.created_at)
+    )
+    order_info_map = {row.table_id: row for row in result_orders.mappings()}
+
+    response = []
+    for table in tables:
+        table_schema = TableSchema.model_validate(table, from_attributes=True)
+        if table.status == 'occupied' and table.id in order_info_map:
+            order_info = order_info_map[table.id]
+            table_schema.open_order_id = order_info.id
+            table_schema.open_order_created_at = order_info.created_at
+            table_schema.has_ready_items = order_info.has_ready_items or False
+        response.append(table_schema)
+    response.sort(key=lambda t: (0, int(t.number)) if t.number.isdigit() else (1, t.number))
+    return response
+
+
+def scenarios(search: str):
+    """ (nome, carga antiga, schema antigo, carga nova) de cada rota. """
+    return [
+        ("kitchen",
+         legacy_kitchen_orders, List[OrderSchema],
+         lambda db, u: crud_order.get_kitchen_board(db, current_user=u)),
+        ("tables",
+         legacy_tables, List[TableSchema],
+         lambda db, u: crud_table.get_floor_tables(db, current_user=u)),
+        ("lookup",
+         lambda db, u: crud.product.get_multi(db, search=search, limit=10, current_user=u), List[ProductSchema],
+         lambda db, u: crud.product.lookup(db, q=search, limit=10, current_user=u)),
+        ("sales",
+         lambda db, u: crud.sale.get_multi_detailed(db, limit=100, current_user=u), List[SaleSchema],
+         lambda db, u: crud.sale.get_history(db, limit=100, current_user=u)),
+    ]
+
+
+async def seed(tables: int, products: int, sales: int, items_per_order: int) -> dict:
+    data = await seed_store(products=products, stock=1_000_000, price=PRICE, tables=tables)
+    client = make_client(data["user_id"])
+    try:
+        r = await client.post("/cash-registers/open", json={"opening_balance": 100})
+        assert r.status_code in (200, 201), r.text
+        pids = data["product_ids"]
+        for i, table_id in enumerate(data["table_ids"]):
+            items = [{"product_id": pids[(i + j) % len(pids)], "quantity": 1 + j} for j in range(items_per_order)]
+            r = await client.post("/orders/", json={"order_type": "DINE_IN", "table_id": table_id, "items": items})
+            assert r.status_code == 201, r.text
+        for i in range(sales):
+            pid = pids[i % len(pids)]
+            r = await client.post("/sales/", json={
+                "total_amount": PRICE * 2,
+                "items": [{"product_id": pid, "quantity": 2, "price_at_sale": PRICE}],
+                "payments": [{"payment_method": "cash", "amount": PRICE * 2}],
+            })
+            assert r.status_code == 201, r.text
+    finally:
+        await client.aclose()
+    return data
+
+
+async def measure(load, serialize, user_id: int, repeat: int):
+    query_times, serialize_times = [], []
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            user = await db.get(User, user_id)
+            start = time.perf_counter()
+            rows = await load(db, user)
+            mid = time.perf_counter()
+            body = serialize(rows)
+            end = time.perf_counter()
+        query_times.append(mid - start)
+        serialize_times.append(end - mid)
+    return statistics.median(query_times) * 1000, statistics.median(serialize_times) * 1000, body
+
+
+async def run(tables: int, products: int, sales: int, items_per_order: int, repeat: int) -> bool:
+    data = await seed(tables, products, sales, items_per_order)
+    ok = True
+    print(f"{'rota':<8} {'caminho':<7} {'consulta':>10} {'serializa':>10} {'total':>10} {'bytes':>9}")
+    for name, old_load, old_schema, new_load in scenarios(search="Produto"):
+        adapter = TypeAdapter(old_schema)
+        old = await measure(
+            old_load, lambda rows: adapter.dump_json(adapter.validate_python(rows, from_attributes=True)),
+            data["user_id"], repeat
+        )
+        new = await measure(new_load, FlatJSONResponse(None).render, data["user_id"], repeat)
+
+        for label, (query_ms, serialize_ms, body) in (("antes", old), ("depois", new)):
+            print(f"{name:<8} {label:<7} {query_ms:>8.2f}ms {serialize_ms:>8.2f}ms "
+                  f"{query_ms + serialize_ms:>8.2f}ms {len(body):>9}")
+
+        old_ids = [row["id"] for row in orjson.loads(old[2])]
+        new_ids = [row["id"] for row in orjson.loads(new[2])]
+        if old_ids != new_ids:
+            print(f"{name}: registros diferentes (antes={len(old_ids)}, depois={len(new_ids)})")
+            ok = False
+
+    print("OK" if ok else "FALHOU")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, default=30, help="Mesas, cada uma com uma comanda aberta")
+    parser.add_argument("--products", type=int, default=20, help="Produtos da loja")
+    parser.add_argument("--sales", type=int, default=200, help="Vendas no histórico")
+    parser.add_argument("--items", type=int, default=4, help="Itens por comanda")
+    parser.add_argument("--repeat", type=int, default=30, help="Rodadas por caminho (mediana)")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.tables, args.products, args.sales, args.items, args.repeat)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# api/benchmarks/bench_startup.py
+"""
+Perfil de subida do worker: quanto custa `import main` (tempo e memória) e quem pesa.
+
+1. Roda `python -c "import main"` --runs vezes, cada uma num processo novo, e mostra a mediana
+   do tempo de import e o RSS máximo do processo depois do import.
+2. Uma rodada com `python -X importtime` soma o tempo próprio de cada pacote (sqlalchemy,
+   fastapi, pydantic ...) e lista os módulos de app/ mais caros (tempo acumulado).
+3. Confere que os subsistemas pesados e opcionais (PDF/reportlab, e-mail/SMS, analytics) não
+   são carregados na subida: eles são importados no primeiro uso, dentro das rotas.
+
+Não abre conexão com o banco (o engine é criado sem conectar), mas precisa das variáveis
+DATABASE_URL e SECRET_KEY, como a aplicação.
+
+Uso:
+    python -m benchmarks.bench_startup --runs 5 --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = (
+    "reportlab", "app.services.pdf_service",
+    "fastapi_mail", "twilio", "app.services.notification_service",
+    "app.services.analytics_service",
+)
+PROBE = f"""
+import json, resource, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": len(sys.modules),
+    "lazy_loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+def probe() -> Dict:
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", PROBE], cwd=API_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile() -> List[Tuple[str, int, int]]:
+    """ (módulo, tempo próprio em µs, tempo acumulado em µs) de cada import, pelo -X importtime. """
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-X", "importtime", "-c", "import main"],
+        cwd=API_DIR, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def run(runs: int, top: int) -> bool:
+    samples = [probe() for _ in range(runs)]
+    seconds = statistics.median(s["seconds"] for s in samples)
+    rss = statistics.median(s["rss_mb"] for s in samples)
+    print(f"[subida] import main: mediana {seconds * 1000:.0f}ms em {runs} processos, "
+          f"RSS {rss:.1f}MB, {samples[0]['modules']} módulos carregados")
+
+    rows = import_profile()
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    total_us = sum(by_package.values())
+    print(f"\n[pacotes] tempo próprio somado por pacote (total {total_us / 1000:.0f}ms):")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {package:<30} {self_us / 1000:>8.1f}ms  {self_us / total_us * 100:>5.1f}%")
+
+    print("\n[app] módulos da aplicação mais caros (tempo acumulado, inclui o que cada um importa):")
+    app_rows = [row for row in rows if row[0] == "main" or row[0].startswith("app.")]
+    for name, _, cumulative_us in sorted(app_rows, key=lambda row: -row[2])[:top]:
+        print(f"  {name:<45} {cumulative_us / 1000:>8.1f}ms")
+
+    lazy_loaded = sorted({m for s in samples for m in s["lazy_loaded"]})
+    print(f"\n[lazy] carregados na subida (deveriam ser só no primeiro uso): {lazy_loaded or 'nenhum'}")
+    ok = not lazy_loaded
+    print("OK" if ok else "FALHOU")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Processos medidos (a mediana é mostrada)")
+    parser.add_argument("--top", type=int, default=15, help="Linhas nas listas de pacotes e módulos")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.runs, args.top) else 1)
+
+
+if __name__ == "__main__":
+    main()
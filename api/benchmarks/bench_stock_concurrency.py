@@ -0,0 +1,146 @@
+# api/benchmarks/bench_stock_concurrency.py
+"""
+Benchmark de concorrência do estoque: muitas corrotinas vendendo o mesmo SKU.
+
+Cada corrotina faz `--sales` vendas de 1 unidade do mesmo produto via POST /sales/
+(caminho real: venda -> caixa -> CRM -> estoque). Em paralelo, as mesmas corrotinas
+dão entrada/saída em um insumo via POST /ingredients/{id}/update_stock.
+
+Ao final verifica:
+- estoque final do produto == inicial - total vendido;
+- uma movimentação por venda, com `stock_after_movement` todos distintos
+  (valores repetidos indicam lost update);
+- saldo final do insumo == inicial + soma das entradas/saídas;
+- os lotes do produto foram consumidos por validade (FEFO) sem sobre-consumo:
+  soma das alocações == min(total vendido, saldo inicial dos lotes) e nenhum lote negativo;
+- o saldo corrente do caixa == abertura + total vendido (nenhum incremento perdido).
+
+Uso (banco descartável e migrado, ver benchmarks/common.py):
+    python -m benchmarks.bench_stock_concurrency --workers 20 --sales 10
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import func, select
+
+from app.db.session import AsyncSessionLocal
+from app.models.batch import ProductBatch, SaleBatchAllocation
+from app.models.cash_register import CashRegister
+from app.models.ingredient import Ingredient
+from app.models.product import Product
+from app.models.stock_movement import StockMovement
+from app.schemas.enums import UnitOfMeasure
+from benchmarks.common import make_client, seed_store
+
+INITIAL_STOCK = 100_000
+PRICE = 10.0
+OPENING_BALANCE = 100.0
+
+
+async def worker(client, product_id: int, ingredient_id: int, sales: int, latencies: list) -> None:
+    payload = {
+        "total_amount": PRICE,
+        "items": [{"product_id": product_id, "quantity": 1, "price_at_sale": PRICE}],
+        "payments": [{"payment_method": "cash", "amount": PRICE}],
+    }
+    for i in range(sales):
+        start = time.perf_counter()
+        r = await client.post("/sales/", json=payload)
+        latencies.append(time.perf_counter() - start)
+        r.raise_for_status()
+        # Alterna entrada e saída: +2, -1, +2, -1 ...
+        delta = 2.0 if i % 2 == 0 else -1.0
+        r = await client.post(f"/ingredients/{ingredient_id}/update_stock", json={"quantity": delta})
+        r.raise_for_status()
+
+
+async def run(workers: int, sales: int) -> bool:
+    seed = await seed_store(products=1, stock=INITIAL_STOCK, price=PRICE, tables=0)
+    product_id = seed["product_ids"][0]
+
+    async with AsyncSessionLocal() as db:
+        ingredient = Ingredient(
+            name=f"Insumo benchmark {seed['store_id']}", stock=0.0,
+            unit_of_measure=UnitOfMeasure.UNIT, store_id=seed["store_id"]
+        )
+        db.add(ingredient)
+        # Lotes cobrindo só parte das vendas: o restante sai do estoque sem lote
+        batch_sizes = [3.0, 5.0, 7.0, 11.0]
+        db.add_all([
+            ProductBatch(
+                product_id=product_id, store_id=seed["store_id"], quantity=size,
+                expiration_date=date.today() + timedelta(days=i + 1)
+            )
+            for i, size in enumerate(batch_sizes)
+        ])
+        await db.commit()
+        ingredient_id = ingredient.id
+
+    clients = [make_client(seed["user_id"]) for _ in range(workers)]
+    latencies: list = []
+    try:
+        r = await clients[0].post("/cash-registers/open", json={"opening_balance": OPENING_BALANCE})
+        assert r.status_code in (200, 201), r.text
+        register_id = r.json()["id"]
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(c, product_id, ingredient_id, sales, latencies) for c in clients])
+        elapsed = time.perf_counter() - start
+    finally:
+        for c in clients:
+            await c.aclose()
+
+    total = workers * sales
+    expected_ingredient = sum(2.0 if i % 2 == 0 else -1.0 for i in range(sales)) * workers
+
+    async with AsyncSessionLocal() as db:
+        final_stock = await db.scalar(select(Product.stock).where(Product.id == product_id))
+        movements = await db.scalar(select(func.count(StockMovement.id)).where(StockMovement.product_id == product_id))
+        distinct_after = await db.scalar(
+            select(func.count(func.distinct(StockMovement.stock_after_movement))).where(StockMovement.product_id == product_id)
+        )
+        ingredient_stock = await db.scalar(select(Ingredient.stock).where(Ingredient.id == ingredient_id))
+        allocated = await db.scalar(
+            select(func.coalesce(func.sum(SaleBatchAllocation.quantity), 0.0)).where(SaleBatchAllocation.product_id == product_id)
+        )
+        register_balance = await db.scalar(select(CashRegister.current_balance).where(CashRegister.id == register_id))
+        min_batch = await db.scalar(select(func.min(ProductBatch.quantity)).where(ProductBatch.product_id == product_id))
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    print(f"{total} vendas em {elapsed:.2f}s ({total / elapsed:.1f} vendas/s) | p50={p50:.1f}ms p95={p95:.1f}ms")
+    print(f"produto:  estoque final={final_stock} (esperado {INITIAL_STOCK - total}), "
+          f"movimentações={movements}, saldos distintos={distinct_after}")
+    print(f"insumo:   estoque final={ingredient_stock} (esperado {expected_ingredient})")
+    expected_allocated = min(total, sum(batch_sizes))
+    expected_balance = OPENING_BALANCE + total * PRICE
+    print(f"caixa:    saldo corrente={register_balance} (esperado {expected_balance})")
+    print(f"lotes:    consumido={allocated} (esperado {expected_allocated}), menor saldo={min_batch}")
+
+    ok = (
+        final_stock == INITIAL_STOCK - total
+        and movements == total
+        and distinct_after == total
+        and abs(ingredient_stock - expected_ingredient) < 1e-6
+        and abs(allocated - expected_allocated) < 1e-6
+        and min_batch >= 0
+        and abs(register_balance - expected_balance) < 1e-6
+    )
+    print("OK" if ok else "FALHOU")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=20, help="Corrotinas simultâneas")
+    parser.add_argument("--sales", type=int, default=10, help="Vendas por corrotina")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.workers, args.sales)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# api/benchmarks/check_reservations.py
+"""
+Teste de regressão: mesa liberada no meio do dia com reserva pendente para hoje.
+
+O agendador só ativa as reservas na virada do dia; depois disso quem libera a mesa decide se
+ela volta a DISPONÍVEL ou a RESERVADA (crud_reservation.status_after_release).
+
+1. Comanda paga às 14h com reserva às 19h        -> mesa RESERVADA.
+2. Comanda cancelada com reserva mais tarde        -> mesa RESERVADA.
+3. Comanda transferida para outra mesa             -> mesa de origem RESERVADA, destino OCUPADA.
+4. Mesa com duas reservas no dia, uma é apagada    -> continua RESERVADA; apagada a outra, DISPONÍVEL.
+5. Comanda paga sem reserva no dia                 -> mesa DISPONÍVEL.
+
+"Hoje" é o dia em UTC, como no CRUD das reservas: não rode nos últimos 30 minutos do dia (UTC).
+
+Uso (banco descartável e migrado, ver benchmarks/common.py):
+    python -m benchmarks.check_reservations
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+
+from app.db.session import AsyncSessionLocal
+from app.models.table import Table
+from benchmarks.common import make_client, seed_store
+
+PRICE = 10.0
+
+
+async def table_status(table_id: int) -> str:
+    async with AsyncSessionLocal() as db:
+        return (await db.get(Table, table_id)).status.value
+
+
+async def run() -> bool:
+    now = datetime.now(timezone.utc)
+    end_of_day = now.replace(hour=23, minute=59, second=59)
+    if end_of_day - now < timedelta(minutes=30):
+        sys.exit("Faltam menos de 30 minutos para a virada do dia (UTC): rode de novo depois da meia-noite.")
+    # "19h": mais tarde hoje, sem passar da virada do dia
+    tonight = min(now + timedelta(hours=5), end_of_day - timedelta(minutes=20))
+
+    seed = await seed_store(products=1, stock=10_000, price=PRICE, tables=6)
+    product_id = seed["product_ids"][0]
+    paid_table, cancelled_table, source_table, target_table, twice_reserved, free_table = seed["table_ids"]
+    results = []
+
+    api = make_client(seed["user_id"])
+    try:
+        r = await api.post("/cash-registers/open", json={"opening_balance": 100})
+        assert r.status_code in (200, 201), r.text
+
+        async def reserve(table_id: int, at: datetime) -> int:
+            r = await api.post("/reservations/", json={
+                "customer_name": "Cliente Teste", "reservation_time": at.isoformat(),
+                "number_of_people": 2, "table_id": table_id, "duration_minutes": 5,
+            })
+            assert r.status_code == 201, r.text
+            return r.json()["id"]
+
+        async def open_order(table_id: int) -> dict:
+            r = await api.post("/orders/", json={
+                "order_type": "DINE_IN", "table_id": table_id,
+                "items": [{"product_id": product_id, "quantity": 1}],
+            })
+            assert r.status_code == 201, r.text
+            return r.json()
+
+        async def pay(order: dict) -> None:
+            r = await api.post(f"/orders/{order['id']}/pay", json={
+                "items_to_pay": [{"order_item_id": order["items"][0]["id"], "quantity": 1}],
+                "payments": [{"payment_method": "cash", "amount": PRICE}],
+            })
+            assert r.status_code == 200, r.text
+
+        def check(name: str, table_id: int, status: str, expected: str) -> None:
+            print(f"[{name}] mesa {table_id}: {status} (esperado {expected})")
+            results.append(status == expected)
+
+        # --- 1. Pagamento ---
+        order = await open_order(paid_table)
+        await reserve(paid_table, tonight)
+        await pay(order)
+        check("pagamento", paid_table, await table_status(paid_table), "reserved")
+
+        # --- 2. Cancelamento ---
+        order = await open_order(cancelled_table)
+        await reserve(cancelled_table, tonight)
+        r = await api.patch(f"/orders/{order['id']}/cancel")
+        assert r.status_code == 200, r.text
+        check("cancelamento", cancelled_table, await table_status(cancelled_table), "reserved")
+
+        # --- 3. Transferência ---
+        order = await open_order(source_table)
+        await reserve(source_table, tonight)
+        r = await api.post(f"/orders/{order['id']}/transfer", json={"target_table_id": target_table})
+        assert r.status_code == 200, r.text
+        check("transferência/origem", source_table, await table_status(source_table), "reserved")
+        check("transferência/destino", target_table, await table_status(target_table), "occupied")
+
+        # --- 4. Duas reservas no mesmo dia ---
+        first = await reserve(twice_reserved, tonight)
+        second = await reserve(twice_reserved, tonight + timedelta(minutes=10))
+        r = await api.delete(f"/reservations/{first}")
+        assert r.status_code == 200, r.text
+        check("reserva apagada (resta outra)", twice_reserved, await table_status(twice_reserved), "reserved")
+        r = await api.delete(f"/reservations/{second}")
+        assert r.status_code == 200, r.text
+        check("reserva apagada (nenhuma)", twice_reserved, await table_status(twice_reserved), "available")
+
+        # --- 5. Sem reserva ---
+        order = await open_order(free_table)
+        await pay(order)
+        check("pagamento sem reserva", free_table, await table_status(free_table), "available")
+    finally:
+        await api.aclose()
+
+    ok = all(results)
+    print("OK" if ok else "FALHOU")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+    sys.exit(0 if asyncio.run(run()) else 1)
+
+
+if __name__ == "__main__":
+    main()
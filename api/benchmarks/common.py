@@ -0,0 +1,73 @@
+# api/benchmarks/common.py
+"""
+Utilitários compartilhados pelos scripts de estresse/benchmark.
+
+Os scripts rodam a aplicação real em processo (httpx + ASGITransport) contra o banco
+apontado por DATABASE_URL. Use SEMPRE um banco descartável, já migrado:
+
+    cd api
+    DATABASE_URL=postgresql+psycopg2://postgres@localhost/vrsales_bench alembic upgrade head
+    DATABASE_URL=postgresql+psycopg2://postgres@localhost/vrsales_bench python -m benchmarks.<script>
+"""
+import uuid
+from typing import Dict, List
+
+import httpx
+
+# Importar o app primeiro garante que todos os modelos estejam registrados no mapper
+from main import app
+from app.core.security import create_access_token, get_password_hash
+from app.db.session import AsyncSessionLocal
+from app.models.product import Product
+from app.models.store import Store
+from app.models.table import Table
+from app.models.user import User
+from app.schemas.enums import UserRole
+
+
+async def seed_store(*, products: int = 5, stock: int = 1000, price: float = 10.0, tables: int = 1) -> Dict:
+    """
+    Cria uma loja isolada (nome único) com um ADMIN, produtos e mesas.
+    Retorna os IDs criados para o script usar.
+    """
+    suffix = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        store = Store(name=f"Benchmark {suffix}")
+        db.add(store)
+        await db.flush()
+
+        user = User(
+            full_name="Benchmark",
+            email=f"bench-{suffix}@example.com",
+            hashed_password=get_password_hash("benchmark"),
+            role=UserRole.ADMIN,
+            store_id=store.id,
+        )
+        db.add(user)
+
+        db_products: List[Product] = [
+            Product(name=f"Produto {suffix}-{i}", price=price, stock=stock, store_id=store.id)
+            for i in range(products)
+        ]
+        db_tables: List[Table] = [Table(number=str(i + 1), store_id=store.id) for i in range(tables)]
+        db.add_all(db_products + db_tables)
+        await db.commit()
+
+        return {
+            "store_id": store.id,
+            "user_id": user.id,
+            "email": user.email,
+            "product_ids": [p.id for p in db_products],
+            "table_ids": [t.id for t in db_tables],
+        }
+
+
+def make_client(user_id: int) -> httpx.AsyncClient:
+    """ Cliente HTTP autenticado falando direto com o app ASGI (sem rede). """
+    token = create_access_token({"sub": str(user_id)})
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://benchmark/api/v1",
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=60.0,
+    )
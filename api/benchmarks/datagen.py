@@ -0,0 +1,249 @@
+# api/benchmarks/datagen.py
+"""
+Gerador de dados sintéticos para os benchmarks: N lojas, cada uma com catálogo, clientes, mesas
+e anos de histórico de vendas distribuídas como num dia real de loja/restaurante (pico no almoço
+e no jantar, quase nada de madrugada, sexta e sábado mais cheios).
+
+Tudo sai de um random.Random(seed): mesma seed, mesmos dados (só os IDs mudam). As lojas têm nome
+com sufixo único, então dá para gerar várias vezes no mesmo banco. O histórico é gravado direto
+(INSERT em lote de vendas, itens e pagamentos), sem passar pelas regras de estoque e caixa.
+
+Recusa rodar num banco cujo nome não tenha "bench" ou "test" (use --any-database para forçar):
+os dados gerados não saem mais de lá sem apagar as lojas.
+
+Uso isolado (banco descartável e migrado, ver benchmarks/common.py):
+    python -m benchmarks.datagen --stores 3 --products 300 --customers 500 --years 2 --sales-per-day 60
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.engine import make_url
+
+# Importar o app primeiro garante que todos os modelos estejam registrados no mapper
+import benchmarks.common  # noqa: F401
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.db.session import AsyncSessionLocal
+from app.models.category import ProductCategory
+from app.models.customer import Customer
+from app.models.payment import Payment
+from app.models.product import Product
+from app.models.sale import Sale, SaleItem
+from app.models.store import Store
+from app.models.table import Table
+from app.models.user import User
+from app.schemas.enums import PaymentMethod, UserRole
+
+# Peso de cada hora do dia (0h..23h) no número de vendas
+HOUR_WEIGHTS = [
+    0.2, 0.1, 0.05, 0.05, 0.05, 0.1, 0.5, 1.5, 3.0, 3.5, 4.0, 6.0,
+    9.0, 8.5, 5.0, 3.5, 3.5, 4.5, 7.0, 8.5, 8.0, 5.5, 3.0, 1.0,
+]
+# Segunda..domingo
+WEEKDAY_WEIGHTS = [0.8, 0.85, 0.9, 1.0, 1.3, 1.45, 1.1]
+PAYMENT_WEIGHTS = {
+    PaymentMethod.PIX: 0.38, PaymentMethod.CREDIT_CARD: 0.27, PaymentMethod.DEBIT_CARD: 0.2,
+    PaymentMethod.CASH: 0.13, PaymentMethod.OTHER: 0.02,
+}
+CATEGORIES = ["Bebidas", "Lanches", "Pratos", "Sobremesas", "Padaria", "Mercearia"]
+PRODUCT_WORDS = {
+    "Bebidas": ["Café", "Cappuccino", "Suco", "Refrigerante", "Água", "Chá", "Cerveja", "Vitamina"],
+    "Lanches": ["Pão de Queijo", "Coxinha", "Pastel", "Misto Quente", "Hambúrguer", "Esfiha"],
+    "Pratos": ["Feijoada", "Parmegiana", "Strogonoff", "Moqueca", "Frango Grelhado", "Lasanha"],
+    "Sobremesas": ["Pudim", "Brigadeiro", "Mousse", "Açaí", "Sorvete", "Torta"],
+    "Padaria": ["Pão Francês", "Croissant", "Sonho", "Bolo", "Broa", "Rosca"],
+    "Mercearia": ["Arroz", "Feijão", "Macarrão", "Azeite", "Biscoito", "Leite"],
+}
+VARIANTS = ["", "Pequeno", "Médio", "Grande", "Especial", "Tradicional", "Integral", "Zero", "Duplo", "da Casa"]
+CHUNK = 2000
+KITCHEN_CATEGORIES = {"Lanches", "Pratos"}
+
+
+def ensure_throwaway_database(any_database: bool) -> None:
+    name = make_url(settings.DATABASE_URL).database or ""
+    if not any_database and "bench" not in name and "test" not in name:
+        sys.exit(f"Banco '{name}' não parece descartável (o nome deve conter 'bench' ou 'test'). Use --any-database para forçar.")
+
+
+def _product_rows(rng: random.Random, store_id: int, suffix: str, count: int, category_ids: Dict[str, int]) -> List[dict]:
+    rows, names = [], set()
+    while len(rows) < count:
+        category = rng.choice(CATEGORIES)
+        name = f"{rng.choice(PRODUCT_WORDS[category])} {rng.choice(VARIANTS)}".strip()
+        if name in names:
+            name = f"{name} {len(rows)}"
+        names.add(name)
+        rows.append({
+            "name": name,
+            "price": round(rng.uniform(3, 80), 2),
+            "cost_price": None,
+            # Alguns poucos com estoque baixo, para o relatório/alerta de estoque ter o que mostrar
+            "stock": rng.randint(0, 15) if rng.random() < 0.05 else rng.randint(1_000, 5_000),
+            "low_stock_threshold": 10,
+            "barcode": f"{suffix}{len(rows):07d}",
+            "send_to_kitchen": category in KITCHEN_CATEGORIES,
+            "category_id": category_ids[category],
+            "store_id": store_id,
+        })
+    return rows
+
+
+def _sale_times(rng: random.Random, days: int, sales_per_day: int) -> List[datetime]:
+    """ Horários das vendas dos últimos `days` dias, pelos pesos de hora e dia da semana. """
+    times = []
+    first_day = date.today() - timedelta(days=days)
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        count = max(0, round(rng.gauss(sales_per_day, sales_per_day * 0.15) * WEEKDAY_WEIGHTS[day.weekday()]))
+        for hour in rng.choices(range(24), weights=HOUR_WEIGHTS, k=count):
+            times.append(datetime(day.year, day.month, day.day, hour, rng.randrange(60), rng.randrange(60)))
+    times.sort()
+    return times
+
+
+async def _insert_returning_ids(db, model, rows: List[dict]) -> List[int]:
+    ids: List[int] = []
+    for start in range(0, len(rows), CHUNK):
+        result = await db.execute(
+            insert(model).returning(model.id, sort_by_parameter_order=True), rows[start:start + CHUNK]
+        )
+        ids.extend(result.scalars().all())
+    return ids
+
+
+async def generate_store(
+    rng: random.Random, *, products: int, customers: int, tables: int, years: float, sales_per_day: int
+) -> Dict:
+    """ Cria uma loja completa e devolve os IDs que os cenários usam. """
+    suffix = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        store = Store(name=f"Benchmark {suffix}")
+        db.add(store)
+        await db.flush()
+        user = User(
+            full_name="Benchmark",
+            email=f"bench-{suffix}@example.com",
+            hashed_password=get_password_hash("benchmark"),
+            role=UserRole.ADMIN,
+            store_id=store.id,
+        )
+        db.add(user)
+        await db.flush()
+
+        category_rows = [{"name": f"{name} {suffix}", "store_id": store.id} for name in CATEGORIES]
+        category_ids = dict(zip(CATEGORIES, await _insert_returning_ids(db, ProductCategory, category_rows)))
+        product_rows = _product_rows(rng, store.id, suffix, products, category_ids)
+        product_ids = await _insert_returning_ids(db, Product, product_rows)
+        prices = [row["price"] for row in product_rows]
+
+        customer_ids = await _insert_returning_ids(db, Customer, [
+            {"full_name": f"Cliente {i}", "email": f"cliente-{suffix}-{i}@example.com", "store_id": store.id}
+            for i in range(customers)
+        ])
+        table_ids = await _insert_returning_ids(db, Table, [
+            {"number": str(i + 1), "store_id": store.id} for i in range(tables)
+        ])
+
+        # Histórico: poucos produtos vendem muito (pesos de Zipf), como no caixa de verdade
+        popularity = [1 / (rank + 1) for rank in range(len(product_ids))]
+        methods, method_weights = list(PAYMENT_WEIGHTS), list(PAYMENT_WEIGHTS.values())
+        times = _sale_times(rng, int(years * 365), sales_per_day)
+        for start in range(0, len(times), CHUNK):
+            chunk = times[start:start + CHUNK]
+            sale_items, sale_rows = [], []
+            for created_at in chunk:
+                picks = rng.choices(range(len(product_ids)), weights=popularity, k=rng.choices([1, 2, 3, 4], [5, 3, 1.5, 0.5])[0])
+                items = [(product_ids[i], rng.choice([1, 1, 1, 2, 3]), prices[i]) for i in picks]
+                sale_items.append(items)
+                sale_rows.append({
+                    "total_amount": round(sum(q * p for _, q, p in items), 2),
+                    "payment_method": rng.choices(methods, method_weights)[0].value,
+                    "user_id": user.id,
+                    "customer_id": rng.choice(customer_ids) if customer_ids and rng.random() < 0.3 else None,
+                    "store_id": store.id,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                })
+            sale_ids = await _insert_returning_ids(db, Sale, sale_rows)
+            item_rows, payment_rows = [], []
+            for sale_id, row, items in zip(sale_ids, sale_rows, sale_items):
+                item_rows.extend(
+                    {"sale_id": sale_id, "product_id": product_id, "quantity": quantity, "price_at_sale": price}
+                    for product_id, quantity, price in items
+                )
+                payment_rows.append({
+                    "sale_id": sale_id, "amount": row["total_amount"], "payment_method": row["payment_method"],
+                    "status": "completed", "created_at": row["created_at"],
+                })
+            await db.execute(insert(SaleItem), item_rows)
+            await db.execute(insert(Payment), payment_rows)
+        await db.commit()
+
+        return {
+            "store_id": store.id,
+            "user_id": user.id,
+            "product_ids": product_ids,
+            "product_names": [row["name"] for row in product_rows],
+            "product_prices": prices,
+            "product_stocks": [row["stock"] for row in product_rows],
+            "customer_ids": customer_ids,
+            "table_ids": table_ids,
+            "sales": len(times),
+        }
+
+
+async def generate(
+    *, stores: int, products: int, customers: int, tables: int, years: float, sales_per_day: int, seed: int
+) -> List[Dict]:
+    rng = random.Random(seed)
+    return [
+        await generate_store(
+            rng, products=products, customers=customers, tables=tables, years=years, sales_per_day=sales_per_day
+        )
+        for _ in range(stores)
+    ]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--stores", type=int, default=2, help="Lojas geradas")
+    parser.add_argument("--products", type=int, default=200, help="Produtos por loja")
+    parser.add_argument("--customers", type=int, default=300, help="Clientes por loja")
+    parser.add_argument("--tables", type=int, default=30, help="Mesas por loja")
+    parser.add_argument("--years", type=float, default=1.0, help="Anos de histórico de vendas")
+    parser.add_argument("--sales-per-day", type=int, default=40, help="Média de vendas por dia, por loja")
+    parser.add_argument("--seed", type=int, default=42, help="Seed do gerador (mesma seed, mesmos dados)")
+    parser.add_argument("--any-database", action="store_true", help="Não exige 'bench'/'test' no nome do banco")
+
+
+async def run(args) -> bool:
+    started = time.perf_counter()
+    generated = await generate(
+        stores=args.stores, products=args.products, customers=args.customers, tables=args.tables,
+        years=args.years, sales_per_day=args.sales_per_day, seed=args.seed,
+    )
+    for store in generated:
+        print(f"loja {store['store_id']}: {len(store['product_ids'])} produtos, {len(store['customer_ids'])} clientes, "
+              f"{len(store['table_ids'])} mesas, {store['sales']} vendas")
+    print(f"gerado em {time.perf_counter() - started:.1f}s")
+    ok = all(store["sales"] > 0 or args.years * args.sales_per_day == 0 for store in generated)
+    print("OK" if ok else "FALHOU")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    args = parser.parse_args()
+    ensure_throwaway_database(args.any_database)
+    sys.exit(0 if asyncio.run(run(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
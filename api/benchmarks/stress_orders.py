@@ -0,0 +1,106 @@
+# api/benchmarks/stress_orders.py
+"""
+Teste de estresse de concorrência em comandas: vários terminais na mesma mesa.
+
+1. N terminais adicionam 1 unidade do mesmo produto ao mesmo tempo
+   -> a quantidade final do item tem que ser exatamente N (sem lost update).
+2. N + extra terminais tentam pagar 1 unidade cada ao mesmo tempo
+   -> exatamente N pagamentos são aceitos, os demais recebem 400 (sem cobrança dupla),
+      e a soma das vendas geradas é N * preço.
+3. Dois terminais enviam If-Match com a mesma versão -> um passa, o outro recebe 409.
+
+Uso (banco descartável e migrado, ver benchmarks/common.py):
+    python -m benchmarks.stress_orders --terminals 20
+"""
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy import func, select
+
+from app.db.session import AsyncSessionLocal
+from app.models.order import OrderItem
+from app.models.sale import Sale
+from benchmarks.common import make_client, seed_store
+
+PRICE = 10.0
+
+
+async def run(terminals: int, extra_payers: int) -> bool:
+    seed = await seed_store(products=1, stock=10_000, price=PRICE, tables=1)
+    product_id = seed["product_ids"][0]
+    table_id = seed["table_ids"][0]
+    ok = True
+
+    clients = [make_client(seed["user_id"]) for _ in range(terminals + extra_payers)]
+    try:
+        api = clients[0]
+        r = await api.post("/cash-registers/open", json={"opening_balance": 100})
+        assert r.status_code in (200, 201), r.text
+        r = await api.post("/orders/", json={"order_type": "DINE_IN", "table_id": table_id})
+        assert r.status_code == 201, r.text
+        order_id = r.json()["id"]
+
+        # --- 1. Inclusões concorrentes ---
+        responses = await asyncio.gather(*[
+            c.post(f"/orders/{order_id}/items", json={"product_id": product_id, "quantity": 1})
+            for c in clients[:terminals]
+        ])
+        failures = [r.status_code for r in responses if r.status_code != 200]
+        order = (await api.get(f"/orders/{order_id}")).json()
+        quantity = sum(i["quantity"] for i in order["items"])
+        print(f"[add]  {terminals} requisições, falhas={failures}, quantidade final={quantity}, versão={order['version']}")
+        if failures or quantity != terminals or len(order["items"]) != 1:
+            ok = False
+        item_id = order["items"][0]["id"]
+
+        # --- 2. Pagamentos concorrentes da mesma linha ---
+        payload = {
+            "items_to_pay": [{"order_item_id": item_id, "quantity": 1}],
+            "payments": [{"payment_method": "cash", "amount": PRICE}],
+        }
+        responses = await asyncio.gather(*[c.post(f"/orders/{order_id}/pay", json=payload) for c in clients])
+        accepted = sum(1 for r in responses if r.status_code == 200)
+        rejected = sum(1 for r in responses if r.status_code == 400)
+
+        async with AsyncSessionLocal() as db:
+            paid = await db.scalar(select(OrderItem.paid_quantity).where(OrderItem.id == item_id))
+            sales_total = await db.scalar(
+                select(func.coalesce(func.sum(Sale.total_amount), 0.0)).where(Sale.store_id == seed["store_id"])
+            )
+        print(f"[pay]  {len(clients)} requisições, aceitas={accepted}, recusadas={rejected}, "
+              f"paid_quantity={paid}, total vendido={sales_total:.2f}")
+        if accepted != terminals or paid != terminals or abs(sales_total - terminals * PRICE) > 0.001:
+            ok = False
+
+        # --- 3. Controle otimista ---
+        r = await api.post("/orders/", json={"order_type": "TAKEOUT"})
+        other_id = r.json()["id"]
+        version = r.json()["version"]
+        responses = await asyncio.gather(*[
+            c.post(f"/orders/{other_id}/items", json={"product_id": product_id, "quantity": 1},
+                   headers={"If-Match": str(version)})
+            for c in clients[:2]
+        ])
+        codes = sorted(r.status_code for r in responses)
+        print(f"[if-match] códigos={codes}")
+        if codes != [200, 409]:
+            ok = False
+    finally:
+        for c in clients:
+            await c.aclose()
+
+    print("OK" if ok else "FALHOU")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--terminals", type=int, default=10, help="Terminais simultâneos na mesma comanda")
+    parser.add_argument("--extra-payers", type=int, default=5, help="Pagamentos além do pendente (devem ser recusados)")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.terminals, args.extra_payers)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+# api/benchmarks/suite.py
+"""
+Suíte de carga dos caminhos quentes do PDV, contra a aplicação real (em processo).
+
+Gera os dados (benchmarks/datagen.py) e põe --terminals terminais simultâneos, espalhados
+pelas lojas, para rodar --rounds cenários sorteados cada um (seed fixa: mesma sequência):
+
+- checkout:   venda no caixa (POST /sales/);
+- mesa:       planta do salão com ETag, abre duas comandas, lança itens, junta, confere e paga;
+- kds:        painel da cozinha consultando as comandas abertas;
+- busca:      busca do PDV letra a letra, como quem digita o nome do produto;
+- dashboard:  resumo do gerente;
+- relatórios: vendas por período/hora/categoria, mais vendidos e histórico de vendas.
+
+Para cada rota registra p50/p95/p99 da latência e as instruções SQL por requisição (lidas do
+header Server-Timing). As primeiras --warmup rodadas de cada terminal não entram na conta.
+
+Comparação com uma rodada guardada:
+    python -m benchmarks.suite --save-baseline /tmp/vrsales-baseline.json     # antes da mudança
+    python -m benchmarks.suite --baseline /tmp/vrsales-baseline.json          # depois
+Falha se o p95 de uma rota piorar mais que --tolerance (e mais que --noise-ms) ou se alguma rota
+passar a fazer mais instruções SQL do que fazia. Compare rodadas com os mesmos parâmetros, na
+mesma máquina.
+
+Banco descartável e migrado (ver benchmarks/common.py); o nome deve conter "bench" ou "test".
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import re
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from loguru import logger
+
+from benchmarks import datagen
+from benchmarks.common import make_client
+
+SCENARIO_WEIGHTS = {"checkout": 35, "mesa": 15, "kds": 20, "busca": 20, "dashboard": 5, "relatorios": 5}
+_SERVER_TIMING_STATEMENTS = re.compile(r'desc="(\d+) consultas"')
+
+
+class ScenarioError(Exception):
+    pass
+
+
+class Recorder:
+    """ Latência e instruções SQL de cada requisição, agrupadas por rótulo ("cenário: rota"). """
+
+    def __init__(self):
+        self.samples: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
+        self.errors: Counter = Counter()
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, *, record: bool, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - started
+        if record:
+            match = _SERVER_TIMING_STATEMENTS.search(response.headers.get("server-timing", ""))
+            self.samples[label].append((elapsed, int(match.group(1)) if match else -1))
+            if response.status_code >= 400:
+                self.errors[label] += 1
+        if response.status_code >= 400:
+            raise ScenarioError(f"{label}: {response.status_code} {response.text[:200]}")
+        return response
+
+
+class Terminal:
+    """ Um caixa/garçom/tela de cozinha de uma loja, com as próprias mesas e a própria seed. """
+
+    def __init__(self, store: Dict, client: httpx.AsyncClient, rng: random.Random, tables: List[int], recorder: Recorder):
+        self.store = store
+        self.client = client
+        self.rng = rng
+        self.tables = tables
+        self.recorder = recorder
+        self.record = False
+        self.tables_etag: Optional[str] = None
+        # Só produtos com estoque folgado vão para o carrinho: o cenário mede a venda, não a recusa
+        self.sellable = [i for i, stock in enumerate(store["product_stocks"]) if stock >= 1_000]
+        self.popularity = [1 / (rank + 1) for rank in range(len(self.sellable))]
+
+    async def call(self, label: str, method: str, url: str, **kwargs) -> httpx.Response:
+        return await self.recorder.call(self.client, label, method, url, record=self.record, **kwargs)
+
+    def _pick_products(self, count: int) -> List[int]:
+        return self.rng.choices(self.sellable, weights=self.popularity, k=count)
+
+    async def checkout(self) -> None:
+        items = [
+            {"product_id": self.store["product_ids"][i], "quantity": self.rng.choice([1, 1, 2]), "price_at_sale": self.store["product_prices"][i]}
+            for i in self._pick_products(self.rng.choice([1, 1, 2, 3, 4]))
+        ]
+        total = round(sum(item["quantity"] * item["price_at_sale"] for item in items), 2)
+        await self.call(
+            "checkout: POST /sales/", "POST", "/sales/",
+            json={"total_amount": total, "items": items, "payments": [{"payment_method": "pix", "amount": total}]},
+            headers={"Idempotency-Key": uuid.uuid4().hex},
+        )
+
+    async def _add_items(self, order_id: int, count: int) -> None:
+        for i in self._pick_products(count):
+            await self.call(
+                "mesa: POST /orders/{order_id}/items", "POST", f"/orders/{order_id}/items",
+                json={"product_id": self.store["product_ids"][i], "quantity": self.rng.choice([1, 1, 2])},
+            )
+
+    async def table_service(self) -> None:
+        headers = {"If-None-Match": self.tables_etag} if self.tables_etag else {}
+        response = await self.call("mesa: GET /tables/", "GET", "/tables/", headers=headers)
+        self.tables_etag = response.headers.get("etag", self.tables_etag)
+
+        first_table, second_table = self.tables
+        first = (await self.call("mesa: POST /orders/", "POST", "/orders/", json={"order_type": "DINE_IN", "table_id": first_table})).json()
+        await self._add_items(first["id"], 3)
+        second = (await self.call("mesa: POST /orders/", "POST", "/orders/", json={"order_type": "DINE_IN", "table_id": second_table})).json()
+        await self._add_items(second["id"], 2)
+        await self.call(
+            "mesa: POST /orders/{order_id}/merge", "POST", f"/orders/{first['id']}/merge",
+            json={"source_order_id": second["id"]},
+        )
+
+        order = (await self.call("mesa: GET /orders/{order_id}", "GET", f"/orders/{first['id']}")).json()
+        pending = [(item["id"], item["quantity"] - item["paid_quantity"], item["price_at_order"]) for item in order["items"]]
+        pending = [p for p in pending if p[1] > 0]
+        total = round(sum(quantity * price for _, quantity, price in pending), 2)
+        await self.call(
+            "mesa: POST /orders/{order_id}/pay", "POST", f"/orders/{first['id']}/pay",
+            json={
+                "items_to_pay": [{"order_item_id": item_id, "quantity": quantity} for item_id, quantity, _ in pending],
+                "payments": [{"payment_method": "credit_card", "amount": total}],
+            },
+        )
+
+    async def kds(self) -> None:
+        for _ in range(3):
+            await self.call("kds: GET /orders/kitchen", "GET", "/orders/kitchen")
+
+    async def lookup(self) -> None:
+        name = self.store["product_names"][self.rng.choice(self.sellable)]
+        for length in range(2, min(len(name), 8) + 1):
+            await self.call("busca: GET /products/lookup", "GET", "/products/lookup", params={"q": name[:length]})
+
+    async def dashboard(self) -> None:
+        await self.call("dashboard: GET /reports/dashboard", "GET", "/reports/dashboard")
+
+    async def reports(self) -> None:
+        end = date.today()
+        period = {"start_date": (end - timedelta(days=30)).isoformat(), "end_date": end.isoformat()}
+        for route in ("sales-by-period", "sales-by-hour", "sales-by-category"):
+            await self.call(f"relatorios: GET /reports/{route}", "GET", f"/reports/{route}", params=period)
+        await self.call("relatorios: GET /reports/top-selling-products", "GET", "/reports/top-selling-products")
+        await self.call("relatorios: GET /sales/", "GET", "/sales/", params={"limit": 50})
+
+    async def run(self, rounds: int, warmup: int) -> None:
+        scenarios = {
+            "checkout": self.checkout, "mesa": self.table_service, "kds": self.kds,
+            "busca": self.lookup, "dashboard": self.dashboard, "relatorios": self.reports,
+        }
+        names, weights = list(SCENARIO_WEIGHTS), list(SCENARIO_WEIGHTS.values())
+        for round_number in range(warmup + rounds):
+            self.record = round_number >= warmup
+            scenario = self.rng.choices(names, weights)[0]
+            try:
+                await scenarios[scenario]()
+            except ScenarioError as e:
+                logger.warning(f"Cenário {scenario} falhou: {e}")
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    """ Percentil pelo posto mais próximo (a lista já vem ordenada). """
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize(recorder: Recorder) -> Dict[str, Dict]:
+    results = {}
+    for label, samples in sorted(recorder.samples.items()):
+        latencies = sorted(elapsed * 1000 for elapsed, _ in samples)
+        statements = sorted(count for _, count in samples)
+        results[label] = {
+            "n": len(samples),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "statements_p50": percentile(statements, 50),
+            "statements_max": statements[-1],
+            "errors": recorder.errors[label],
+        }
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float, noise_ms: float) -> List[str]:
+    regressions = []
+    for label, base in baseline.items():
+        current = results.get(label)
+        if current is None:
+            print(f"[aviso] {label}: está na baseline mas não rodou agora")
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance) and current["p95_ms"] - base["p95_ms"] > noise_ms:
+            regressions.append(f"{label}: p95 {base['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms")
+        if current["statements_max"] > base["statements_max"]:
+            regressions.append(f"{label}: instruções SQL {base['statements_max']} -> {current['statements_max']}")
+    return regressions
+
+
+def print_table(results: Dict[str, Dict], baseline: Optional[Dict[str, Dict]]) -> None:
+    print(f"{'rota':<46} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'SQL':>7} {'erros':>6}  {'p95 vs base':>11}")
+    for label, r in results.items():
+        delta = ""
+        base = (baseline or {}).get(label)
+        if base and base["p95_ms"]:
+            delta = f"{(r['p95_ms'] / base['p95_ms'] - 1) * 100:+.0f}%"
+        statements = f"{r['statements_p50']}/{r['statements_max']}"
+        print(f"{label:<46} {r['n']:>5} {r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms "
+              f"{statements:>7} {r['errors']:>6}  {delta:>11}")
+
+
+async def run(args) -> bool:
+    started = time.perf_counter()
+    stores = await datagen.generate(
+        stores=args.stores, products=args.products, customers=args.customers, tables=args.tables,
+        years=args.years, sales_per_day=args.sales_per_day, seed=args.seed,
+    )
+    print(f"[dados] {len(stores)} lojas, {sum(s['sales'] for s in stores)} vendas de histórico "
+          f"em {time.perf_counter() - started:.1f}s")
+
+    recorder = Recorder()
+    terminals: List[Terminal] = []
+    clients = []
+    try:
+        for store in stores:
+            client = make_client(store["user_id"])
+            clients.append(client)
+            r = await client.post("/cash-registers/open", json={"opening_balance": 100})
+            assert r.status_code in (200, 201), r.text
+        for i in range(args.terminals):
+            store_index = i % len(stores)
+            store = stores[store_index]
+            slot = i // len(stores)
+            tables = store["table_ids"][2 * slot:2 * slot + 2]
+            if len(tables) < 2:
+                sys.exit("Mesas insuficientes: aumente --tables (cada terminal usa 2 por loja).")
+            client = make_client(store["user_id"])
+            clients.append(client)
+            terminals.append(Terminal(store, client, random.Random(f"{args.seed}-{i}"), tables, recorder))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(terminal.run(args.rounds, args.warmup) for terminal in terminals))
+        elapsed = time.perf_counter() - started
+    finally:
+        for client in clients:
+            await client.aclose()
+
+    results = summarize(recorder)
+    total = sum(r["n"] for r in results.values())
+    print(f"[carga] {args.terminals} terminais x {args.rounds} cenários: {total} requisições em {elapsed:.1f}s "
+          f"({total / elapsed:.0f} req/s)")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            stored = json.load(f)
+        baseline = stored["results"]
+        if stored.get("params") != vars_for_baseline(args):
+            print(f"[aviso] parâmetros diferentes da baseline: {stored.get('params')}")
+    print_table(results, baseline)
+
+    ok = not any(r["errors"] for r in results.values())
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance, args.noise_ms)
+        for line in regressions:
+            print(f"[regressão] {line}")
+        ok = ok and not regressions
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "params": vars_for_baseline(args),
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"[baseline] gravada em {args.save_baseline}")
+
+    print("OK" if ok else "FALHOU")
+    return ok
+
+
+def vars_for_baseline(args) -> Dict:
+    """ Parâmetros que mudam a carga: rodadas com valores diferentes não são comparáveis. """
+    keys = ("stores", "products", "customers", "tables", "years", "sales_per_day", "seed", "terminals", "rounds", "warmup")
+    return {key: getattr(args, key) for key in keys}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    datagen.add_arguments(parser)
+    parser.add_argument("--terminals", type=int, default=8, help="Terminais simultâneos (distribuídos entre as lojas)")
+    parser.add_argument("--rounds", type=int, default=40, help="Cenários por terminal")
+    parser.add_argument("--warmup", type=int, default=3, help="Cenários iniciais de cada terminal fora da conta")
+    parser.add_argument("--baseline", help="JSON de uma rodada anterior para comparar")
+    parser.add_argument("--save-baseline", help="Grava esta rodada como baseline neste arquivo")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Piora aceitável do p95 (0.25 = 25%%)")
+    parser.add_argument("--noise-ms", type=float, default=2.0, help="Diferença de p95 abaixo disto nunca é regressão")
+    parser.add_argument("--verbose", action="store_true", help="Mantém o log de cada requisição")
+    args = parser.parse_args()
+    datagen.ensure_throwaway_database(args.any_database)
+    if not args.verbose:
+        # O log por requisição (app e httpx) esconderia a tabela; os avisos da suíte continuam
+        logger.disable("main")
+        logger.disable("app")
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+    sys.exit(0 if asyncio.run(run(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
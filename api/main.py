@@ -1,12 +1,14 @@
 import os
 import time
+from contextlib import asynccontextmanager
 
 # Força o fuso horário da aplicação para o horário de Brasília
 os.environ['TZ'] = 'America/Sao_Paulo'
 if hasattr(time, 'tzset'):
     time.tzset()
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
@@ -14,11 +16,19 @@ from loguru import logger
 # Importa a Base e todos os modelos para garantir que o SQLAlchemy
 # os conheça quando a aplicação iniciar.
 from app.db.base import Base
-from app.models import payment, user, product, customer, supplier, sale, cash_register, ingredient, recipe, additional, batch, table, order
+from app.models import payment, user, product, customer, supplier, sale, cash_register, ingredient, recipe, additional, batch, table, order, idempotency, tenant_data_version
 
 # Importa as novas configurações
 from app.core.logging_config import setup_logging
 from app.core.exception_handler import global_exception_handler
+from app.core.idempotency import IdempotencyMiddleware
+from app.api.conditional import ConditionalHeadersMiddleware
+from app.services.reservation_service import reservation_service
+from app.core.tenant_cache import tenant_cache
+from app.core.config import settings
+from app.core.instrumentation import InstrumentationMiddleware, instrument_engine, metrics
+from app.core.query_detector import QueryDetectorMiddleware, install_detector
+from app.db.session import async_engine
 # --- FIM DA CORREÇÃO ---
 
 from app.api.api import api_router
@@ -28,38 +38,44 @@ from app.api.api import api_router
 setup_logging()
 # --- FIM DA CORREÇÃO ---
 
+# Contagem e tempo das instruções SQL por requisição (Server-Timing, /metrics e log de consultas lentas)
+instrument_engine(async_engine.sync_engine)
+if settings.QUERY_DETECTOR:
+    install_detector(async_engine.sync_engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tarefas em segundo plano: agendador de ativação/expiração das reservas
+    reservation_service.start()
+    # Invalidação do cache por loja entre os workers (LISTEN/NOTIFY)
+    tenant_cache.start()
+    yield
+    await tenant_cache.stop()
+    await reservation_service.stop()
+    # Esvazia a fila das sinks de log (enqueue=True) antes de o processo sair
+    await logger.complete()
+
 # Cria a instância principal da aplicação FastAPI
 app = FastAPI(
     title="Sistema de Gestão de Vendas",
     description="API para o sistema de gestão de vendas.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # --- INÍCIO DA CORREÇÃO ---
 # Adiciona o handler de exceção global
 app.add_exception_handler(Exception, global_exception_handler)
 
-# Adiciona um middleware para logar todas as requisições
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    
-    # Aguarda a resposta da rota
-    response = await call_next(request)
-    
-    process_time = (time.time() - start_time) * 1000
-    formatted_process_time = f"{process_time:.2f}ms"
-
-    # Loga os detalhes da requisição e da resposta
-    logger.info(
-        f"Request: {request.method} {request.url.path} | "
-        f"Status: {response.status_code} | "
-        f"Duration: {formatted_process_time}"
-    )
-    
-    return response
+# A linha de log de cada requisição (com request_id, rota, duração e instruções SQL) é escrita
+# pelo InstrumentationMiddleware, sem uma camada BaseHTTPMiddleware só para isso
 # --- FIM DA CORREÇÃO ---
 
+# Repetições de vendas/pagamentos/itens com o mesmo header Idempotency-Key recebem a resposta guardada
+app.add_middleware(IdempotencyMiddleware)
+# ETag/Last-Modified calculados pelo conditional_get dos routers de catálogo e salão (ver app/api/api.py)
+app.add_middleware(ConditionalHeadersMiddleware)
+
 # Configuração do CORS
 origins = [
     "http://localhost:5173",
@@ -75,6 +91,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Só em desenvolvimento/testes: avisa das consultas repetidas (N+1) de cada requisição
+if settings.QUERY_DETECTOR:
+    app.add_middleware(QueryDetectorMiddleware)
+
+# Por último: é o middleware mais externo, e mede a requisição inteira (inclusive os de cima)
+app.add_middleware(InstrumentationMiddleware)
+
 # Inclui o roteador principal da API, prefixado com /api/v1
 app.include_router(api_router, prefix="/api/v1")
 
@@ -83,4 +106,13 @@ def read_root():
     """
     Endpoint raiz para verificar se a API está funcionando.
     """
-    return {"message": "Bem-vindo à API de Gestão de Vendas!"}
\ No newline at end of file
+    return {"message": "Bem-vindo à API de Gestão de Vendas!"}
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics(request: Request):
+    """
+    Métricas de latência e de banco por rota no formato texto do Prometheus (deste processo).
+    """
+    if settings.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {settings.METRICS_TOKEN}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token de métricas inválido.")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -45,6 +45,14 @@ apiClient.interceptors.response.use(
   }
 );
 
+// Chave única por ação do usuário (ex.: uma finalização de venda). Repetir a requisição
+// com a mesma chave (toque duplo, retry) devolve a resposta da primeira, sem duplicar nada.
+export const newIdempotencyKey = () =>
+  (window.crypto?.randomUUID ? window.crypto.randomUUID() : `${Date.now()}-${Math.random().toString(16).slice(2)}`);
+
+const idempotencyConfig = (idempotencyKey) =>
+  (idempotencyKey ? { headers: { 'Idempotency-Key': idempotencyKey } } : undefined);
+
 // Agrupando todos os métodos da API em um único objeto
 const ApiService = {
   // Funções genéricas
@@ -73,17 +81,19 @@ const ApiService = {
   updateWall: (wallId, wallData) => ApiService.put(`/walls/${wallId}`, wallData),
   deleteWall: (wallId) => ApiService.delete(`/walls/${wallId}`),
   updateWallsLayout: (layoutData) => ApiService.put('/walls/layout', layoutData),
+  updateFloorPlanLayout: (layoutData) => ApiService.put('/tables/floor-plan', layoutData),
 
   // Feedbacks / Chamados
   createFeedback: (data) => ApiService.post('/feedbacks/', data),
-  getFeedbacks: () => ApiService.get('/feedbacks/'),
+  getFeedbacks: (params = {}) => ApiService.get('/feedbacks/', { params }),
   resolveFeedback: (feedbackId) => ApiService.put(`/feedbacks/${feedbackId}/resolve`),
   
   // Caixa
   getCashRegisterStatus: () => ApiService.get('/cash-registers/status'),
   openCashRegister: (data) => ApiService.post('/cash-registers/open', data),
   closeCashRegister: (data) => ApiService.post('/cash-registers/close', data),
-  getCashRegisterHistory: () => ApiService.get('/cash-registers/history'), 
+  getCashRegisterHistory: (params = {}) => ApiService.get('/cash-registers/history', { params }), 
+  getCashRegisterTransactions: (registerId) => ApiService.get(`/cash-registers/${registerId}/transactions`),
 
   // Produtos
   getProducts: (params) => ApiService.get('/products/', { params }),
@@ -95,10 +105,13 @@ const ApiService = {
   // A FUNÇÃO QUE FALTAVA PARA O ESTOQUE FUNCIONAR:
   adjustStock: (productId, data) => ApiService.post(`/products/${productId}/stock-adjustment`, data),
   // Vendas (Sales) - para finalizar o pagamento
-  createSale: (saleData) => ApiService.post('/sales/', saleData),
+  createSale: (saleData, idempotencyKey) => ApiService.post('/sales/', saleData, idempotencyConfig(idempotencyKey)),
+  // Envio em lote da fila de vendas do terminal (cada venda com idempotency_key)
+  syncSales: (sales) => ApiService.post('/sales/sync', { sales }),
 
   // Comandas (Orders) - para a venda persistente no POS
-  processPartialPayment: (orderId, paymentData) => ApiService.post(`/orders/${orderId}/pay`, paymentData),
+  processPartialPayment: (orderId, paymentData, idempotencyKey) =>
+    ApiService.post(`/orders/${orderId}/pay`, paymentData, idempotencyConfig(idempotencyKey)),
 
   createOrder: (orderData) => ApiService.post('/orders/', orderData),
   getActivePosOrder: () => ApiService.get('/orders/pos/active'),
@@ -121,6 +134,8 @@ const ApiService = {
   getStores: () => ApiService.get('/stores'),
   getGlobalDashboardSummary: () => ApiService.get('/super-admin/dashboard'),
   getDashboardSummary: () => ApiService.get('/reports/dashboard'),
+  getLowStockProducts: () => ApiService.get('/reports/low-stock'),
+  getExpiringBatches: (days = 7) => ApiService.get('/batches/expiring', { params: { days } }),
 
   getTopSellingProducts: (limit = 10) => {
     return ApiService.get(`/reports/top-selling-products?limit=${limit}`);
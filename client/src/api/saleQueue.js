@@ -0,0 +1,58 @@
+// client/src/api/saleQueue.js
+import ApiService, { newIdempotencyKey } from './ApiService';
+
+// Vendas finalizadas no terminal que ainda não chegaram à API (rede fora ou lenta)
+const STORAGE_KEY = 'pendingSales';
+const MAX_BATCH = 500; // mesmo limite do POST /sales/sync
+
+const readQueue = () => {
+  try {
+    return JSON.parse(localStorage.getItem(STORAGE_KEY)) || [];
+  } catch (e) {
+    return [];
+  }
+};
+
+const writeQueue = (queue) => localStorage.setItem(STORAGE_KEY, JSON.stringify(queue));
+
+export const pendingSalesCount = () => readQueue().length;
+
+// Guarda a venda no terminal com uma chave única: reenviar nunca duplica a venda no servidor
+export const enqueueSale = (saleData, idempotencyKey = newIdempotencyKey()) => {
+  const queue = readQueue();
+  queue.push({ ...saleData, idempotency_key: idempotencyKey, created_at: new Date().toISOString() });
+  writeQueue(queue);
+  return queue.length;
+};
+
+let flushing = null;
+
+// Envia a fila em lotes. Vendas gravadas (ou já gravadas antes) e recusadas saem da fila;
+// se a requisição falhar, tudo continua na fila para a próxima tentativa.
+export const flushSaleQueue = async () => {
+  if (flushing) return flushing;
+  flushing = (async () => {
+    const summary = { created: 0, duplicate: 0, rejected: [] };
+    try {
+      let queue = readQueue();
+      while (queue.length > 0) {
+        const batch = queue.slice(0, MAX_BATCH);
+        const response = await ApiService.syncSales(batch);
+        const done = new Set();
+        response.data.results.forEach((result) => {
+          done.add(result.idempotency_key);
+          if (result.status === 'rejected') summary.rejected.push(result);
+          else summary[result.status] += 1;
+        });
+        // Relê a fila: vendas podem ter sido enfileiradas durante o envio
+        queue = readQueue().filter((sale) => !done.has(sale.idempotency_key));
+        writeQueue(queue);
+        if (done.size === 0) break;
+      }
+    } finally {
+      flushing = null;
+    }
+    return summary;
+  })();
+  return flushing;
+};
@@ -52,11 +52,12 @@ const AddItemModal = ({ open, onCancel, orderId, onSuccess }) => {
 
         setAddingProductId(product.id);
         try {
+            // view=compact: a tela só precisa saber que deu certo, não da comanda inteira
             await ApiService.post(`/orders/${orderId}/items`, {
                 product_id: product.id,
                 quantity: quantity,
                 notes: notes, // Envia as notas para a API
-            });
+            }, { params: { view: 'compact' } });
             message.success(`${quantity}x "${product.name}" adicionado(s) com sucesso!`);
             onSuccess();
         } catch (error) {
@@ -2,7 +2,7 @@
 import React, { useState, useEffect, useMemo } from 'react';
 import { Modal, Row, Col, Statistic, Select, InputNumber, Button, Form, message, Divider, Space, List, Avatar } from 'antd';
 import { DollarCircleOutlined, CreditCardOutlined, QrcodeOutlined, CloseCircleOutlined } from '@ant-design/icons';
-import ApiService from '../api/ApiService';
+import ApiService, { newIdempotencyKey } from '../api/ApiService';
 
 const { Option } = Select;
 
@@ -10,6 +10,8 @@ const PartialPaymentModal = ({ open, onCancel, onSuccess, orderId, itemsToPay, t
   const [form] = Form.useForm();
   const [loading, setLoading] = useState(false);
   const [payments, setPayments] = useState([{ payment_method: 'cash', amount: 0 }]);
+  // Uma chave por abertura do modal: confirmar duas vezes o mesmo pagamento não cobra em dobro
+  const idempotencyKey = useMemo(() => newIdempotencyKey(), [open]);
 
   // --- INÍCIO DA CORREÇÃO (Lógica de Arredondamento) ---
 
@@ -62,7 +64,7 @@ const PartialPaymentModal = ({ open, onCancel, onSuccess, orderId, itemsToPay, t
         customer_id: customerId,
       };
       
-      await ApiService.processPartialPayment(orderId, payload);
+      await ApiService.processPartialPayment(orderId, payload, idempotencyKey);
       
       // Calcula troco final formatado
       const finalChange = finalTotalPaid - totalToPay;
@@ -2,7 +2,8 @@
 import React, { useState, useEffect, useMemo } from 'react';
 import { Modal, Row, Col, Statistic, Select, InputNumber, Button, Form, message, Divider, Space, Typography } from 'antd';
 import { DollarCircleOutlined, CreditCardOutlined, QrcodeOutlined, CloseCircleOutlined, TeamOutlined, CheckCircleOutlined } from '@ant-design/icons';
-import ApiService from '../api/ApiService';
+import ApiService, { newIdempotencyKey } from '../api/ApiService';
+import { enqueueSale } from '../api/saleQueue';
 
 const { Option } = Select;
 const { Text } = Typography;
@@ -12,6 +13,8 @@ const PaymentModal = ({ open, onCancel, onOk, cartItems, totalAmount, customerId
   const [form] = Form.useForm();
   const [loading, setLoading] = useState(false);
   const [payments, setPayments] = useState([{ payment_method: 'cash', amount: 0 }]);
+  // Uma chave por abertura do modal: confirmar duas vezes a mesma venda não a duplica
+  const idempotencyKey = useMemo(() => newIdempotencyKey(), [open]);
 
   // 1. Cálculos de Totais (Fonte da Verdade)
   const totalToPay = useMemo(() => {
@@ -83,7 +86,7 @@ const PaymentModal = ({ open, onCancel, onOk, cartItems, totalAmount, customerId
       // certifique-se que seu backend consome o 'order_id' para fechar a comanda, 
       // ou chame a rota de fechar pedido separadamente se necessário.
       // Por padrão, mantemos o post em /sales/ conforme seu código original.
-      await ApiService.post('/sales/', saleData);
+      await ApiService.createSale(saleData, idempotencyKey);
 
       const finalChange = finalTotalPaid - totalAmount;
       message.success({
@@ -94,6 +97,13 @@ const PaymentModal = ({ open, onCancel, onOk, cartItems, totalAmount, customerId
       
       onOk(); // Fecha o modal e limpa o carrinho no pai
     } catch (error) {
+        if (!error.response) {
+          // Sem resposta da API (rede fora): a venda fica na fila do terminal e é sincronizada depois
+          const pending = enqueueSale(saleData, idempotencyKey);
+          message.warning(`Sem conexão: venda guardada no terminal (${pending} pendente(s)). Será sincronizada automaticamente.`, 6);
+          onOk();
+          return;
+        }
         console.error("Erro ao finalizar:", error.response);
         const errorMsg = error.response?.data?.detail || 'Erro ao finalizar a venda.';
         message.error(errorMsg, 5);
@@ -0,0 +1,39 @@
+import React from 'react';
+import { List, Spin, Avatar, Typography, Tooltip, Empty } from 'antd';
+import { WarningFilled } from '@ant-design/icons';
+
+const { Text } = Typography;
+
+const LowStockList = ({ data, loading }) => {
+  if (loading) {
+    return (
+      <div style={{ height: 300, display: 'flex', alignItems: 'center', justifyContent: 'center' }}>
+        <Spin />
+      </div>
+    );
+  }
+
+  if (!data || data.length === 0) {
+    return <Empty description="Nenhum produto com estoque baixo" />;
+  }
+
+  return (
+    <List
+      itemLayout="horizontal"
+      dataSource={data}
+      style={{ maxHeight: 360, overflowY: 'auto' }}
+      renderItem={(item) => (
+        <List.Item>
+          <List.Item.Meta
+            avatar={<Avatar style={{ backgroundColor: item.current_stock <= 0 ? '#e74c3c' : '#f39c12' }} icon={<WarningFilled />} />}
+            title={<Tooltip title={item.product_name}>{item.product_name}</Tooltip>}
+            description={`Mínimo: ${item.low_stock_threshold} un.`}
+          />
+          <Text strong type={item.current_stock <= 0 ? 'danger' : 'warning'}>{item.current_stock} un.</Text>
+        </List.Item>
+      )}
+    />
+  );
+};
+
+export default LowStockList;
@@ -0,0 +1,31 @@
+import { useEffect } from 'react';
+import { message } from 'antd';
+import { flushSaleQueue, pendingSalesCount } from '../api/saleQueue';
+
+// Sincroniza a fila de vendas do terminal: ao abrir a tela, quando a rede volta e periodicamente
+export function useSaleQueueSync(interval = 30000) {
+  useEffect(() => {
+    const sync = async () => {
+      if (pendingSalesCount() === 0) return;
+      try {
+        const summary = await flushSaleQueue();
+        if (summary.created > 0) {
+          message.success(`${summary.created} venda(s) pendente(s) sincronizada(s).`);
+        }
+        summary.rejected.forEach((result) => {
+          message.error(`Venda pendente recusada pelo servidor: ${result.detail}`, 8);
+        });
+      } catch (e) {
+        // Continua na fila; tenta de novo no próximo ciclo
+      }
+    };
+
+    sync();
+    const timer = setInterval(sync, interval);
+    window.addEventListener('online', sync);
+    return () => {
+      clearInterval(timer);
+      window.removeEventListener('online', sync);
+    };
+  }, [interval]);
+}
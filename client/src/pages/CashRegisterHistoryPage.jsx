@@ -28,14 +28,19 @@ const PageStyles = () => (
 
 const CashRegisterHistoryPage = () => {
     const [history, setHistory] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const [loading, setLoading] = useState(true);
     const [searchText, setSearchText] = useState('');
+    const [transactionsByRegister, setTransactionsByRegister] = useState({});
 
-    const fetchHistory = useCallback(async () => {
+    // O backend pagina por cursor: a primeira chamada traz os turnos mais recentes
+    // e "Carregar mais" anexa a página seguinte.
+    const fetchHistory = useCallback(async (cursor = null) => {
         setLoading(true);
         try {
-            const response = await ApiService.getCashRegisterHistory();
-            setHistory(response.data);
+            const response = await ApiService.getCashRegisterHistory(cursor ? { cursor } : {});
+            setHistory(prev => cursor ? [...prev, ...response.data.items] : response.data.items);
+            setNextCursor(response.data.next_cursor);
         } catch (error) {
             console.error('Erro ao buscar histórico de caixas', error);
         } finally {
@@ -43,6 +48,44 @@ const CashRegisterHistoryPage = () => {
         }
     }, []);
 
+    // Detalhe das transações só é buscado quando a linha é expandida
+    const handleExpand = async (expanded, record) => {
+        if (!expanded || transactionsByRegister[record.id]) return;
+        try {
+            const response = await ApiService.getCashRegisterTransactions(record.id);
+            setTransactionsByRegister(prev => ({ ...prev, [record.id]: response.data }));
+        } catch (error) {
+            console.error('Erro ao buscar transações do caixa', error);
+        }
+    };
+
+    const renderExpandedRow = (record) => {
+        const transactions = transactionsByRegister[record.id];
+        return (
+            <Space direction="vertical" style={{ width: '100%' }}>
+                <Space wrap>
+                    {Object.entries(record.totals_by_method || {}).map(([method, amount]) => (
+                        <Tag key={method} color="blue">{method}: {formatMoney(amount)}</Tag>
+                    ))}
+                </Space>
+                <Table
+                    size="small"
+                    rowKey="id"
+                    loading={!transactions}
+                    dataSource={transactions || []}
+                    pagination={{ pageSize: 20 }}
+                    columns={[
+                        { title: 'Data', dataIndex: 'created_at', render: (text) => text ? new Date(text).toLocaleString('pt-BR') : '-' },
+                        { title: 'Tipo', dataIndex: 'transaction_type' },
+                        { title: 'Forma', dataIndex: 'payment_method' },
+                        { title: 'Valor', dataIndex: 'amount', render: (val) => formatMoney(val) },
+                        { title: 'Descrição', dataIndex: 'description' },
+                    ]}
+                />
+            </Space>
+        );
+    };
+
     useEffect(() => {
         fetchHistory();
     }, [fetchHistory]);
@@ -117,6 +160,22 @@ const CashRegisterHistoryPage = () => {
                     : <Text type="secondary">-</Text>
             ),
         },
+        {
+            title: 'Total de Vendas',
+            key: 'total_sales',
+            width: '15%',
+            render: (_, record) => <Text>{formatMoney(record.total_sales)}</Text>,
+        },
+        {
+            title: 'Diferença',
+            key: 'balance_difference',
+            width: '10%',
+            render: (_, record) => (
+                record.balance_difference != null
+                    ? <Text style={{ color: record.balance_difference < 0 ? '#cf1322' : '#36B37E' }}>{formatMoney(record.balance_difference)}</Text>
+                    : <Text type="secondary">-</Text>
+            ),
+        },
         {
             title: 'Status',
             dataIndex: 'status',
@@ -166,7 +225,7 @@ const CashRegisterHistoryPage = () => {
                         type="primary" 
                         size="large" 
                         icon={<ReloadOutlined />} 
-                        onClick={fetchHistory}
+                        onClick={() => fetchHistory()}
                         style={{ background: '#FF5630', borderColor: '#FF5630' }}
                     >
                         Atualizar
@@ -183,8 +242,14 @@ const CashRegisterHistoryPage = () => {
                             loading={loading} 
                             rowKey="id" 
                             pagination={{ pageSize: 10 }} 
+                            expandable={{ expandedRowRender: renderExpandedRow, onExpand: handleExpand }}
                             locale={{ emptyText: <Empty description="Nenhum fechamento de caixa registrado." /> }} 
                         />
+                        {nextCursor && (
+                            <div style={{ textAlign: 'center', padding: 16 }}>
+                                <Button onClick={() => fetchHistory(nextCursor)} loading={loading}>Carregar mais</Button>
+                            </div>
+                        )}
                     </Card>
                 </motion.div>
 
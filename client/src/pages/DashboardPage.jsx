@@ -8,11 +8,13 @@ import {
   LineChartOutlined,
   CrownOutlined,
   BarChartOutlined,
-  ReloadOutlined
+  ReloadOutlined,
+  WarningOutlined
 } from '@ant-design/icons';
 import ApiService from '../api/ApiService';
 import SalesByHourChart from '../components/dashboard/SalesByHourChart';
 import TopProductsList from '../components/dashboard/TopProductsList';
+import LowStockList from '../components/dashboard/LowStockList';
 import './DashboardPage.modern.css';
 
 const { Title, Text } = Typography;
@@ -62,14 +64,19 @@ const KpiCard = ({ icon, title, value, prefix, loading, color, precision }) => {
 
 const DashboardPage = () => {
   const [dashboardData, setDashboardData] = useState(null);
+  const [lowStockProducts, setLowStockProducts] = useState([]);
   const [loading, setLoading] = useState(true);
   const [timeRange, setTimeRange] = useState('today');
 
   const fetchDashboardData = useCallback(async () => {
     try {
       setLoading(true);
-      const response = await ApiService.getDashboardSummary();
+      const [response, lowStockResponse] = await Promise.all([
+        ApiService.getDashboardSummary(),
+        ApiService.getLowStockProducts(),
+      ]);
       setDashboardData(response.data);
+      setLowStockProducts(lowStockResponse.data || []);
     } catch (error) {
       message.error('Falha ao carregar os dados do dashboard.');
       console.error(error);
@@ -238,6 +245,18 @@ const DashboardPage = () => {
         </Col>
       </Row>
       
+      {/* --- ESTOQUE BAIXO --- */}
+      <motion.div variants={itemVariants} style={{ marginBottom: 24 }}>
+        <Card
+            loading={loading}
+            bordered={false}
+            className="dashboard-content-card"
+            title={<Space><WarningOutlined style={{ color: '#e67e22' }} /> Estoque Baixo ({lowStockProducts.length})</Space>}
+        >
+            <LowStockList data={lowStockProducts} loading={loading} />
+        </Card>
+      </motion.div>
+
       {/* --- GRÁFICO --- */}
       <motion.div variants={itemVariants}>
         <Card 
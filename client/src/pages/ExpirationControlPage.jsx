@@ -108,11 +108,14 @@ const ExpirationControlPage = () => {
     const fetchData = useCallback(async () => {
         setLoading(true);
         try {
-            const batchesResponse = await ApiService.get('/batches/');
-            const fetchedBatches = batchesResponse.data || [];
-            setBatches(fetchedBatches.sort((a, b) => dayjs(a.expiration_date).unix() - dayjs(b.expiration_date).unix()));
+            // A API já devolve os lotes ordenados por validade; os vencidos/próximos vêm do índice de validade
+            const [batchesResponse, expiringResponse] = await Promise.all([
+                ApiService.get('/batches/'),
+                ApiService.getExpiringBatches(7),
+            ]);
+            setBatches(batchesResponse.data || []);
             
-            const nearExpirationCount = fetchedBatches.filter(b => getExpirationStatus(b.expiration_date).days <= 7).length;
+            const nearExpirationCount = (expiringResponse.data || []).length;
             if (nearExpirationCount > 0) {
                 notification.warning({ message: 'Produtos Próximos do Vencimento', description: `Você tem ${nearExpirationCount} lote(s) vencendo nos próximos 7 dias.`, icon: <WarningFilled />, duration: 10 });
             }
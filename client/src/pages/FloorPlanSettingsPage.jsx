@@ -312,9 +312,11 @@ const FloorPlanSettingsPage = () => {
     const handleSaveLayout = async () => {
         setSaving(true);
         try {
-            const tableLayoutData = { tables: tables.map(t => ({ id: t.id, pos_x: t.pos_x, pos_y: t.pos_y, rotation: t.rotation })) };
-            const wallLayoutData = walls.map(w => ({ id: w.id, pos_x: w.pos_x, pos_y: w.pos_y, rotation: w.rotation }));
-            await Promise.all([ ApiService.put('/tables/layout', tableLayoutData), ApiService.updateWallsLayout(wallLayoutData) ]);
+            // Mesas e paredes vão juntas: o backend salva tudo numa única transação
+            await ApiService.updateFloorPlanLayout({
+                tables: tables.map(t => ({ id: t.id, pos_x: t.pos_x, pos_y: t.pos_y, rotation: t.rotation })),
+                walls: walls.map(w => ({ id: w.id, pos_x: w.pos_x, pos_y: w.pos_y, rotation: w.rotation, width: w.width, height: w.height })),
+            });
             message.success('Layout do salão salvo com sucesso!');
         } catch (error) {
             console.error("Erro ao salvar layout:", error.response?.data || error); message.error('Erro ao salvar o layout.');
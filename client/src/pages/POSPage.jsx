@@ -17,6 +17,7 @@ import ApiService from '../api/ApiService';
 import PaymentModal from '../components/PaymentModal';
 import { useLocation, useNavigate } from 'react-router-dom';
 import { useDebounce } from '../hooks/useDebounce';
+import { useSaleQueueSync } from '../hooks/useSaleQueueSync';
 
 const { Title, Text } = Typography;
 
@@ -211,6 +212,8 @@ const POSPage = () => {
   const [cartItems, setCartItems] = useState([]);
   const [searchLoading, setSearchLoading] = useState(false);
   const [isPaymentModalOpen, setIsPaymentModalOpen] = useState(false);
+  // Vendas guardadas no terminal enquanto a rede estava fora
+  useSaleQueueSync();
   
   const [isCancelModalVisible, setIsCancelModalVisible] = useState(false);
   const [isHelpModalVisible, setIsHelpModalVisible] = useState(false);
@@ -952,6 +955,17 @@ const POSPage = () => {
                 </Card>
               </Col>
             </Row>
+            {closingSummary.balances_by_method && Object.keys(closingSummary.balances_by_method).length > 0 && (
+              <>
+                <Divider orientation="left" plain>Saldo por forma de pagamento</Divider>
+                {Object.entries(closingSummary.balances_by_method).map(([method, amount]) => (
+                  <div key={method} style={{ display: 'flex', justifyContent: 'space-between' }}>
+                    <Text>{method}</Text>
+                    <Text strong>R$ {Number(amount).toFixed(2)}</Text>
+                  </div>
+                ))}
+              </>
+            )}
             <Divider />
             <div style={{ textAlign: 'center' }}>
               <Text type="secondary">Caixa aberto em: {new Date(closingSummary.opened_at).toLocaleString()}</Text><br/>
@@ -108,11 +108,22 @@ const ReservationPage = () => {
         // eslint-disable-next-line react-hooks/exhaustive-deps
     }, []); 
 
+    // Mesas livres no horário e para o nº de pessoas escolhidos (sem reserva sobreposta)
+    const watchedTime = Form.useWatch('reservation_time', form);
+    const watchedPeople = Form.useWatch('number_of_people', form);
+
     useEffect(() => {
+        if (!isModalVisible || !watchedTime || !watchedPeople) {
+            setTables([]);
+            return;
+        }
+        let cancelled = false;
         const fetchTables = async () => {
             try {
-                const response = await ApiService.get('/tables/');
-                setTables(response.data);
+                const response = await ApiService.get('/reservations/available-tables', {
+                    params: { start: watchedTime.toISOString(), party_size: watchedPeople }
+                });
+                if (!cancelled) setTables(response.data);
             } catch (error) {
                  if (error.response?.status !== 401) {
                     console.error("Erro ao carregar mesas:", error);
@@ -120,7 +131,8 @@ const ReservationPage = () => {
             }
         };
         fetchTables();
-    }, []);
+        return () => { cancelled = true; };
+    }, [isModalVisible, watchedTime, watchedPeople]);
 
     const reservationsByDate = useMemo(() => {
         const map = {};
@@ -342,7 +354,7 @@ const ReservationPage = () => {
                             </Row>
                             <Form.Item name="table_id" label="Mesa Designada" rules={[{ required: true, message: 'Selecione a mesa' }]}>
                                 <Select placeholder="Selecione uma mesa disponível" size="large">
-                                    {tables.filter(t => t.status === 'available').map(t => <Option key={t.id} value={t.id}>{t.number} (Cap: {t.capacity})</Option>)}
+                                    {tables.map(t => <Option key={t.id} value={t.id}>{t.number} (Cap: {t.capacity})</Option>)}
                                 </Select>
                             </Form.Item>
                             <Form.Item name="phone_number" label="Telefone (Opcional)">
@@ -5,16 +5,21 @@ import { BugOutlined, CheckCircleOutlined } from '@ant-design/icons';
 import ApiService from '../../api/ApiService';
 
 const { Title, Text } = Typography;
+const PAGE_SIZE = 20;
 
 const FeedbackManagementPage = () => {
     const [feedbacks, setFeedbacks] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
+    // A API devolve páginas (só metadados + URLs das miniaturas); "Carregar mais" busca a próxima
     const fetchFeedbacks = async () => {
         try {
             setLoading(true);
-            const response = await ApiService.getFeedbacks();
-            setFeedbacks(response.data);
+            const response = await ApiService.getFeedbacks({ limit: PAGE_SIZE });
+            setFeedbacks(response.data.items);
+            setNextCursor(response.data.next_cursor);
         } catch (error) {
             message.error('Erro ao carregar chamados.');
         } finally {
@@ -22,6 +27,20 @@ const FeedbackManagementPage = () => {
         }
     };
 
+    const fetchMore = async () => {
+        if (!nextCursor) return;
+        try {
+            setLoadingMore(true);
+            const response = await ApiService.getFeedbacks({ limit: PAGE_SIZE, cursor: nextCursor });
+            setFeedbacks(prev => [...prev, ...response.data.items]);
+            setNextCursor(response.data.next_cursor);
+        } catch (error) {
+            message.error('Erro ao carregar chamados.');
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     useEffect(() => {
         fetchFeedbacks();
     }, []);
@@ -68,44 +87,26 @@ const FeedbackManagementPage = () => {
         },
         {
             title: 'Anexos',
-            dataIndex: 'image_data',
-            key: 'image_data',
+            dataIndex: 'images',
+            key: 'images',
             align: 'center',
             width: 150,
-            render: (image_data) => {
-                let images = [];
-                if (image_data) {
-                    try {
-                        if (typeof image_data === 'string') {
-                            images = JSON.parse(image_data);
-                        } else {
-                            images = image_data;
-                        }
-                        if (typeof images === 'string') {
-                            images = [images];
-                        }
-                    } catch (e) {
-                        images = [image_data];
-                    }
-                }
-
-                return (Array.isArray(images) && images.length > 0) ? (
-                    <Image.PreviewGroup>
-                        <Space size={[8, 8]} wrap style={{ justifyContent: 'center' }}>
-                            {images.map((img, index) => (
-                                <Image 
-                                    key={index} 
-                                    src={img} 
-                                    width={40} 
-                                    height={40}
-                                    style={{ borderRadius: 4, objectFit: 'cover' }} 
-                                    preview={{ mask: '+' }} 
-                                />
-                            ))}
-                        </Space>
-                    </Image.PreviewGroup>
-                ) : <Text type="secondary">-</Text>;
-            },
+            render: (images) => (images && images.length > 0) ? (
+                <Image.PreviewGroup>
+                    <Space size={[8, 8]} wrap style={{ justifyContent: 'center' }}>
+                        {images.map((img) => (
+                            <Image
+                                key={img.id}
+                                src={img.thumbnail_url}
+                                width={40}
+                                height={40}
+                                style={{ borderRadius: 4, objectFit: 'cover' }}
+                                preview={{ src: img.url, mask: '+' }}
+                            />
+                        ))}
+                    </Space>
+                </Image.PreviewGroup>
+            ) : <Text type="secondary">-</Text>,
         },
         {
             title: 'Status',
@@ -152,8 +153,13 @@ const FeedbackManagementPage = () => {
                     dataSource={feedbacks}
                     rowKey="id"
                     loading={loading}
-                    pagination={{ pageSize: 15 }}
+                    pagination={false}
                 />
+                {nextCursor && (
+                    <div style={{ textAlign: 'center', padding: 16 }}>
+                        <Button onClick={fetchMore} loading={loadingMore}>Carregar mais</Button>
+                    </div>
+                )}
             </Card>
         </div>
     );